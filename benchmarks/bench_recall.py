@@ -0,0 +1,98 @@
+"""Benchmark near-duplicate prompt recall.
+
+Indexes a synthetic archive of prompts and times lookups of near-duplicates
+(most of which should hit) and unrelated prompts (which should miss), as well as
+reopening the index. Lookups should stay under 1 ms at 100k entries.
+
+Usage::
+
+    python benchmarks/bench_recall.py [--entries 100000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from mindterm.recall import RecallIndex
+
+LOOKUP_LIMIT_MS = 1.0
+VOCABULARY = [f"word{i}" for i in range(5_000)] + [
+    "python",
+    "asyncio",
+    "reverse",
+    "list",
+    "sort",
+    "dict",
+    "stream",
+    "index",
+]
+
+
+def synthetic_prompt(rng: random.Random) -> str:
+    """Return a prompt of 8 to 30 random words."""
+    words = rng.choices(VOCABULARY, k=rng.randint(8, 30))
+    return "How do I " + " ".join(words) + "?"
+
+
+def near_duplicate(prompt: str, rng: random.Random) -> str:
+    """Return a prompt with different casing, punctuation and one word changed."""
+    words = prompt.lower().rstrip("?").split()
+    words[rng.randrange(3, len(words))] = rng.choice(VOCABULARY)
+    return " ".join(words) + "!"
+
+
+def main() -> None:
+    """Run the benchmark and print lookup latencies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    prompts = [synthetic_prompt(rng) for _ in range(args.entries)]
+    with tempfile.TemporaryDirectory() as directory:
+        index = RecallIndex(directory)
+        start = time.perf_counter()
+        index.add_many((prompt, "answer") for prompt in prompts)
+        print(f"indexed {args.entries} prompts in {time.perf_counter() - start:.1f}s")
+        index.close()
+
+        start = time.perf_counter()
+        index = RecallIndex(directory)
+        print(f"reopened in {(time.perf_counter() - start) * 1000:.1f} ms")
+        size = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in ("signatures.bin", "bands.bin")
+        )
+        print(f"index files: {size / 2**20:.1f} MiB")
+
+        worst = 0.0
+        for name, queries in [
+            ("near-duplicate", [near_duplicate(p, rng) for p in prompts]),
+            ("unrelated", [synthetic_prompt(rng) for _ in range(args.lookups)]),
+        ]:
+            timings = []
+            hits = 0
+            for query in rng.sample(queries, args.lookups):
+                start = time.perf_counter()
+                hits += index.lookup(query) is not None
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p99 = timings[int(len(timings) * 0.99) - 1]
+            worst = max(worst, p99)
+            print(
+                f"{name:<15} hit rate {hits / len(timings):6.1%}  "
+                f"median {statistics.median(timings):.3f} ms  p99 {p99:.3f} ms  "
+                f"max {timings[-1]:.3f} ms"
+            )
+        index.close()
+
+    print(f"worst p99 lookup latency: {worst:.3f} ms (limit {LOOKUP_LIMIT_MS:.0f} ms)")
+    if worst > LOOKUP_LIMIT_MS:
+        raise SystemExit("recall exceeded the latency limit")
+
+
+if __name__ == "__main__":
+    main()
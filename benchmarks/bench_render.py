@@ -0,0 +1,168 @@
+"""Benchmark streamed Markdown rendering.
+
+Compares the legacy full re-render (``Live.update(Markdown(all_text))`` per
+chunk) with ``StreamingMarkdownRenderer`` on synthetic token streams, reporting
+total CPU time, per-chunk latency and the bytes written to the terminal. A
+second scenario streams a single huge code block, where the renderer's window
+keeps the per-update cost flat.
+
+Usage::
+
+    python benchmarks/bench_render.py              # 1k and 10k tokens
+    python benchmarks/bench_render.py --full       # also 50k tokens
+"""
+import argparse
+import io
+import random
+import statistics
+import time
+from collections.abc import Callable, Iterator
+
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+
+from mindterm.pacing import TerminalOutput
+from mindterm.render import StreamingMarkdownRenderer
+
+WORDS = "the model streams tokens into a terminal while rendering markdown".split()
+
+
+def synthetic_tokens(count: int, seed: int = 0) -> Iterator[str]:
+    """Yield roughly ``count`` tokens of mixed Markdown content."""
+    rng = random.Random(seed)
+    produced = 0
+    while produced < count:
+        kind = rng.random()
+        if kind < 0.15:
+            lines = ["```python\n"]
+            lines += [f"value_{i} = compute({i})\n" for i in range(rng.randint(3, 12))]
+            lines.append("```\n\n")
+            parts = lines
+        elif kind < 0.3:
+            parts = [f"- {rng.choice(WORDS)} item {i}\n" for i in range(5)] + ["\n"]
+        else:
+            parts = [f" {rng.choice(WORDS)}" for _ in range(rng.randint(20, 80))]
+            parts[0] = parts[0].strip().capitalize()
+            parts.append(".\n\n")
+        for part in parts:
+            yield part
+            produced += 1
+            if produced >= count:
+                return
+
+
+def long_code_block(count: int) -> Iterator[str]:
+    """Yield ``count`` tokens forming one fenced code block."""
+    yield "```python\n"
+    for i in range(count - 2):
+        yield f"value_{i} = compute({i})\n" if i % 4 == 3 else f"value_{i} "
+    yield "```\n"
+
+
+def render_legacy(console: Console, chunks: list[str], latencies: list[float]) -> None:
+    """Render by re-parsing the whole response on every chunk."""
+    markdown_text = ""
+    with Live("", refresh_per_second=15, console=console) as live:
+        for chunk in chunks:
+            start = time.perf_counter()
+            markdown_text += chunk
+            live.update(Markdown(markdown_text))
+            latencies.append(time.perf_counter() - start)
+
+
+def render_incremental(
+    console: Console,
+    chunks: list[str],
+    latencies: list[float],
+    window: int | None = None,
+) -> None:
+    """Render with the incremental block renderer."""
+    with StreamingMarkdownRenderer(
+        console, refresh_per_second=15, window=window
+    ) as renderer:
+        for chunk in chunks:
+            start = time.perf_counter()
+            renderer.feed(chunk)
+            latencies.append(time.perf_counter() - start)
+
+
+def render_unbounded(
+    console: Console, chunks: list[str], latencies: list[float]
+) -> None:
+    """Render with the incremental renderer without a live window."""
+    render_incremental(console, chunks, latencies, window=0)
+
+
+def measure(
+    render: Callable[[Console, list[str], list[float]], None], chunks: list[str]
+) -> dict[str, float]:
+    """Run one renderer and collect timing statistics."""
+    output = TerminalOutput(io.StringIO())
+    console = Console(file=output, force_terminal=True, width=100)
+    latencies: list[float] = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    render(console, chunks, latencies)
+    latencies.sort()
+    return {
+        "cpu_s": time.process_time() - cpu_start,
+        "wall_s": time.perf_counter() - wall_start,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "out_kib": output.bytes_written / 1024,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print a results table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--full", action="store_true", help="include 50k tokens")
+    parser.add_argument(
+        "--legacy-limit",
+        type=int,
+        default=10_000,
+        help="skip the quadratic legacy renderer above this many tokens",
+    )
+    args = parser.parse_args()
+
+    sizes = [1_000, 10_000] + ([50_000] if args.full else [])
+    header = f"{'tokens':>7} {'renderer':<12} {'cpu s':>8} {'wall s':>8} {'mean ms':>8} {'p99 ms':>8} {'max ms':>8} {'out KiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        chunks = list(synthetic_tokens(size))
+        runs: list[tuple[str, Callable[[Console, list[str], list[float]], None]]] = [
+            ("incremental", render_incremental)
+        ]
+        if size <= args.legacy_limit:
+            runs.insert(0, ("legacy", render_legacy))
+        for name, render in runs:
+            stats = measure(render, chunks)
+            print(
+                f"{size:>7} {name:<12} {stats['cpu_s']:>8.3f} {stats['wall_s']:>8.3f} "
+                f"{stats['mean_ms']:>8.3f} {stats['p99_ms']:>8.3f} {stats['max_ms']:>8.3f} "
+                f"{stats['out_kib']:>9.1f}"
+            )
+
+    print()
+    print("single code block")
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        chunks = list(long_code_block(size))
+        for name, render in [
+            ("unbounded", render_unbounded),
+            ("windowed", render_incremental),
+        ]:
+            stats = measure(render, chunks)
+            print(
+                f"{size:>7} {name:<12} {stats['cpu_s']:>8.3f} {stats['wall_s']:>8.3f} "
+                f"{stats['mean_ms']:>8.3f} {stats['p99_ms']:>8.3f} {stats['max_ms']:>8.3f} "
+                f"{stats['out_kib']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
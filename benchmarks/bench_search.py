@@ -0,0 +1,84 @@
+"""Benchmark full-text search over stored conversations.
+
+Indexes a synthetic archive of stored turns and times a mix of queries.
+Query latency should stay under 50 ms at 100k turns.
+
+Usage::
+
+    python benchmarks/bench_search.py [--turns 100000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from mindterm.search import SearchIndex
+from mindterm.sessions import SessionStore
+
+QUERY_LIMIT_MS = 50.0
+VOCABULARY = [f"word{i}" for i in range(2_000)] + [
+    "python",
+    "asyncio",
+    "database",
+    "index",
+    "latency",
+    "terminal",
+    "markdown",
+    "stream",
+]
+QUERIES = ["python", "asyncio stream", "database index latency", "word42", "markdown"]
+
+
+def build_store(directory: str, turns: int, seed: int = 0) -> SessionStore:
+    """Write a session store with ``turns`` turns of synthetic text."""
+    rng = random.Random(seed)
+    store = SessionStore(directory)
+    session_id = 0
+    for i in range(turns):
+        if i % 50 == 0:
+            session_id = store.create_session(f"session {i // 50}")
+        words = rng.choices(VOCABULARY, k=rng.randint(20, 120))
+        store.append(session_id, "user" if i % 2 == 0 else "assistant", " ".join(words))
+    return store
+
+
+def main() -> None:
+    """Run the benchmark and print query latencies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        store = build_store(os.path.join(directory, "sessions"), args.turns)
+        print(f"wrote {args.turns} turns in {time.perf_counter() - start:.1f}s")
+
+        index = SearchIndex(os.path.join(directory, "search.db"))
+        start = time.perf_counter()
+        index.sync(store)
+        print(f"indexed in {time.perf_counter() - start:.1f}s")
+
+        worst = 0.0
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = index.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            worst = max(worst, max(timings))
+            print(
+                f"{query!r:<28} {len(results):>3} results  "
+                f"median {statistics.median(timings):6.2f} ms  max {max(timings):6.2f} ms"
+            )
+        index.close()
+
+    print(f"worst query latency: {worst:.2f} ms (limit {QUERY_LIMIT_MS:.0f} ms)")
+    if worst > QUERY_LIMIT_MS:
+        raise SystemExit("search exceeded the latency limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark listing and resuming stored sessions.
+
+Builds a session archive with many sessions, then times ``list_sessions`` and
+resuming one large session into a ``Conversation``. Resuming a session with
+thousands of turns should stay under 100 ms.
+
+Usage::
+
+    python benchmarks/bench_sessions.py [--sessions 200] [--turns 5000]
+"""
+import argparse
+import tempfile
+import time
+
+from mindterm.client import SYSTEM_PROMPT
+from mindterm.conversation import Conversation
+from mindterm.sessions import SessionStore
+
+RESUME_LIMIT_MS = 100.0
+
+
+def build_archive(store: SessionStore, sessions: int, turns: int) -> int:
+    """Fill a store with small sessions plus one large one; return its id."""
+    for i in range(sessions):
+        session_id = store.create_session(f"session {i}")
+        for j in range(10):
+            store.append(session_id, "user" if j % 2 == 0 else "assistant", "x" * 400)
+    large = store.create_session("large session")
+    for j in range(turns):
+        role = "user" if j % 2 == 0 else "assistant"
+        store.append(large, role, f"turn {j} " + "lorem ipsum " * 40)
+    return large
+
+
+def main() -> None:
+    """Run the benchmark and print timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(directory)
+        large = build_archive(store, args.sessions, args.turns)
+
+        start = time.perf_counter()
+        listed = store.list_sessions()
+        list_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        conversation = Conversation(SYSTEM_PROMPT, budget=8000)
+        for turn in store.load(large):
+            if turn.role == "user":
+                conversation.add_user(turn.content)
+            else:
+                conversation.add_assistant(turn.content)
+        resume_ms = (time.perf_counter() - start) * 1000
+
+    print(f"list {len(listed)} sessions: {list_ms:8.2f} ms")
+    print(
+        f"resume {args.turns} turns:   {resume_ms:8.2f} ms (limit {RESUME_LIMIT_MS:.0f} ms)"
+    )
+    if resume_ms > RESUME_LIMIT_MS:
+        raise SystemExit("resume exceeded the latency limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark startup time of the ``mdt`` entry point.
+
+Measures the cumulative import time of ``mindterm.main`` with
+``python -X importtime`` and the wall-clock time from process start until the
+first prompt is requested. Exits non-zero when either exceeds its threshold or
+when heavy modules are imported before the first prompt.
+
+Usage::
+
+    python benchmarks/bench_startup.py [--runs 5] [--max-import-ms 400] [--max-prompt-ms 800]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules that must not be imported by ``import mindterm.main``; the OpenAI
+# client is built in a background thread once the UI is up
+DEFERRED_IMPORTS = ["openai", "httpx", "rich.markdown", "rich.live", "mindterm.render"]
+
+# Modules that must not be loaded before the first prompt is shown
+DEFERRED_RENDERING = ["rich.markdown", "rich.live", "mindterm.render"]
+
+FIRST_PROMPT_DRIVER = """
+import sys
+import mindterm.main
+from mindterm.ui import TerminalUI
+
+def first_prompt(self):
+    loaded = [m for m in {deferred!r} if m in sys.modules]
+    print("LOADED:" + ",".join(loaded), flush=True)
+    raise EOFError
+
+TerminalUI.get_user_input = first_prompt
+mindterm.main.run([])
+"""
+
+
+def measure_import_ms() -> tuple[float, list[str]]:
+    """Return the cumulative import time of mindterm.main and deferred imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import mindterm.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = {
+        line.split("|")[2].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    }
+    for line in reversed(result.stderr.splitlines()):
+        if line.rstrip().endswith("| mindterm.main"):
+            cumulative_ms = int(line.split("|")[1]) / 1000
+            return cumulative_ms, [m for m in DEFERRED_IMPORTS if m in imported]
+    raise RuntimeError("mindterm.main not found in -X importtime output")
+
+
+def measure_first_prompt_ms(env: dict[str, str]) -> tuple[float, list[str]]:
+    """Return the time until the first prompt and any deferred modules loaded."""
+    code = FIRST_PROMPT_DRIVER.format(deferred=DEFERRED_RENDERING)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        env=env,
+    )
+    assert process.stdout is not None
+    loaded: list[str] = []
+    elapsed = 0.0
+    for line in process.stdout:
+        if line.startswith("LOADED:"):
+            elapsed = (time.perf_counter() - start) * 1000
+            loaded = [m for m in line.strip().removeprefix("LOADED:").split(",") if m]
+    process.wait()
+    return elapsed, loaded
+
+
+def main() -> None:
+    """Run the benchmark and check the regression thresholds."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=400.0)
+    parser.add_argument("--max-prompt-ms", type=float, default=800.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(
+            os.environ,
+            OPENAI_API_KEY="benchmark-key",
+            MINDTERM_WARMUP="0",
+            MINDTERM_DATA_DIR=data_dir,
+        )
+        imports = [measure_import_ms() for _ in range(args.runs)]
+        prompts = [measure_first_prompt_ms(env) for _ in range(args.runs)]
+
+    import_ms = statistics.median(elapsed for elapsed, _ in imports)
+    prompt_ms = statistics.median(elapsed for elapsed, _ in prompts)
+    loaded = sorted({m for _, modules in imports + prompts for m in modules})
+
+    print(
+        f"import mindterm.main: {import_ms:8.1f} ms (limit {args.max_import_ms:.0f} ms)"
+    )
+    print(
+        f"time to first prompt: {prompt_ms:8.1f} ms (limit {args.max_prompt_ms:.0f} ms)"
+    )
+    print(f"deferred modules loaded at startup: {', '.join(loaded) or 'none'}")
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append("import time")
+    if prompt_ms > args.max_prompt_ms:
+        failures.append("time to first prompt")
+    if loaded:
+        failures.append("deferred modules imported")
+    if failures:
+        raise SystemExit("startup regression: " + ", ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
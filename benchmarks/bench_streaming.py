@@ -0,0 +1,176 @@
+"""End-to-end streaming benchmark against a local mock server.
+
+Starts ``mock_server.py`` in a subprocess, so its work is not counted, and
+drives ``LLMClient`` and ``TerminalUI`` through a number of prompts with output
+going to a null console. Reports throughput, time-to-first-token, client CPU,
+render time and peak memory. Results can be saved as a baseline and later runs
+compared against it; the script exits non-zero when a metric regresses by more
+than the tolerance.
+
+Usage::
+
+    python benchmarks/bench_streaming.py [--prompts 20] [--token-rate 2000] [--chunk-size 4]
+        [--jitter 0.002] [--error-rate 0.1] [--live]
+        [--save-baseline baseline.json] [--baseline baseline.json] [--tolerance 0.2]
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+
+from mock_server import add_profile_arguments
+from rich.console import Console
+
+from mindterm.client import LLMClient
+from mindterm.config import config
+from mindterm.metrics import percentile
+from mindterm.ui import TerminalUI
+
+# Metrics compared against a baseline and whether higher values are better
+COMPARED = {
+    "throughput (tok/s)": True,
+    "TTFT p50 (ms)": False,
+    "TTFT p95 (ms)": False,
+    "CPU per 1k tokens (ms)": False,
+    "render per 1k tokens (ms)": False,
+    "peak RSS (MB)": False,
+}
+
+
+@contextlib.contextmanager
+def mock_server(args: argparse.Namespace) -> Iterator[str]:
+    """Run the mock server in a subprocess and yield its base URL."""
+    command = [
+        sys.executable,
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py"),
+        "--port=0",
+        f"--token-rate={args.token_rate}",
+        f"--chunk-size={args.chunk_size}",
+        f"--tokens={args.tokens}",
+        f"--latency={args.latency}",
+        f"--jitter={args.jitter}",
+        f"--error-rate={args.error_rate}",
+        f"--drop-rate={args.drop_rate}",
+        f"--seed={args.seed}",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        assert process.stdout is not None
+        line = process.stdout.readline()
+        yield line.strip().removeprefix("Serving on ")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def run(args: argparse.Namespace, base_url: str) -> dict[str, float]:
+    """Stream all prompts through the client and UI and collect results."""
+    config.base_url = base_url
+    config.api_key = "benchmark-key"
+    config.endpoints_file = ""  # Only the mock server, no endpoints file
+    config.sessions_enabled = False
+    config.cache_enabled = False
+    config.metrics_log = None
+    config.retry_backoff = 0.05
+
+    client = LLMClient()
+    client.warm_up().join()
+    ui = TerminalUI()
+    ui.live = args.live
+    with open(os.devnull, "w") as null:
+        ui.console = Console(file=null, force_terminal=True, width=100)
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        with contextlib.redirect_stdout(null):
+            for i in range(args.prompts):
+                client.reset_conversation()
+                ui.display_streamed_response(client.get_completion(f"prompt {i}"))
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+    requests = [m for m in client.metrics.requests if not m.cancelled]
+    tokens = sum(m.tokens for m in requests)
+    ttfts = [m.ttft * 1000 for m in requests if m.ttft is not None]
+    render = sum(m.render_time for m in requests)
+    return {
+        "prompts": args.prompts,
+        "answered": len(requests),
+        "failed attempts": sum(h.errors for h in client.router.health.values()),
+        "tokens": tokens,
+        "wall (s)": wall,
+        "throughput (tok/s)": tokens / wall if wall else 0.0,
+        "TTFT p50 (ms)": percentile(ttfts, 50),
+        "TTFT p95 (ms)": percentile(ttfts, 95),
+        "CPU (s)": cpu,
+        "CPU per 1k tokens (ms)": cpu / tokens * 1e6 if tokens else 0.0,
+        "render (s)": render,
+        "render per 1k tokens (ms)": render / tokens * 1e6 if tokens else 0.0,
+        "network (s)": sum(m.network_time for m in requests),
+        "peak RSS (MB)": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    """Return the metrics that regressed beyond the tolerance."""
+    regressions = []
+    for name, higher_is_better in COMPARED.items():
+        old, new = baseline.get(name), results.get(name)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{name}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+    return regressions
+
+
+def main() -> None:
+    """Run the benchmark, print results and check or save the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--scenario", default="default", help="baseline entry name")
+    parser.add_argument("--live", action="store_true", help="render with a live region")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    add_profile_arguments(parser)
+    parser.set_defaults(token_rate=2000.0, chunk_size=4, latency=0.05)
+    args = parser.parse_args()
+
+    with mock_server(args) as base_url:
+        results = run(args, base_url)
+
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print(f"{name:<{width}} {value:>12.2f}")
+
+    if args.save_baseline:
+        baselines: dict[str, dict[str, float]] = {}
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline) as f:
+                baselines = json.load(f)
+        baselines[args.scenario] = results
+        with open(args.save_baseline, "w") as f:
+            json.dump(baselines, f, indent=2)
+        print(f"Saved baseline '{args.scenario}' to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get(args.scenario)
+        if baseline is None:
+            raise SystemExit(f"No baseline '{args.scenario}' in {args.baseline}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            raise SystemExit("streaming regression:\n  " + "\n  ".join(regressions))
+        print(f"No regressions against baseline '{args.scenario}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Local mock of the OpenAI streaming chat completions API.
+
+Streams synthetic Markdown as server-sent events at a configurable token rate
+and chunk size, with latency jitter and injected errors, so the client and
+renderer can be benchmarked without a real provider.
+
+Usage::
+
+    python benchmarks/mock_server.py [--port 8000] [--token-rate 200] [--chunk-size 1]
+        [--tokens 1000] [--latency 0.2] [--jitter 0.005] [--error-rate 0] [--drop-rate 0]
+
+Point the client at it with ``OPENAI_BASE_URL=http://127.0.0.1:8000/v1``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from bench_render import synthetic_tokens
+
+
+@dataclass
+class StreamProfile:
+    """How the mock server streams its answers."""
+
+    # Tokens per second after the first one
+    token_rate: float = 200.0
+    # Tokens per server-sent event
+    chunk_size: int = 1
+    # Tokens per answer
+    tokens: int = 1000
+    # Seconds before the first token
+    latency: float = 0.2
+    # Standard deviation of the delay of each event, in seconds
+    jitter: float = 0.0
+    # Share of requests answered with HTTP 500
+    error_rate: float = 0.0
+    # Share of streams cut off halfway through
+    drop_rate: float = 0.0
+    seed: int = 0
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded HTTP server streaming synthetic chat completions."""
+
+    daemon_threads = True
+
+    def __init__(self, profile: StreamProfile, port: int = 0) -> None:
+        """Start listening on the given port (0 for a free one)."""
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.profile = profile
+        self.tokens = list(synthetic_tokens(profile.tokens, profile.seed))
+        self.rng = random.Random(profile.seed)
+        self.requests = 0
+        self.errors = 0
+        self.drops = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """Return the base URL clients should use."""
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}/v1"
+
+    def plan(self) -> tuple[bool, bool, list[float]]:
+        """Return whether to fail, whether to drop and the per-event jitter."""
+        profile = self.profile
+        events = -(-len(self.tokens) // profile.chunk_size)
+        with self._lock:
+            self.requests += 1
+            fail = self.rng.random() < profile.error_rate
+            drop = not fail and self.rng.random() < profile.drop_rate
+            self.errors += fail
+            self.drops += drop
+            jitter = [self.rng.gauss(0, profile.jitter) for _ in range(events)]
+        return fail, drop, jitter
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Request handler emulating ``POST /v1/chat/completions``."""
+
+    server: MockServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silence request logging."""
+
+    def do_HEAD(self) -> None:
+        """Answer connection warm-up requests."""
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        """Stream the synthetic answer paced by the server's profile."""
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        profile = self.server.profile
+        fail, drop, jitter = self.server.plan()
+        start = time.perf_counter()
+        time.sleep(profile.latency)
+        if fail:
+            body = json.dumps({"error": {"message": "injected error"}}).encode()
+            self.send_response(500)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        tokens = self.server.tokens
+        cut = len(tokens) // 2 if drop else len(tokens)
+        try:
+            for event, i in enumerate(range(0, cut, profile.chunk_size)):
+                due = start + profile.latency + i / profile.token_rate + jitter[event]
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                text = "".join(tokens[i : i + profile.chunk_size])
+                self._send_event(payload["model"], {"content": text}, None)
+            if drop:
+                return
+            self._send_event(payload["model"], {}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client cancelled the stream
+
+    def _send_event(
+        self, model: str, delta: dict[str, str], finish_reason: str | None
+    ) -> None:
+        """Write a single chat completion chunk as a server-sent event."""
+        chunk = {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the stream profile options to an argument parser."""
+    defaults = StreamProfile()
+    parser.add_argument("--token-rate", type=float, default=defaults.token_rate)
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size)
+    parser.add_argument("--tokens", type=int, default=defaults.tokens)
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--drop-rate", type=float, default=defaults.drop_rate)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def profile_from_args(args: argparse.Namespace) -> StreamProfile:
+    """Build a stream profile from parsed arguments."""
+    return StreamProfile(
+        token_rate=args.token_rate,
+        chunk_size=args.chunk_size,
+        tokens=args.tokens,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    """Serve until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServer(profile_from_args(args), args.port)
+    print(f"Serving on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""File attachments for Mind Terminal.
+
+Files are read as a stream of blocks (memory-mapped when large), hashed and
+token-counted as they are decoded, and split into chunks at line boundaries.
+A file that fits the attachment budget is sent as is; a larger one is
+summarized chunk by chunk with concurrent requests, and the summaries are
+collapsed the same way until they fit.
+
+The result is cached by content hash, and the hash by path, size and
+modification time, so re-attaching an unchanged file neither reads it nor
+sends any request.
+"""
+import codecs
+import glob
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contexts (
+    digest TEXT NOT NULL,
+    budget INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    chunks INTEGER NOT NULL,
+    PRIMARY KEY (digest, budget)
+);
+"""
+
+# Files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 1024 * 1024
+BLOCK_SIZE = 256 * 1024
+MAX_FILE_BYTES = 64 * 1024 * 1024
+MAX_FILES = 50
+# Tokens per chunk sent for summarization
+CHUNK_TOKENS = 2000
+
+SUMMARY_PROMPT = (
+    "Summarize part {index} of {total} of the file {path}. Keep names, numbers, "
+    "error messages and anything needed to answer questions about it.\n\n{text}"
+)
+
+
+class TokenCounter:
+    """Running token estimate of text seen in pieces.
+
+    Uses the same estimate as ``conversation.estimate_tokens`` without the
+    per-message overhead, so counting a file block by block gives the same
+    result as counting it whole.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty count."""
+        self.ascii_chars = 0
+        self.other_chars = 0
+
+    @property
+    def tokens(self) -> int:
+        """Return the estimated number of tokens seen so far."""
+        return (self.ascii_chars + 3) // 4 + self.other_chars
+
+    def add(self, text: str) -> None:
+        """Count another piece of text."""
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        self.ascii_chars += ascii_chars
+        self.other_chars += len(text) - ascii_chars
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    counter = TokenCounter()
+    counter.add(text)
+    return counter.tokens
+
+
+class Chunker:
+    """Split streamed text into chunks of at most ``limit`` tokens.
+
+    Chunks end at line boundaries; a line longer than a chunk is cut.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Initialize with the token limit of a chunk."""
+        self.limit = limit
+        self.chunks: list[str] = []
+        self._lines: list[str] = []
+        self._tokens = 0
+        self._partial = ""
+
+    def feed(self, text: str) -> None:
+        """Consume the next piece of text."""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._add(line + "\n")
+
+    def finish(self) -> list[str]:
+        """Return all chunks, including the last partial one."""
+        if self._partial:
+            self._add(self._partial)
+            self._partial = ""
+        self._flush()
+        return self.chunks
+
+    def _add(self, line: str) -> None:
+        """Add a line, starting a new chunk if it does not fit."""
+        tokens = count_tokens(line)
+        if tokens > self.limit:
+            # At least one character per token, so this cuts within the limit
+            for start in range(0, len(line), self.limit):
+                self._add(line[start : start + self.limit])
+            return
+        if self._tokens + tokens > self.limit:
+            self._flush()
+        self._lines.append(line)
+        self._tokens += tokens
+
+    def _flush(self) -> None:
+        """Close the current chunk."""
+        if self._lines:
+            self.chunks.append("".join(self._lines))
+        self._lines = []
+        self._tokens = 0
+
+
+def iter_blocks(path: str) -> Iterator[bytes]:
+    """Yield the bytes of a file block by block, memory-mapping large files."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            while block := f.read(BLOCK_SIZE):
+                yield block
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, size, BLOCK_SIZE):
+                yield mapped[start : start + BLOCK_SIZE]
+
+
+def read_chunks(path: str, chunk_tokens: int) -> tuple[str, int, list[str]]:
+    """Read a text file in one pass.
+
+    Returns its SHA-256 digest, its estimated token count and its text split
+    into chunks of at most ``chunk_tokens`` tokens.
+
+    Raises:
+        ValueError: If the file looks binary.
+    """
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    counter = TokenCounter()
+    chunker = Chunker(chunk_tokens)
+    for i, block in enumerate(iter_blocks(path)):
+        if i == 0 and b"\0" in block[:8192]:
+            raise ValueError(f"{path} looks like a binary file")
+        digest.update(block)
+        text = decoder.decode(block)
+        counter.add(text)
+        chunker.feed(text)
+    text = decoder.decode(b"", final=True)
+    counter.add(text)
+    chunker.feed(text)
+    return digest.hexdigest(), counter.tokens, chunker.finish()
+
+
+def expand(pattern: str) -> list[str]:
+    """Return the files matching a path or glob pattern."""
+    matches = glob.glob(os.path.expanduser(pattern), recursive=True)
+    return sorted(path for path in matches if os.path.isfile(path))
+
+
+@dataclass
+class Attachment:
+    """A file prepared to be sent with the next prompt."""
+
+    path: str
+    digest: str
+    # Estimated tokens of the whole file
+    tokens: int
+    # The file's text, or its summary if it did not fit the budget
+    text: str
+    chunks: int = 1
+    cached: bool = False
+
+    @property
+    def summarized(self) -> bool:
+        """Return whether the text is a summary of the file."""
+        return self.chunks > 1
+
+
+def format_attachments(attachments: list[Attachment]) -> str:
+    """Format attachments to be prepended to a prompt."""
+    parts = []
+    for attachment in attachments:
+        kind = ' summary="true"' if attachment.summarized else ""
+        parts.append(
+            f'<file path="{attachment.path}"{kind}>\n'
+            f"{attachment.text.rstrip()}\n</file>"
+        )
+    return "\n\n".join(parts)
+
+
+class AttachmentCache:
+    """SQLite store of file digests and prepared attachment texts."""
+
+    def __init__(self, path: str) -> None:
+        """Open (or create) the cache database."""
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def digest(self, path: str, stat: os.stat_result) -> str | None:
+        """Return the digest of a file if it is unchanged since it was hashed."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest FROM digests WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        return None if row is None else str(row[0])
+
+    def put_digest(self, path: str, stat: os.stat_result, digest: str) -> None:
+        """Remember the digest of a file."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+            self._db.commit()
+
+    def get(self, digest: str, budget: int) -> tuple[str, int, int] | None:
+        """Return the text, token count and chunk count prepared for a digest."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, tokens, chunks FROM contexts WHERE digest = ? AND budget = ?",
+                (digest, budget),
+            ).fetchone()
+        return None if row is None else (str(row[0]), int(row[1]), int(row[2]))
+
+    def put(
+        self, digest: str, budget: int, text: str, tokens: int, chunks: int
+    ) -> None:
+        """Store the text prepared for a digest."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO contexts VALUES (?, ?, ?, ?, ?)",
+                (digest, budget, text, tokens, chunks),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._db.close()
+
+
+class Attacher:
+    """Prepare files as prompt context within a token budget."""
+
+    def __init__(
+        self,
+        cache: AttachmentCache,
+        budget: int,
+        chunk_tokens: int,
+        summarize: Callable[[list[str]], list[str]],
+    ) -> None:
+        """Initialize the attacher.
+
+        ``summarize`` completes a list of prompts concurrently and returns the
+        answers in order.
+        """
+        self.cache = cache
+        self._chunk_limit = chunk_tokens
+        self.set_budget(budget)
+        self.summarize = summarize
+        self.files = 0
+        self.cached = 0
+        self.summary_requests = 0
+
+    def set_budget(self, budget: int) -> None:
+        """Change the token budget of the files attached from now on."""
+        self.budget = budget
+        self.chunk_tokens = min(self._chunk_limit, budget)
+
+    def attach(self, pattern: str) -> list[Attachment]:
+        """Prepare every file matching a path or glob pattern.
+
+        Raises:
+            ValueError: If nothing matches, too many files match, or a file is
+                too large or binary.
+        """
+        paths = expand(pattern)
+        if not paths:
+            raise ValueError(f"No files match {pattern}")
+        if len(paths) > MAX_FILES:
+            raise ValueError(
+                f"{len(paths)} files match {pattern} (at most {MAX_FILES})"
+            )
+        return [self.attach_file(path) for path in paths]
+
+    def attach_file(self, path: str) -> Attachment:
+        """Prepare a single file, reusing the cached result if it is unchanged."""
+        stat = os.stat(path)
+        if stat.st_size > MAX_FILE_BYTES:
+            raise ValueError(f"{path} is larger than {MAX_FILE_BYTES // 2**20} MiB")
+        self.files += 1
+        key = os.path.abspath(path)
+        digest = self.cache.digest(key, stat)
+        chunks: list[str] = []
+        if digest is None:
+            digest, tokens, chunks = read_chunks(path, self.chunk_tokens)
+            self.cache.put_digest(key, stat, digest)
+
+        cached = self.cache.get(digest, self.budget)
+        if cached is not None:
+            self.cached += 1
+            text, tokens, count = cached
+            return Attachment(path, digest, tokens, text, count, cached=True)
+
+        if not chunks:
+            # Hashed before, but prepared for another budget
+            digest, tokens, chunks = read_chunks(path, self.chunk_tokens)
+        if tokens <= self.budget:
+            text, count = "".join(chunks), 1
+        else:
+            text, count = self.reduce(path, chunks), len(chunks)
+        self.cache.put(digest, self.budget, text, tokens, count)
+        return Attachment(path, digest, tokens, text, count)
+
+    def reduce(self, path: str, chunks: list[str]) -> str:
+        """Summarize chunks concurrently until the summaries fit the budget."""
+        while True:
+            prompts = [
+                SUMMARY_PROMPT.format(index=i, total=len(chunks), path=path, text=chunk)
+                for i, chunk in enumerate(chunks, start=1)
+            ]
+            self.summary_requests += len(prompts)
+            text = "\n\n".join(summary.strip() for summary in self.summarize(prompts))
+            if count_tokens(text) <= self.budget or len(chunks) == 1:
+                return text
+            chunker = Chunker(self.chunk_tokens)
+            chunker.feed(text)
+            next_chunks = chunker.finish()
+            if len(next_chunks) >= len(chunks):
+                return text  # Summaries are not getting shorter
+            chunks = next_chunks
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return attachment statistics for display."""
+        return {
+            "files attached": self.files,
+            "cached": self.cached,
+            "summary requests": self.summary_requests,
+            "budget (tokens)": self.budget,
+        }
@@ -0,0 +1,214 @@
+"""Headless batch mode for Mind Terminal.
+
+Reads prompts from stdin or a file (plain text, one prompt per line, or JSONL)
+and writes answers to stdout as plain text or JSONL, without any Rich or
+prompt_toolkit setup.
+"""
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, TextIO
+
+from mindterm.client import AsyncLLMClient
+
+
+@dataclass
+class BatchJob:
+    """A single prompt to be completed in batch mode."""
+
+    index: int
+    prompt: str
+    id: Any = None
+    chunks: list[str] = field(default_factory=list)
+    error: str | None = None
+    elapsed: float = 0.0
+
+    @property
+    def response(self) -> str:
+        """Return the text received so far."""
+        return "".join(self.chunks)
+
+
+def read_prompts(stream: TextIO, input_format: str = "text") -> list[BatchJob]:
+    """Read batch jobs from a text stream.
+
+    In ``text`` format every non-empty line is a prompt. In ``jsonl`` format
+    every line is an object with a ``prompt`` key and an optional ``id``.
+    """
+    jobs: list[BatchJob] = []
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if input_format == "jsonl":
+            try:
+                record = json.loads(line)
+                prompt = record["prompt"]
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(f"Invalid JSONL prompt on line {line_number}: {e}")
+            jobs.append(BatchJob(len(jobs), str(prompt), record.get("id")))
+        else:
+            jobs.append(BatchJob(len(jobs), line))
+    return jobs
+
+
+class TextWriter:
+    """Write plain-text answers in input order.
+
+    The earliest unfinished answer is streamed as it arrives; answers that
+    finish out of order are held back until everything before them is written.
+    """
+
+    def __init__(self, output: TextIO) -> None:
+        """Initialize the writer."""
+        self.output = output
+        self._jobs: dict[int, BatchJob] = {}
+        self._done: set[int] = set()
+        self._next = 0
+
+    def add(self, job: BatchJob) -> None:
+        """Register a job before it starts streaming."""
+        self._jobs[job.index] = job
+
+    def on_chunk(self, job: BatchJob, chunk: str) -> None:
+        """Handle a chunk of streamed text."""
+        if job.index == self._next:
+            self.output.write(chunk)
+            self.output.flush()
+
+    def on_done(self, job: BatchJob) -> None:
+        """Handle a finished job."""
+        self._done.add(job.index)
+        while self._next in self._done:
+            self._finish(self._jobs.pop(self._next))
+            self._next += 1
+            if self._next in self._jobs:
+                # Catch up on text the new head of the queue has buffered
+                self.output.write(self._jobs[self._next].response)
+        self.output.flush()
+
+    def _finish(self, job: BatchJob) -> None:
+        """Terminate the output of a finished job."""
+        if job.error is not None:
+            print(f"Error getting completion: {job.error}", file=sys.stderr)
+        self.output.write("\n")
+
+
+class JsonlWriter:
+    """Write one JSON record per answer, in completion order."""
+
+    def __init__(self, output: TextIO) -> None:
+        """Initialize the writer."""
+        self.output = output
+
+    def add(self, job: BatchJob) -> None:
+        """Register a job before it starts streaming."""
+
+    def on_chunk(self, job: BatchJob, chunk: str) -> None:
+        """Handle a chunk of streamed text."""
+
+    def on_done(self, job: BatchJob) -> None:
+        """Write the record for a finished job."""
+        record: dict[str, Any] = {"index": job.index}
+        if job.id is not None:
+            record["id"] = job.id
+        record["prompt"] = job.prompt
+        record["response"] = job.response
+        record["error"] = job.error
+        record["elapsed"] = round(job.elapsed, 3)
+        self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.output.flush()
+
+
+@dataclass
+class BatchStats:
+    """Summary of a finished batch run."""
+
+    prompts: int
+    errors: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of prompts completed per second."""
+        return self.prompts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        """Format the summary for display."""
+        return (
+            f"Processed {self.prompts} prompts ({self.errors} errors) in "
+            f"{self.elapsed:.2f}s ({self.throughput:.2f} prompts/sec)"
+        )
+
+
+async def run_batch(
+    client: AsyncLLMClient,
+    jobs: list[BatchJob],
+    writer: TextWriter | JsonlWriter,
+    max_concurrency: int,
+) -> BatchStats:
+    """Complete all jobs with bounded parallelism, writing results as they finish."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(job: BatchJob) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async for chunk in client.stream_completion(job.prompt):
+                    job.chunks.append(chunk)
+                    writer.on_chunk(job, chunk)
+            except Exception as e:
+                job.error = str(e)
+            job.elapsed = time.perf_counter() - start
+            writer.on_done(job)
+
+    for job in jobs:
+        writer.add(job)
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(job) for job in jobs))
+    errors = sum(job.error is not None for job in jobs)
+    return BatchStats(len(jobs), errors, time.perf_counter() - start)
+
+
+def run_headless(
+    input_path: str | None = None,
+    input_format: str | None = None,
+    output_format: str = "text",
+    max_concurrency: int | None = None,
+) -> int:
+    """Run batch mode and return a process exit code."""
+    if input_format is None:
+        is_jsonl = input_path is not None and input_path.endswith(".jsonl")
+        input_format = "jsonl" if is_jsonl else "text"
+
+    try:
+        if input_path is None or input_path == "-":
+            jobs = read_prompts(sys.stdin, input_format)
+        else:
+            with open(input_path, encoding="utf-8") as f:
+                jobs = read_prompts(f, input_format)
+    except (OSError, ValueError) as e:
+        print(f"Error reading prompts: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        client = AsyncLLMClient(max_concurrency)
+    except ValueError as e:
+        print(f"Error initializing client: {e}", file=sys.stderr)
+        return 1
+
+    writer = (
+        JsonlWriter(sys.stdout) if output_format == "jsonl" else TextWriter(sys.stdout)
+    )
+
+    async def main() -> BatchStats:
+        try:
+            return await run_batch(client, jobs, writer, client.max_concurrency)
+        finally:
+            await client.close()
+
+    stats = asyncio.run(main())
+    print(stats, file=sys.stderr)
+    return 1 if stats.errors else 0
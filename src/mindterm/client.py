@@ -1,9 +1,169 @@
-"""OpenAI client for Mind Terminal."""
-from collections.abc import Generator
+"""OpenAI client for Mind Terminal.
 
-from openai import OpenAI
+``openai`` and ``httpx`` take several hundred milliseconds to import, so they
+are only imported when a client is actually constructed.
+"""
+from __future__ import annotations
 
+import asyncio
+import importlib.util
+import os
+import random
+import socket
+import statistics
+import threading
+import time
+from collections.abc import AsyncGenerator, Callable, Generator, Iterable
+from typing import TYPE_CHECKING, Any
+
+from mindterm.attach import (
+    CHUNK_TOKENS,
+    Attacher,
+    Attachment,
+    AttachmentCache,
+    format_attachments,
+)
+from mindterm.cache import ResponseCache, cache_key
+from mindterm.compare import Comparison
 from mindterm.config import config
+from mindterm.conversation import MESSAGE_OVERHEAD_TOKENS, Conversation, estimate_tokens
+from mindterm.hedge import Hedger
+from mindterm.metrics import MetricsRecorder, RequestMetrics
+from mindterm.prefetch import Prefetcher
+from mindterm.ratelimit import (
+    BACKGROUND,
+    INTERACTIVE,
+    OUTPUT_ESTIMATE,
+    RateLimiter,
+    request_tokens,
+    retry_after,
+)
+from mindterm.recall import RecallIndex, RecallMatch
+from mindterm.router import Endpoint, Router, load_endpoints
+from mindterm.search import SearchIndex, SearchResult
+from mindterm.sessions import SessionStore
+from mindterm.stream import StreamInfo, chunk_text, coalesce, iter_text
+from mindterm.summarize import Summarizer, SummaryCache
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+    from openai.types.chat import ChatCompletionMessageParam
+
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+
+def build_messages(content: str) -> list[ChatCompletionMessageParam]:
+    """Build the chat messages sent for a single user prompt."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": content},
+    ]
+
+
+def http_client_options() -> dict[str, Any]:
+    """Build httpx client options from the transport configuration."""
+    import httpx
+
+    http2 = config.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1.")
+        http2 = False
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+        "timeout": httpx.Timeout(config.read_timeout, connect=config.connect_timeout),
+        "http2": http2,
+    }
+
+
+def open_cache() -> ResponseCache | None:
+    """Open the response cache if it is enabled in the configuration."""
+    if not config.cache_enabled:
+        return None
+    return ResponseCache(config.cache_path, config.cache_max_bytes, config.cache_ttl)
+
+
+def open_sessions() -> SessionStore | None:
+    """Open the session store if session persistence is enabled."""
+    if not config.sessions_enabled:
+        return None
+    return SessionStore(os.path.join(config.data_dir, "sessions"))
+
+
+def open_rate_limiter() -> RateLimiter | None:
+    """Open the rate limiter if request or token limits are configured."""
+    if config.rate_rpm <= 0 and config.rate_tpm <= 0:
+        return None
+    state_path = (
+        os.path.join(config.data_dir, "ratelimit.json") if config.rate_shared else None
+    )
+    return RateLimiter(config.rate_rpm, config.rate_tpm, state_path)
+
+
+def _retry_wait(error: Exception, limiter: RateLimiter | None) -> float | None:
+    """Return how long the provider asked to wait before a retry, if it said.
+
+    A 429 also pauses every other request through the rate limiter.
+    """
+    import openai
+
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    if limiter is not None and isinstance(error, openai.RateLimitError):
+        return limiter.rate_limited(headers)
+    return retry_after(headers)
+
+
+def _observe_limits(response: Any, limiter: RateLimiter | None) -> None:
+    """Let the rate limiter see the rate-limit headers of a response."""
+    headers = getattr(getattr(response, "response", None), "headers", None)
+    if limiter is not None and headers is not None:
+        limiter.observe(headers)
+
+
+def stream_options() -> dict[str, Any]:
+    """Return the extra options of a streaming completion request."""
+    if not config.stream_usage:
+        return {}
+    return {"stream_options": {"include_usage": True}}
+
+
+def _abort_stream(response: Any) -> None:
+    """Close a streaming response, interrupting a read blocked in another thread.
+
+    Closing the httpx response alone only takes effect once the next chunk
+    arrives, so the socket is shut down first to stop the transfer at once.
+    """
+    http_response = getattr(response, "response", None)
+    extensions = getattr(http_response, "extensions", None) or {}
+    network_stream = extensions.get("network_stream")
+    sock = network_stream.get_extra_info("socket") if network_stream else None
+    if isinstance(sock, socket.socket):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+def _retryable(error: Exception) -> bool:
+    """Return whether a request error is worth retrying on another attempt."""
+    import openai
+
+    return isinstance(
+        error,
+        (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError),
+    )
+
+
+def retry_delay(attempt: int) -> float:
+    """Return the jittered exponential backoff before retry ``attempt`` (from 0)."""
+    return float(config.retry_backoff * 2**attempt * random.uniform(0.5, 1.5))
 
 
 class LLMClient:
@@ -16,26 +176,743 @@ class LLMClient:
                 "Invalid configuration. Please set the OPENAI_API_KEY environment variable."
             )
 
-        self.client = OpenAI(
-            api_key=config.api_key,
-            base_url=config.base_url,
+        self.router = Router(load_endpoints(config.endpoints_file))
+        self._clients: dict[str, OpenAI] = {}
+        self.http_client: httpx.Client  # Set when the first client is constructed
+        self._client_lock = threading.Lock()
+        self.model = config.model
+        self.cache = open_cache()
+        self.rate_limiter = open_rate_limiter()
+        self.conversation = Conversation(SYSTEM_PROMPT, config.context_budget)
+        self.sessions = open_sessions()
+        self.session_id: int | None = None
+        self.search_index = (
+            SearchIndex(os.path.join(config.data_dir, "search.db"))
+            if self.sessions is not None
+            else None
+        )
+        self.ttfts: list[float] = []
+        self.metrics = MetricsRecorder(config.metrics_log)
+        self.hedger = (
+            Hedger(config.hedge_delay, config.hedge_percentile)
+            if config.hedge
+            else None
         )
+        self.prefetcher = (
+            Prefetcher(
+                self.router.choose,
+                self._open_prefetch,
+                _abort_stream,
+                config.prefetch_tokens,
+            )
+            if config.prefetch
+            else None
+        )
+        self.recall_index = (
+            RecallIndex(
+                os.path.join(config.data_dir, "recall"), config.recall_threshold
+            )
+            if config.recall
+            else None
+        )
+        self.summarizer = (
+            Summarizer(
+                SummaryCache(os.path.join(config.data_dir, "summaries.db")),
+                self._complete_background,
+                config.summarize_after,
+                config.summarize_keep,
+            )
+            if config.summarize
+            else None
+        )
+        # The prompt answered from the recall index, until the next prompt
+        self.recalled: str | None = None
+        self.attacher: Attacher | None = None
+        # Files sent with the next prompt
+        self.attachments: list[Attachment] = []
+        self.warmup_time: float | None = None
+        # Finish reason and usage of the last streamed answer
+        self.last_stream: StreamInfo | None = None
+        # Why the last answer failed, for the caller to report
+        self.last_error: Exception | None = None
+        self.comparison: Comparison | None = None
+        self._cancel = threading.Event()
+        self._response: Any = None
+
+    @property
+    def client(self) -> OpenAI:
+        """Return the OpenAI client of the preferred endpoint."""
+        return self.client_for(self.router.endpoints[0])
+
+    def client_for(self, endpoint: Endpoint) -> OpenAI:
+        """Return the OpenAI client of an endpoint, constructing it on first use.
+
+        All endpoints share one connection pool. Retries are left to the
+        router, so a failing endpoint is given up on quickly.
+        """
+        with self._client_lock:
+            if endpoint.name not in self._clients:
+                import openai
+
+                if not self._clients:
+                    self.http_client = openai.DefaultHttpxClient(
+                        **http_client_options()
+                    )
+                self._clients[endpoint.name] = openai.OpenAI(
+                    api_key=endpoint.api_key,
+                    base_url=endpoint.base_url,
+                    http_client=self.http_client,
+                    max_retries=0,
+                )
+            return self._clients[endpoint.name]
+
+    def preload(self) -> threading.Thread:
+        """Import the OpenAI library and build the client in the background."""
+        thread = threading.Thread(
+            target=lambda: self.client, name="mindterm-preload", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def warm_up(self) -> threading.Thread:
+        """Build the client and open a pooled connection in the background.
+
+        Resolving DNS and completing the TCP/TLS handshake ahead of time keeps
+        that cost off the first prompt's time-to-first-token.
+        """
+
+        def connect() -> None:
+            import httpx
+
+            client = self.client
+            start = time.perf_counter()
+            try:
+                self.http_client.head(str(client.base_url))
+            except httpx.HTTPError:
+                return
+            self.warmup_time = time.perf_counter() - start
+
+        thread = threading.Thread(target=connect, name="mindterm-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def reconfigure(self) -> None:
+        """Apply the current configuration, e.g. after switching profiles.
+
+        The conversation is kept. Endpoints, model, transport, cache, rate
+        limits, hedging, prefetching, summaries and the context and attachment
+        budgets take effect with the next request; sessions, recall and other
+        data under ``data_dir`` keep their settings until the next start.
+
+        Raises:
+            ValueError: If the configuration has no API key.
+        """
+        if not config.validate():
+            raise ValueError("Invalid configuration: no API key is set.")
+        if self.prefetcher is not None:
+            self.prefetcher.discard()
+        with self._client_lock:
+            http_client = self.http_client if self._clients else None
+            self._clients = {}
+        self.router = Router(load_endpoints(config.endpoints_file))
         self.model = config.model
+        if self.cache is not None:
+            self.cache.close()
+        self.cache = open_cache()
+        self.rate_limiter = open_rate_limiter()
+        self.conversation.budget = config.context_budget
+        if self.attacher is not None:
+            self.attacher.set_budget(self.conversation.budget // 2)
+        self.hedger = (
+            Hedger(config.hedge_delay, config.hedge_percentile)
+            if config.hedge
+            else None
+        )
+        self.prefetcher = (
+            Prefetcher(
+                self.router.choose,
+                self._open_prefetch,
+                _abort_stream,
+                config.prefetch_tokens,
+            )
+            if config.prefetch
+            else None
+        )
+        if not config.summarize:
+            self.summarizer = None
+        elif self.summarizer is None:
+            self.summarizer = Summarizer(
+                SummaryCache(os.path.join(config.data_dir, "summaries.db")),
+                self._complete_background,
+                config.summarize_after,
+                config.summarize_keep,
+            )
+        else:
+            self.summarizer.threshold = config.summarize_after
+            self.summarizer.keep = config.summarize_keep
+        if http_client is not None:
+            # The next request opens a pool with the new transport settings
+            http_client.close()
+
+    @property
+    def cancelled(self) -> bool:
+        """Return whether the last completion was cancelled."""
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the streaming completion and close its HTTP response.
+
+        Safe to call from another thread; the generator returned by
+        ``get_completion`` stops and the prompt is not kept in the conversation.
+        """
+        self._cancel.set()
+        response = self._response
+        if response is not None:
+            _abort_stream(response)
+        if self.comparison is not None:
+            self.comparison.cancel()
 
     def get_completion(self, content: str) -> Generator[str, None, None]:
-        """Get completion from the LLM and stream it to the console."""
+        """Get completion from the LLM and stream it to the console.
+
+        The prompt and the full reply are added to the conversation, so
+        follow-up prompts are sent with the earlier turns as context.
+        """
+        self._cancel.clear()
+        self.recalled = None
+        self.last_stream = None
+        self.last_error = None
+        prompt = content
+        if self.summarizer is not None and not (
+            # A prefetched answer was requested with the full history
+            self.prefetcher is not None
+            and prompt.strip() in self.prefetcher.suggestions
+        ):
+            self.summarizer.apply(self.conversation)
+        if self.attachments:
+            content = f"{format_attachments(self.attachments)}\n\n{content}"
+        self.conversation.add_user(content)
+        messages = self.conversation.messages()
+        if self.cache is not None:
+            # Answers are cached per endpoint; only the preferred one's are used
+            cached = self.cache.get(self._cache_key(self.router.endpoints[0], messages))
+            if cached is not None:
+                self._record_reply(content, cached)
+                yield cached
+                return
+
+        prefetched = (
+            self.prefetcher.take(content, messages) if self.prefetcher else None
+        )
+        # Tokens reserved against the rate limit; 0 for a prefetched answer
+        reserved = 0
+        for attempt in range(config.max_retries + 1):
+            endpoint = self.router.choose()
+            metrics = RequestMetrics(endpoint.model, endpoint=endpoint.name)
+            info = StreamInfo()
+            chunks: list[str] = []
+            if prefetched is None and self.rate_limiter is not None:
+                reserved = self.conversation.total_tokens + OUTPUT_ESTIMATE
+                if not self.rate_limiter.acquire(reserved, INTERACTIVE, self._cancel):
+                    self.conversation.pop()
+                    return
+            finished = False
+            try:
+                start = time.perf_counter()
+                if prefetched is not None:
+                    # Already streaming in the background; join it
+                    endpoint, response = prefetched.endpoint, prefetched
+                    stream: Iterable[Any] = prefetched.replay()
+                    prefetched = None
+                else:
+                    endpoint, response, stream = self._open_stream(endpoint, messages)
+                    _observe_limits(response, self.rate_limiter)
+                metrics.model, metrics.endpoint = endpoint.model, endpoint.name
+                metrics.network_time += time.perf_counter() - start
+                self._response = response
+                if self._cancel.is_set():
+                    response.close()
+                # Batches are timed as the caller takes them: coalesce reads the
+                # stream on its own thread, and the caller renders on this one
+                pieces = iter_text(stream, info, metrics.chunk)
+                batches = coalesce(pieces, info, config.stream_batch_ms / 1000)
+                for text in metrics.timed(batches):
+                    if self._cancel.is_set():
+                        break
+                    if not chunks and metrics.ttft is not None:
+                        self.ttfts.append(metrics.ttft)
+                    chunks.append(text)
+                    yield text
+                finished = True
+            except GeneratorExit:
+                # The caller stopped reading; drop the unanswered prompt
+                self.conversation.pop()
+                raise
+            except Exception as e:
+                if self._cancel.is_set():
+                    self.conversation.pop()
+                    return
+                if _retryable(e):
+                    self.router.record_failure(endpoint)
+                    wait = _retry_wait(e, self.rate_limiter)
+                    # Fail over only before any text was shown
+                    if not chunks and attempt < config.max_retries:
+                        delay = retry_delay(attempt) if wait is None else wait
+                        if not self._cancel.wait(delay):
+                            continue
+                self.conversation.pop()
+                if not self._cancel.is_set():
+                    self.last_error = e
+                return
+            finally:
+                if not finished and self._response is not None:
+                    # Stopped early or failed; free the connection now rather
+                    # than when the response is garbage collected
+                    _abort_stream(self._response)
+                self._response = None
+            break
+
+        reply = "".join(chunks)
+        self.last_stream = info
+        if reserved and self.rate_limiter is not None:
+            used = info.total_tokens
+            if used is None:
+                answer = estimate_tokens(reply) - MESSAGE_OVERHEAD_TOKENS
+                used = reserved - OUTPUT_ESTIMATE + answer
+            self.rate_limiter.settle(reserved, used)
+        metrics.finish(reply, cancelled=self._cancel.is_set(), info=info)
+        self.metrics.record(metrics)
+        self.router.record_success(
+            endpoint, metrics.ttft if metrics.ttft is not None else metrics.total_time
+        )
+        if metrics.cancelled:
+            self.conversation.pop()
+            return
+
+        self._record_reply(content, reply)
+        if self.cache is not None:
+            self.cache.put(self._cache_key(endpoint, messages), reply)
+        if self.summarizer is not None:
+            self.summarizer.schedule(self.conversation)
+        if (
+            self.recall_index is not None
+            and prompt == content
+            and len(self.conversation.turns) == 2
+            and not self.conversation.trimmed
+            and not self.conversation.summary
+        ):
+            self.recall_index.add(prompt, reply)
+
+    def _cache_key(
+        self, endpoint: Endpoint, messages: list[ChatCompletionMessageParam]
+    ) -> str:
+        """Return the cache key of an answer from an endpoint."""
+        base_url = str(self.client_for(endpoint).base_url)
+        return cache_key(endpoint.model, base_url, messages)
+
+    def recall(self, content: str) -> RecallMatch | None:
+        """Return an earlier answer to a near-duplicate of a prompt, if any.
+
+        Only prompts that start a conversation are recalled, since a later
+        prompt depends on the turns before it.
+        """
+        if (
+            self.recall_index is None
+            or self.conversation.turns
+            or self.conversation.summary
+            or self.attachments
+        ):
+            return None
+        return self.recall_index.lookup(content)
+
+    def accept_recalled(self, content: str, match: RecallMatch) -> None:
+        """Answer a prompt with a recalled answer instead of a request."""
+        self._cancel.clear()
+        self.conversation.add_user(content)
+        self._record_reply(content, match.answer)
+        self.recalled = content
+
+    def forget_recalled(self) -> str | None:
+        """Drop the last recalled answer from the conversation.
+
+        Returns its prompt so it can be sent to the model instead, or None if
+        the last answer was not recalled.
+        """
+        prompt, self.recalled = self.recalled, None
+        turns = self.conversation.turns
+        if prompt is None or len(turns) != 2 or turns[0].content != prompt:
+            return None
+        if self.prefetcher is not None:
+            self.prefetcher.discard()
+        # The fresh answer starts its own session
+        self.conversation.reset()
+        self.session_id = None
+        return prompt
+
+    def _open_stream(
+        self, endpoint: Endpoint, messages: list[ChatCompletionMessageParam]
+    ) -> tuple[Endpoint, Any, Iterable[Any]]:
+        """Start a streaming request, hedged if enabled.
+
+        Returns the endpoint that answered, its response and the chunk stream.
+        """
+
+        def open_stream(target: Endpoint) -> Any:
+            return self.client_for(target).chat.completions.create(
+                model=target.model,
+                messages=messages,
+                stream=True,
+                **stream_options(),
+            )
+
+        if self.hedger is None:
+            response = open_stream(endpoint)
+            return endpoint, response, response
+
+        alternates = [e for e in self.router.order() if e is not endpoint]
+        recent = list(self.router.health[endpoint.name].ttfts)
+        limiter = self.rate_limiter
+        tokens = self.conversation.total_tokens + OUTPUT_ESTIMATE
+
+        admitted = False
+
+        def admit() -> bool:
+            nonlocal admitted
+            # The duplicate counts against the limits like any request
+            admitted = limiter is None or limiter.try_acquire(tokens) == 0
+            return admitted
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": content},
-                ],
+            result = self.hedger.race(
+                endpoint,
+                alternates[0] if alternates else endpoint,
+                open_stream,
+                _abort_stream,
+                self._cancel,
+                recent,
+                admit,
+            )
+        finally:
+            if admitted and limiter is not None:
+                # At most one stream is read, and the caller settles that
+                # one's reservation; the aborted one's goes back
+                limiter.settle(tokens, 0)
+        if result.primary_wait is not None:
+            # The primary's TTFT is at least this long; let routing know
+            self.router.record_success(endpoint, result.primary_wait)
+        return result.endpoint, result.response, result.stream
+
+    def _open_prefetch(
+        self,
+        endpoint: Endpoint,
+        messages: list[ChatCompletionMessageParam],
+        max_tokens: int | None,
+    ) -> Any:
+        """Start a streaming request for the prefetcher."""
+        options: dict[str, Any] = (
+            {} if max_tokens is None else {"max_tokens": max_tokens}
+        )
+        if self.rate_limiter is not None:
+            tokens = request_tokens(
+                (str(message.get("content") or "") for message in messages),
+                OUTPUT_ESTIMATE if max_tokens is None else max_tokens,
+            )
+            self.rate_limiter.acquire(tokens, BACKGROUND)
+        response = self.client_for(endpoint).chat.completions.create(
+            model=endpoint.model, messages=messages, stream=True, **options
+        )
+        _observe_limits(response, self.rate_limiter)
+        return response
+
+    def compare(self, models: list[str], content: str) -> Comparison:
+        """Start streaming a prompt from several models at once.
+
+        The prompt is sent with the conversation so far as context, but the
+        answers are not added to it.
+        """
+        self._cancel.clear()
+        if self.summarizer is not None:
+            self.summarizer.apply(self.conversation)
+        messages: list[ChatCompletionMessageParam] = [
+            *self.conversation.messages(),
+            {"role": "user", "content": content},
+        ]
+        tokens = self.conversation.total_tokens + request_tokens([content])
+
+        def open_stream(endpoint: Endpoint) -> Any:
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(
+                tokens, INTERACTIVE, self._cancel
+            ):
+                raise RuntimeError("Cancelled while waiting for the rate limit")
+            response = self.client_for(endpoint).chat.completions.create(
+                model=endpoint.model,
+                messages=messages,
                 stream=True,
+                **stream_options(),
             )
-            for chunk in response:
-                if chunk.choices[0].delta.content is not None:
-                    yield chunk.choices[0].delta.content
-        except Exception as e:
-            print(f"Error getting completion: {e}")
+            _observe_limits(response, self.rate_limiter)
+            return response
+
+        targets = [(model, self.router.resolve(model)) for model in models]
+        self.comparison = Comparison(targets, open_stream, _abort_stream)
+        self.comparison.start()
+        return self.comparison
+
+    def prefetch_followups(self, on_suggestions: Callable[[list[str]], None]) -> None:
+        """Suggest follow-ups to the last answer and prefetch their answers.
+
+        Does nothing unless prefetching is enabled and the conversation ends
+        with an answer.
+        """
+        turns = self.conversation.turns
+        if self.prefetcher is None or not turns or turns[-1].role != "assistant":
             return
+        self.prefetcher.start(self.conversation.messages(), on_suggestions)
+
+    def attach(self, pattern: str) -> list[Attachment]:
+        """Prepare files matching a path or glob to be sent with the next prompt.
+
+        Files that do not fit half the context budget are summarized.
+
+        Raises:
+            ValueError: If no file matches or a file cannot be attached.
+            OSError: If a file cannot be read.
+        """
+        if self.attacher is None:
+            self.attacher = Attacher(
+                AttachmentCache(os.path.join(config.data_dir, "attachments.db")),
+                self.conversation.budget // 2,
+                CHUNK_TOKENS,
+                self._complete_many,
+            )
+        attachments = self.attacher.attach(pattern)
+        self.attachments.extend(attachments)
+        return attachments
+
+    def _complete_background(self, messages: list[ChatCompletionMessageParam]) -> str:
+        """Complete a request as background work and return the answer."""
+        response = self._open_prefetch(self.router.choose(), messages, None)
+        return "".join(text for chunk in response if (text := chunk_text(chunk)))
+
+    def _complete_many(self, prompts: list[str]) -> list[str]:
+        """Complete standalone prompts concurrently, raising on any error."""
+
+        async def complete_all() -> list[str]:
+            client = AsyncLLMClient(rate_limiter=self.rate_limiter)
+            semaphore = asyncio.Semaphore(client.max_concurrency)
+
+            async def complete(prompt: str) -> str:
+                async with semaphore:
+                    return "".join(
+                        [chunk async for chunk in client.stream_completion(prompt)]
+                    )
+
+            try:
+                return await asyncio.gather(*(complete(p) for p in prompts))
+            finally:
+                await client.close()
+
+        return asyncio.run(complete_all())
+
+    def _record_reply(self, content: str, reply: str) -> None:
+        """Add a completed reply to the conversation and the session log."""
+        self.attachments.clear()
+        self.conversation.add_assistant(reply)
+        if self.sessions is None:
+            return
+        if self.session_id is None:
+            self.session_id = self.sessions.create_session(content)
+        self.sessions.append(self.session_id, "user", content)
+        self.sessions.append(self.session_id, "assistant", reply)
+        if self.search_index is not None:
+            self.search_index.sync(self.sessions)
+
+    def search(self, query: str, limit: int = 10) -> list[SearchResult]:
+        """Search stored turns of all sessions."""
+        if self.sessions is None or self.search_index is None:
+            return []
+        self.search_index.sync(self.sessions)
+        return self.search_index.search(query, limit)
+
+    def reset_conversation(self) -> None:
+        """Start a new conversation."""
+        if self.prefetcher is not None:
+            self.prefetcher.discard()
+        if self.summarizer is not None:
+            self.summarizer.discard()
+        self.conversation.reset()
+        self.session_id = None
+        self.recalled = None
+
+    def resume_session(self, session_id: int) -> int:
+        """Continue a stored session and return the number of turns loaded.
+
+        Raises:
+            KeyError: If the session does not exist or sessions are disabled.
+        """
+        if self.sessions is None:
+            raise KeyError(session_id)
+        turns = self.sessions.load(session_id)
+        if self.prefetcher is not None:
+            self.prefetcher.discard()
+        if self.summarizer is not None:
+            self.summarizer.discard()
+        self.conversation.reset()
+        self.recalled = None
+        for turn in turns:
+            if turn.role == "user":
+                self.conversation.add_user(turn.content)
+            else:
+                self.conversation.add_assistant(turn.content)
+        self.session_id = session_id
+        if self.summarizer is not None:
+            # Usually cached from when the session was first summarized
+            self.summarizer.schedule(self.conversation)
+        return len(turns)
+
+    def stats(self) -> dict[str, dict[str, int | float | str]]:
+        """Return runtime statistics grouped by section."""
+        stats: dict[str, dict[str, int | float | str]] = {}
+        latency: dict[str, int | float | str] = {"requests": len(self.ttfts)}
+        if self.warmup_time is not None:
+            latency["warm-up connect (s)"] = self.warmup_time
+        if self.ttfts:
+            latency["first request TTFT (s)"] = self.ttfts[0]
+        if len(self.ttfts) > 1:
+            latency["subsequent mean TTFT (s)"] = statistics.fmean(self.ttfts[1:])
+        stats["Latency"] = latency
+        stats["Streaming"] = self.metrics.summary()
+        if self.rate_limiter is not None:
+            stats["Rate limits"] = self.rate_limiter.stats()
+        if self.hedger is not None:
+            stats["Hedging"] = self.hedger.stats()
+        if self.prefetcher is not None:
+            stats["Prefetch"] = self.prefetcher.stats()
+        if len(self.router.endpoints) > 1:
+            stats.update(self.router.stats())
+        stats["Conversation"] = {
+            "turns": len(self.conversation.turns),
+            "estimated tokens": self.conversation.total_tokens,
+            "budget": self.conversation.budget,
+            "trimmed turns": self.conversation.trimmed,
+            "summarized turns": self.conversation.summarized,
+        }
+        if self.cache is not None:
+            stats["Cache"] = dict(self.cache.stats())
+        if self.summarizer is not None:
+            stats["Summaries"] = self.summarizer.stats()
+        if self.attacher is not None:
+            stats["Attachments"] = self.attacher.stats()
+        if self.recall_index is not None:
+            stats["Recall"] = self.recall_index.stats()
+        return stats
+
+
+class AsyncLLMClient:
+    """Asynchronous client for interacting with the LLM."""
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
+        """Initialize the async LLM client.
+
+        Requests are scheduled as background work by ``rate_limiter``, or by
+        the configured rate limits if none is given.
+        """
+        if not config.validate():
+            raise ValueError(
+                "Invalid configuration. Please set the OPENAI_API_KEY environment variable."
+            )
+
+        import openai
+
+        self.client: AsyncOpenAI = openai.AsyncOpenAI(
+            api_key=config.api_key,
+            base_url=config.base_url,
+            http_client=openai.DefaultAsyncHttpxClient(**http_client_options()),
+            # Retried below, so that rate limits are honoured by every request
+            max_retries=0,
+        )
+        self.model = config.model
+        self.max_concurrency = max_concurrency or config.max_concurrency
+        self.cache = open_cache()
+        self.rate_limiter = rate_limiter or open_rate_limiter()
+
+    async def stream_completion(self, content: str) -> AsyncGenerator[str, None]:
+        """Stream completion text chunks, propagating any request errors."""
+        messages = build_messages(content)
+        key = None
+        if self.cache is not None:
+            key = cache_key(self.model, str(self.client.base_url), messages)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        reserved = request_tokens([SYSTEM_PROMPT, content])
+        for attempt in range(config.max_retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(reserved)
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=True,
+                    **stream_options(),
+                )
+            except Exception as e:
+                if not _retryable(e) or attempt == config.max_retries:
+                    raise
+                wait = _retry_wait(e, self.rate_limiter)
+                await asyncio.sleep(retry_delay(attempt) if wait is None else wait)
+                continue
+            break
+        _observe_limits(response, self.rate_limiter)
+        info = StreamInfo()
+        chunks: list[str] = []
+        async for chunk in response:
+            # Usage-only frames have no choices; keep them out of the text
+            for text in iter_text([chunk], info):
+                chunks.append(text)
+                yield text
+
+        if self.rate_limiter is not None:
+            used = info.total_tokens
+            if used is None:
+                answer = estimate_tokens("".join(chunks)) - MESSAGE_OVERHEAD_TOKENS
+                used = reserved - OUTPUT_ESTIMATE + answer
+            self.rate_limiter.settle(reserved, used)
+        if self.cache is not None and key is not None:
+            self.cache.put(key, "".join(chunks))
+
+    async def get_completion(self, content: str) -> AsyncGenerator[str, None]:
+        """Get completion from the LLM as an async stream of text chunks.
+
+        Request errors are raised to the caller.
+        """
+        async for chunk in self.stream_completion(content):
+            yield chunk
+
+    async def complete(self, content: str) -> str:
+        """Get the full completion text for a single prompt."""
+        return "".join([chunk async for chunk in self.get_completion(content)])
+
+    async def complete_many(
+        self, prompts: Iterable[str], max_concurrency: int | None = None
+    ) -> list[str]:
+        """Complete many prompts concurrently, returning results in input order."""
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.complete(prompt)
+
+        return await asyncio.gather(*(run_one(prompt) for prompt in prompts))
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client."""
+        await self.client.close()
+        if self.cache is not None:
+            self.cache.close()
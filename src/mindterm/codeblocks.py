@@ -0,0 +1,137 @@
+"""Fenced code blocks of answers for Mind Terminal.
+
+The streaming renderer collects the code blocks of an answer as they close,
+so ``\\code [n] [path]`` can write one to a file or the clipboard without
+parsing the answer again.
+"""
+import base64
+import os
+import re
+import shutil
+import subprocess
+from dataclasses import dataclass
+from typing import IO
+
+_FENCE_RE = re.compile(r"^( {0,3})(`{3,}|~{3,})(.*)$")
+
+USAGE = "Usage: \\code [n] [path]"
+
+# Clipboard commands, in order of preference
+CLIPBOARD_COMMANDS = [
+    ["pbcopy"],
+    ["wl-copy"],
+    ["xclip", "-selection", "clipboard"],
+    ["xsel", "--clipboard", "--input"],
+    ["clip.exe"],
+]
+
+
+@dataclass(frozen=True)
+class CodeBlock:
+    """The language and text of a fenced code block."""
+
+    language: str
+    code: str
+
+    @property
+    def lines(self) -> int:
+        """Return the number of lines of code."""
+        return self.code.count("\n") + (not self.code.endswith("\n"))
+
+    def describe(self) -> str:
+        """Describe the block in a few words, e.g. ``python, 12 lines``."""
+        lines = f"{self.lines} line{'s' if self.lines != 1 else ''}"
+        return f"{self.language}, {lines}" if self.language else lines
+
+
+def fence_language(line: str) -> str:
+    """Return the language of a code block from its opening fence."""
+    match = _FENCE_RE.match(line.rstrip("\n"))
+    info = match.group(3).strip() if match else ""
+    return info.split(" ", 1)[0].strip("{}.")
+
+
+def parse_code_block(block: str) -> CodeBlock | None:
+    """Return the code block a Markdown block consists of, if it is one."""
+    lines = block.split("\n")
+    match = _FENCE_RE.match(lines[0])
+    if match is None:
+        return None
+    fence = match.group(2)
+    body = lines[1:]
+    if body and body[-1].strip().startswith(fence):
+        body = body[:-1]
+    return CodeBlock(fence_language(lines[0]), "\n".join(body).rstrip("\n"))
+
+
+def extract_code_blocks(text: str) -> list[CodeBlock]:
+    """Return the top-level fenced code blocks of a complete answer."""
+    blocks = []
+    fence: str | None = None
+    opening = ""
+    body: list[str] = []
+    for line in text.split("\n"):
+        if fence is None:
+            match = _FENCE_RE.match(line)
+            if match is not None:
+                fence, opening, body = match.group(2), line, []
+        elif line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+            blocks.append(CodeBlock(fence_language(opening), "\n".join(body)))
+            fence = None
+        else:
+            body.append(line)
+    if fence is not None:
+        code = "\n".join(body).rstrip("\n")
+        blocks.append(CodeBlock(fence_language(opening), code))
+    return blocks
+
+
+def parse_code_command(argument: str) -> tuple[int, str | None]:
+    """Split the argument of ``\\code`` into a 1-based block number and a path.
+
+    Raises:
+        ValueError: If the block number is not a positive integer.
+    """
+    number, _, path = argument.strip().partition(" ")
+    if not number.isdigit():
+        if number.startswith("-") or number[:1].isdigit():
+            raise ValueError(USAGE)
+        number, path = "1", argument.strip()
+    if int(number) < 1:
+        raise ValueError(USAGE)
+    return int(number), path.strip() or None
+
+
+def save_code(block: CodeBlock, path: str) -> str:
+    """Write a code block to a file and return its full path."""
+    path = os.path.abspath(os.path.expanduser(path))
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(block.code if block.code.endswith("\n") else block.code + "\n")
+    return path
+
+
+def copy_to_clipboard(text: str, terminal: IO[str] | None = None) -> str:
+    """Copy text to the clipboard and return how.
+
+    Uses the first clipboard command found on the PATH. Without one, the text
+    is sent to the terminal as an OSC 52 sequence, which most terminals
+    (also over SSH) put on the clipboard.
+
+    Raises:
+        OSError: If there is neither a clipboard command nor a terminal.
+    """
+    for command in CLIPBOARD_COMMANDS:
+        if shutil.which(command[0]) is not None:
+            try:
+                subprocess.run(command, input=text.encode("utf-8"), check=True)
+            except subprocess.CalledProcessError as e:
+                raise OSError(f"{command[0]} failed") from e
+            return command[0]
+    if terminal is None or not terminal.isatty():
+        raise OSError("no clipboard command found")
+    encoded = base64.b64encode(text.encode("utf-8")).decode("ascii")
+    terminal.write(f"\x1b]52;c;{encoded}\x07")
+    terminal.flush()
+    return "terminal"
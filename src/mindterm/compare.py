@@ -0,0 +1,176 @@
+"""Side-by-side comparison of several models for Mind Terminal.
+
+``\\compare m1,m2,m3 <prompt>`` sends the same prompt to every model at once,
+each streaming on its own thread over the shared connection pool, so the
+comparison takes about as long as the slowest model rather than the sum of
+all of them. Every answer keeps its own time-to-first-token and generation
+rate for display.
+"""
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from mindterm.conversation import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+from mindterm.router import Endpoint
+from mindterm.stream import StreamInfo, iter_text
+
+MAX_MODELS = 6
+
+USAGE = "Usage: \\compare <model>,<model>[,...] <prompt>"
+
+
+def parse_compare(argument: str) -> tuple[list[str], str]:
+    """Split the argument of ``\\compare`` into model names and the prompt.
+
+    Raises:
+        ValueError: If the models or the prompt are missing, or there are too
+            many models.
+    """
+    names, _, prompt = argument.strip().partition(" ")
+    models = list(dict.fromkeys(name.strip() for name in names.split(",")))
+    models = [model for model in models if model]
+    if not models or not prompt.strip():
+        raise ValueError(USAGE)
+    if len(models) > MAX_MODELS:
+        raise ValueError(f"Compare at most {MAX_MODELS} models at once.")
+    return models, prompt.strip()
+
+
+@dataclass
+class ModelAnswer:
+    """The answer of one model in a comparison."""
+
+    label: str
+    endpoint: Endpoint
+    chunks: list[str] = field(default_factory=list)
+    info: StreamInfo = field(default_factory=StreamInfo)
+    ttft: float | None = None
+    elapsed: float | None = None
+    error: str | None = None
+    response: Any = None
+
+    @property
+    def text(self) -> str:
+        """Return the text received so far."""
+        return "".join(self.chunks)
+
+    @property
+    def done(self) -> bool:
+        """Return whether the stream has ended."""
+        return self.elapsed is not None
+
+    @property
+    def tokens(self) -> int:
+        """Return the answer's tokens, as reported by the provider if it did."""
+        if self.info.completion_tokens is not None:
+            return self.info.completion_tokens
+        text = self.text
+        return estimate_tokens(text) - MESSAGE_OVERHEAD_TOKENS if text else 0
+
+    def tokens_per_second(self, now: float) -> float:
+        """Return the generation rate after the first token."""
+        if self.ttft is None:
+            return 0.0
+        generating = (self.elapsed if self.elapsed is not None else now) - self.ttft
+        return self.tokens / generating if generating > 0 else 0.0
+
+    def summary(self, now: float) -> str:
+        """Describe the answer's progress and speed in a few words."""
+        if self.error is not None:
+            return f"error: {self.error}"
+        if self.ttft is None:
+            return "no answer" if self.done else f"waiting {now:.1f}s"
+        return (
+            f"TTFT {self.ttft:.2f}s · {self.tokens_per_second(now):.0f} tok/s"
+            f" · {self.tokens} tokens"
+        )
+
+
+class Comparison:
+    """Stream one prompt from several models concurrently."""
+
+    def __init__(
+        self,
+        targets: list[tuple[str, Endpoint]],
+        open_stream: Callable[[Endpoint], Any],
+        abort: Callable[[Any], None],
+    ) -> None:
+        """Initialize with labelled endpoints and a stream opener.
+
+        ``open_stream(endpoint)`` starts the request on an endpoint and
+        ``abort(response)`` closes a response early.
+        """
+        self.answers = [ModelAnswer(label, endpoint) for label, endpoint in targets]
+        self.open_stream = open_stream
+        self.abort = abort
+        self.cancelled = False
+        self._start = 0.0
+        self._end: float | None = None
+        self._changed = threading.Condition()
+
+    @property
+    def elapsed(self) -> float:
+        """Return the wall time since the start, until every stream ended."""
+        end = self._end if self._end is not None else time.perf_counter()
+        return end - self._start
+
+    def start(self) -> None:
+        """Start every request on its own thread."""
+        self._start = time.perf_counter()
+        for answer in self.answers:
+            threading.Thread(
+                target=self._run, args=(answer,), name="mindterm-compare", daemon=True
+            ).start()
+
+    def wait(self, timeout: float) -> bool:
+        """Wait until an answer ends or ``timeout`` passes; return whether all did."""
+        with self._changed:
+            if self._end is None:
+                self._changed.wait(timeout)
+            return self._end is not None
+
+    def cancel(self) -> None:
+        """Stop every stream that is still running."""
+        with self._changed:
+            self.cancelled = True
+            responses = [a.response for a in self.answers if not a.done]
+        for response in responses:
+            if response is not None:
+                self.abort(response)
+
+    def progress(self) -> str:
+        """Describe the progress of every model on one line."""
+        now = self.elapsed
+        with self._changed:
+            return " | ".join(
+                f"{answer.label}: {answer.summary(now)}" for answer in self.answers
+            )
+
+    def _run(self, answer: ModelAnswer) -> None:
+        """Stream one model's answer."""
+
+        def arrived(_text: str) -> None:
+            if answer.ttft is None:
+                answer.ttft = time.perf_counter() - self._start
+
+        try:
+            response = self.open_stream(answer.endpoint)
+            with self._changed:
+                answer.response = response
+                cancelled = self.cancelled
+            if cancelled:
+                self.abort(response)
+                return
+            for text in iter_text(response, answer.info, arrived):
+                answer.chunks.append(text)
+        except Exception as e:
+            if not self.cancelled:
+                answer.error = str(e)
+        finally:
+            with self._changed:
+                answer.elapsed = time.perf_counter() - self._start
+                if all(a.done for a in self.answers):
+                    self._end = time.perf_counter()
+                self._changed.notify_all()
@@ -1,22 +1,448 @@
-"""Configuration management for Mind Terminal."""
+"""Configuration management for Mind Terminal.
+
+Settings are layered, each layer overriding the ones before it:
+
+1. built-in defaults,
+2. the TOML config file (``MINDTERM_CONFIG``, default
+   ``~/.config/mindterm/config.toml``), whose top-level keys are setting names,
+3. the active profile, a ``[profiles.<name>]`` table of the same file,
+4. environment variables,
+5. command line flags.
+
+For example::
+
+    model = "qwen-plus"
+    profile = "fast"            # Profile used unless another is chosen
+
+    [profiles.fast]
+    model = "qwen-turbo"
+    read_timeout = 60
+    cache_enabled = true
+
+    [profiles.local]
+    base_url = "http://localhost:8000/v1"
+    model = "qwen2.5-7b-instruct"
+    api_key_env = "LOCAL_API_KEY"
+
+The parsed file is cached and only read again when its modification time
+changes. Loading resolves every setting on a copy and swaps it in with one
+assignment, so other threads never see a mix of old and new settings.
+Unknown settings and values of the wrong type are rejected with a
+``ConfigError`` naming the layer they came from.
+"""
+import copy
 import os
+import tomllib
+from collections.abc import Mapping
+from typing import Any
+
+
+class ConfigError(ValueError):
+    """An invalid configuration file, profile or setting."""
+
+
+# Profile name that selects no profile
+DEFAULT_PROFILE = "default"
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off", "")
+
+# Parsed config files and their modification times, by path
+_parsed: dict[str, tuple[int, dict[str, Any]]] = {}
+
+
+def default_config_path() -> str:
+    """Return the path of the config file."""
+    return os.getenv(
+        "MINDTERM_CONFIG",
+        os.path.join(os.path.expanduser("~"), ".config", "mindterm", "config.toml"),
+    )
+
+
+def file_mtime(path: str) -> int | None:
+    """Return the modification time of a file, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def read_config_file(path: str) -> dict[str, Any]:
+    """Parse a TOML config file, reusing the last result until it changes.
+
+    A missing file is an empty configuration.
+
+    Raises:
+        ConfigError: If the file is not valid TOML.
+    """
+    mtime = file_mtime(path)
+    if mtime is None:
+        return {}
+    cached = _parsed.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ConfigError(f"Invalid config file {path}: {e}") from e
+    _parsed[path] = (mtime, data)
+    return data
+
+
+class _Layers:
+    """Resolve settings from the file, the profile, the environment and flags."""
+
+    def __init__(
+        self,
+        path: str,
+        data: Mapping[str, Any],
+        profile: str | None,
+        overrides: Mapping[str, Any],
+    ) -> None:
+        """Initialize with the parsed file, the active profile and flag values."""
+        self.layers: list[tuple[str, Mapping[str, Any]]] = [(path, data)]
+        if profile is not None:
+            profiles = data.get("profiles", {})
+            if profile not in profiles:
+                raise ConfigError(f"No profile named {profile!r} in {path}")
+            self.layers.append((f"{path} [profiles.{profile}]", profiles[profile]))
+        self.overrides = overrides
+        self.names: set[str] = set()
+
+    def value(
+        self, name: str, env: str | None, default: Any, skip_empty: bool = False
+    ) -> tuple[Any, str]:
+        """Return the raw value of a setting and the layer it came from.
+
+        With ``skip_empty``, an empty environment variable counts as unset.
+        """
+        self.names.add(name)
+        value, source = default, "default"
+        for where, layer in self.layers:
+            if name in layer:
+                value, source = layer[name], where
+        from_env = os.getenv(env) if env is not None else None
+        if env is not None and from_env is not None:
+            if not (skip_empty and from_env == ""):
+                value, source = from_env, env
+        if name in self.overrides:
+            value, source = self.overrides[name], "command line"
+        return value, source
+
+    def text(self, name: str, env: str | None, default: str) -> str:
+        """Return a string setting."""
+        value, source = self.value(name, env, default)
+        if not isinstance(value, str):
+            raise ConfigError(f"{name} must be a string (from {source})")
+        return value
+
+    def optional_text(self, name: str, env: str | None) -> str | None:
+        """Return a string setting that is unset when missing or empty."""
+        value, source = self.value(name, env, None)
+        if value is not None and not isinstance(value, str):
+            raise ConfigError(f"{name} must be a string (from {source})")
+        return value or None
+
+    def flag(self, name: str, env: str | None, default: bool) -> bool:
+        """Return a boolean setting."""
+        value, source = self.value(name, env, default, skip_empty=True)
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            if source == env:
+                return value.lower() in _TRUE
+            if value.lower() in _TRUE + _FALSE:
+                return value.lower() in _TRUE
+        raise ConfigError(f"{name} must be true or false (from {source})")
+
+    def integer(
+        self, name: str, env: str | None, default: int, minimum: int = 0
+    ) -> int:
+        """Return an integer setting of at least ``minimum``."""
+        value, source = self.value(name, env, default)
+        try:
+            if isinstance(value, bool) or isinstance(value, float):
+                raise ValueError(value)
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ConfigError(f"{name} must be an integer (from {source})") from None
+        if number < minimum:
+            raise ConfigError(f"{name} must be at least {minimum} (from {source})")
+        return number
+
+    def number(
+        self, name: str, env: str | None, default: float, minimum: float = 0.0
+    ) -> float:
+        """Return a number setting of at least ``minimum``."""
+        value, source = self.value(name, env, default)
+        try:
+            if isinstance(value, bool):
+                raise ValueError(value)
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ConfigError(f"{name} must be a number (from {source})") from None
+        if number < minimum:
+            raise ConfigError(f"{name} must be at least {minimum:g} (from {source})")
+        return number
+
+    def check_unknown(self) -> None:
+        """Reject settings in the file or flags that do not exist."""
+        for where, layer in [*self.layers, ("command line", self.overrides)]:
+            for name in layer:
+                if name not in self.names and name not in ("profile", "profiles"):
+                    raise ConfigError(f"Unknown setting {name!r} in {where}")
 
 
 class Config:
     """Configuration class for Mind Terminal."""
 
-    def __init__(self) -> None:
-        """Initialize configuration with environment variables."""
-        self.api_key: str | None = os.getenv("OPENAI_API_KEY")
-        self.base_url: str = os.getenv(
-            "OPENAI_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1"
+    def __init__(
+        self,
+        path: str | None = None,
+        profile: str | None = None,
+        overrides: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Initialize configuration from the config file and the environment.
+
+        Raises:
+            ConfigError: If the file, the profile or a setting is invalid.
+        """
+        self.path = default_config_path() if path is None else path
+        self.requested_profile = profile
+        self.overrides = dict(overrides or {})
+        self.profile: str | None = None
+        self.profiles: list[str] = []
+        self._mtime: int | None = None
+        self.load()
+
+    def configure(
+        self,
+        path: str | None = None,
+        profile: str | None = None,
+        overrides: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Load the configuration again with command line choices.
+
+        Raises:
+            ConfigError: If the file, the profile or a setting is invalid;
+                the previous settings are kept.
+        """
+        path = default_config_path() if path is None else path
+        self._apply(path, profile, dict(overrides or {}))
+
+    def use_profile(self, name: str) -> None:
+        """Switch to another profile, or to none with ``default``.
+
+        Raises:
+            ConfigError: If there is no such profile or it is invalid; the
+                previous settings are kept.
+        """
+        self._apply(self.path, name, self.overrides)
+
+    def stale(self) -> bool:
+        """Return whether the config file changed since it was loaded."""
+        return file_mtime(self.path) != self._mtime
+
+    def refresh(self, require_api_key: bool = False) -> bool:
+        """Load the configuration again if the file changed; return whether it did.
+
+        Raises:
+            ConfigError: If the changed file is invalid, or sets no API key
+                when one is required; the previous settings are kept and the
+                file is not read again until it changes.
+        """
+        mtime = file_mtime(self.path)
+        if mtime == self._mtime:
+            return False
+        try:
+            loaded = self._loaded(self.path, self.requested_profile, self.overrides)
+            if require_api_key and not loaded.validate():
+                raise ConfigError(f"{self.path} sets no API key")
+        except ConfigError:
+            self._mtime = mtime
+            raise
+        self.__dict__ = vars(loaded)
+        return True
+
+    def _apply(self, path: str, profile: str | None, overrides: dict[str, Any]) -> None:
+        """Load the configuration from other sources, or keep the current one."""
+        self.__dict__ = vars(self._loaded(path, profile, overrides))
+
+    def load(self) -> None:
+        """Resolve every setting from its layers.
+
+        Raises:
+            ConfigError: If the file, the profile or a setting is invalid; the
+                previous settings are kept.
+        """
+        loaded = self._loaded(self.path, self.requested_profile, self.overrides)
+        self.__dict__ = vars(loaded)
+
+    def _loaded(
+        self, path: str, requested_profile: str | None, overrides: dict[str, Any]
+    ) -> "Config":
+        """Return a copy of the configuration resolved from the given sources."""
+        mtime = file_mtime(path)
+        data = read_config_file(path)
+        if not isinstance(data.get("profiles", {}), dict):
+            raise ConfigError(f"profiles must be a table in {path}")
+        profile = (
+            requested_profile
+            or os.getenv("MINDTERM_PROFILE")
+            or data.get("profile")
+            or None
+        )
+        if profile == DEFAULT_PROFILE and DEFAULT_PROFILE not in data.get(
+            "profiles", {}
+        ):
+            profile = None
+        if profile is not None and not isinstance(profile, str):
+            raise ConfigError(f"profile must be a string in {path}")
+        layers = _Layers(path, data, profile, overrides)
+        loaded = copy.copy(self)
+        loaded._resolve(layers)
+        layers.check_unknown()
+        loaded.path = path
+        loaded.requested_profile = requested_profile
+        loaded.overrides = overrides
+        loaded.profile = profile
+        loaded.profiles = sorted(data.get("profiles", {}))
+        loaded._mtime = mtime
+        return loaded
+
+    def _resolve(self, s: _Layers) -> None:
+        """Set every setting from the layers."""
+        self.api_key: str | None = s.optional_text("api_key", "OPENAI_API_KEY")
+        # A profile can read its API key from another variable
+        api_key_env = s.optional_text("api_key_env", None)
+        if api_key_env is not None:
+            self.api_key = os.getenv(api_key_env) or None
+        self.base_url: str = s.text(
+            "base_url",
+            "OPENAI_BASE_URL",
+            "https://dashscope.aliyuncs.com/compatible-mode/v1",
+        )
+        self.model: str = s.text("model", "OPENAI_MODEL", "qwen-plus")
+        self.context_budget: int = s.integer(
+            "context_budget", "MINDTERM_CONTEXT_BUDGET", 8000, minimum=1
+        )
+        self.max_concurrency: int = s.integer(
+            "max_concurrency", "MINDTERM_MAX_CONCURRENCY", 8, minimum=1
+        )
+
+        # HTTP transport
+        self.max_connections: int = s.integer(
+            "max_connections", "MINDTERM_MAX_CONNECTIONS", 100, minimum=1
+        )
+        self.max_keepalive_connections: int = s.integer(
+            "max_keepalive_connections", "MINDTERM_MAX_KEEPALIVE_CONNECTIONS", 20
+        )
+        self.keepalive_expiry: float = s.number(
+            "keepalive_expiry", "MINDTERM_KEEPALIVE_EXPIRY", 60
+        )
+        self.connect_timeout: float = s.number(
+            "connect_timeout", "MINDTERM_CONNECT_TIMEOUT", 5
+        )
+        self.read_timeout: float = s.number(
+            "read_timeout", "MINDTERM_READ_TIMEOUT", 600
+        )
+        self.max_retries: int = s.integer("max_retries", "MINDTERM_MAX_RETRIES", 2)
+        self.retry_backoff: float = s.number(
+            "retry_backoff", "MINDTERM_RETRY_BACKOFF", 0.25
+        )
+        # Hedged requests (opt-in): duplicate a request whose first token is late
+        self.hedge: bool = s.flag("hedge", "MINDTERM_HEDGE", False)
+        self.hedge_delay: float = s.number("hedge_delay", "MINDTERM_HEDGE_DELAY", 1.0)
+        self.hedge_percentile: float = s.number(
+            "hedge_percentile", "MINDTERM_HEDGE_PERCENTILE", 95
+        )
+        # Speculative follow-up suggestions and answers (opt-in)
+        self.prefetch: bool = s.flag("prefetch", "MINDTERM_PREFETCH", False)
+        self.prefetch_tokens: int = s.integer(
+            "prefetch_tokens", "MINDTERM_PREFETCH_TOKENS", 1000
+        )
+        # Rolling summary of older turns once they exceed a token threshold,
+        # written in the background (opt-in)
+        self.summarize: bool = s.flag("summarize", "MINDTERM_SUMMARIZE", False)
+        self.summarize_after: int = s.integer(
+            "summarize_after", "MINDTERM_SUMMARIZE_AFTER", 3000
+        )
+        self.summarize_keep: int = s.integer(
+            "summarize_keep", "MINDTERM_SUMMARIZE_KEEP", 4
+        )
+        # Client-side rate limits (0 = unlimited), optionally shared by all
+        # processes on the host
+        self.rate_rpm: int = s.integer("rate_rpm", "MINDTERM_RPM", 0)
+        self.rate_tpm: int = s.integer("rate_tpm", "MINDTERM_TPM", 0)
+        self.rate_shared: bool = s.flag("rate_shared", "MINDTERM_RATE_SHARED", False)
+        # Streamed text is passed on in batches at most this often (0 = per token)
+        self.stream_batch_ms: float = s.number(
+            "stream_batch_ms", "MINDTERM_STREAM_BATCH_MS", 50
+        )
+        # Ask for token usage at the end of each stream
+        self.stream_usage: bool = s.flag("stream_usage", "MINDTERM_STREAM_USAGE", True)
+        self.http2: bool = s.flag("http2", "MINDTERM_HTTP2", False)
+        self.warmup: bool = s.flag("warmup", "MINDTERM_WARMUP", True)
+
+        # Additional endpoints to route between (TOML)
+        self.endpoints_file: str = s.text(
+            "endpoints_file",
+            "MINDTERM_ENDPOINTS",
+            os.path.join(
+                os.path.expanduser("~"), ".config", "mindterm", "endpoints.toml"
+            ),
+        )
+
+        # Local data (sessions, indexes)
+        self.data_dir: str = s.text(
+            "data_dir",
+            "MINDTERM_DATA_DIR",
+            os.path.join(os.path.expanduser("~"), ".local", "share", "mindterm"),
+        )
+        self.sessions_enabled: bool = s.flag(
+            "sessions_enabled", "MINDTERM_SESSIONS", True
+        )
+        # Offer earlier answers to near-duplicate prompts (opt-in)
+        self.recall: bool = s.flag("recall", "MINDTERM_RECALL", False)
+        self.recall_threshold: float = s.number(
+            "recall_threshold", "MINDTERM_RECALL_THRESHOLD", 0.8
+        )
+
+        # Per-request streaming metrics log (JSONL, opt-in)
+        self.metrics_log: str | None = s.optional_text(
+            "metrics_log", "MINDTERM_METRICS_LOG"
+        )
+
+        # Response cache (opt-in)
+        self.cache_enabled: bool = s.flag("cache_enabled", "MINDTERM_CACHE", False)
+        self.cache_path: str = s.text(
+            "cache_path",
+            "MINDTERM_CACHE_PATH",
+            os.path.join(os.path.expanduser("~"), ".cache", "mindterm", "cache.db"),
+        )
+        self.cache_max_bytes: int = s.integer(
+            "cache_max_bytes", "MINDTERM_CACHE_MAX_BYTES", 64 * 1024 * 1024
+        )
+        self.cache_ttl: float = s.number(
+            "cache_ttl", "MINDTERM_CACHE_TTL", 7 * 24 * 60 * 60
         )
-        self.model: str = os.getenv("OPENAI_MODEL", "qwen-plus")
 
     def validate(self) -> bool:
         """Validate that required configuration is present."""
         return self.api_key is not None and len(self.api_key) > 0
 
 
+def _global_config() -> Config:
+    """Build the global configuration, leaving out an invalid config file.
+
+    The error is reported when the application starts and loads it again.
+    """
+    try:
+        return Config()
+    except ConfigError:
+        return Config(path="")
+
+
 # Global config instance
-config = Config()
+config = _global_config()
@@ -0,0 +1,131 @@
+"""Conversation history for Mind Terminal."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
+# Fixed per-message cost of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text.
+
+    ASCII text averages about four characters per token, while CJK and other
+    non-ASCII characters are usually a token each. Both counts are computed
+    with C-level string operations, so this is cheap even for long texts.
+    """
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    other_chars = len(text) - ascii_chars
+    return (ascii_chars + 3) // 4 + other_chars + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass(slots=True)
+class Turn:
+    """A single message in the conversation with its token estimate."""
+
+    role: str
+    content: str
+    tokens: int
+
+
+class Conversation:
+    """Multi-turn history kept within a token budget.
+
+    Token estimates are computed once per turn as it is appended and kept as a
+    running total, so fitting the history into the budget never recounts the
+    whole conversation. When the budget is exceeded the oldest turns are
+    dropped, always keeping the most recent one.
+    """
+
+    def __init__(self, system_prompt: str, budget: int) -> None:
+        """Initialize an empty conversation."""
+        self.system_prompt = system_prompt
+        self.budget = budget
+        self.turns: deque[Turn] = deque()
+        self.summary: str | None = None
+        self.trimmed = 0
+        self.summarized = 0
+        self._system_tokens = estimate_tokens(system_prompt)
+        self._summary_tokens = 0
+        self._turn_tokens = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Return the estimated size of the request payload in tokens."""
+        return self._system_tokens + self._summary_tokens + self._turn_tokens
+
+    def add_user(self, content: str) -> None:
+        """Append a user message and trim the history to the budget."""
+        self._append("user", content)
+
+    def add_assistant(self, content: str) -> None:
+        """Append an assistant message and trim the history to the budget."""
+        self._append("assistant", content)
+
+    def pop(self) -> Turn:
+        """Remove and return the most recent turn."""
+        turn = self.turns.pop()
+        self._turn_tokens -= turn.tokens
+        return turn
+
+    def set_summary(self, summary: str | None) -> None:
+        """Set the summary of earlier turns sent ahead of the history."""
+        self.summary = summary
+        self._summary_tokens = estimate_tokens(summary) if summary else 0
+        self._trim()
+
+    def compact(self, count: int, summary: str) -> None:
+        """Replace the oldest ``count`` turns with a summary of them."""
+        for _ in range(count):
+            self._turn_tokens -= self.turns.popleft().tokens
+        self.summarized += count
+        self.set_summary(summary)
+
+    def reset(self) -> None:
+        """Forget all turns and start a new conversation."""
+        self.turns.clear()
+        self.summary = None
+        self.trimmed = 0
+        self.summarized = 0
+        self._summary_tokens = 0
+        self._turn_tokens = 0
+
+    def messages(self) -> list[ChatCompletionMessageParam]:
+        """Build the chat messages for the next request."""
+        system = self.system_prompt
+        if self.summary:
+            system += f"\n\nSummary of the earlier conversation:\n{self.summary}"
+        messages: list[ChatCompletionMessageParam] = [
+            {"role": "system", "content": system}
+        ]
+        for turn in self.turns:
+            if turn.role == "user":
+                messages.append({"role": "user", "content": turn.content})
+            else:
+                messages.append({"role": "assistant", "content": turn.content})
+        return messages
+
+    def _append(self, role: str, content: str) -> None:
+        """Append a turn, updating the running token total."""
+        turn = Turn(role, content, estimate_tokens(content))
+        self.turns.append(turn)
+        self._turn_tokens += turn.tokens
+        self._trim()
+
+    def _trim(self) -> None:
+        """Drop the oldest turns until the history fits the budget."""
+        while self.total_tokens > self.budget and len(self.turns) > 1:
+            self._drop_oldest()
+            # Keep the history starting with a user message
+            while len(self.turns) > 1 and self.turns[0].role == "assistant":
+                self._drop_oldest()
+
+    def _drop_oldest(self) -> None:
+        """Remove the oldest turn."""
+        self._turn_tokens -= self.turns.popleft().tokens
+        self.trimmed += 1
@@ -0,0 +1,215 @@
+"""Hedged streaming requests for Mind Terminal.
+
+When the first token of a request is late, a duplicate request is sent to an
+alternate endpoint (or the same one over a new connection). Whichever stream
+produces a token first is used and the other is aborted at once, which cuts
+the tail of the time-to-first-token distribution for the price of an
+occasional duplicate request.
+"""
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import Any
+
+from mindterm.metrics import percentile
+from mindterm.router import Endpoint
+from mindterm.stream import chunk_text
+
+# Recent TTFTs needed before the percentile replaces the fixed delay
+MIN_SAMPLES = 10
+
+# How often a race checks for cancellation while waiting
+POLL_INTERVAL = 0.05
+
+
+class HedgeCancelled(Exception):
+    """Raised when a race is cancelled before any stream produced a token."""
+
+
+@dataclass
+class Attempt:
+    """One of the racing requests."""
+
+    endpoint: Endpoint
+    response: Any = None
+    chunks: list[Any] = field(default_factory=list)
+    iterator: Iterator[Any] | None = None
+    error: Exception | None = None
+    abandoned: bool = False
+
+
+@dataclass
+class HedgeResult:
+    """The winning stream of a race."""
+
+    endpoint: Endpoint
+    response: Any
+    stream: Iterator[Any]
+    # Seconds the primary had waited without a token when the hedge won
+    primary_wait: float | None = None
+
+
+class Hedger:
+    """Race a duplicate request against a slow one and keep statistics."""
+
+    def __init__(self, delay: float, percentile: float = 0.0) -> None:
+        """Initialize with a fixed delay and an optional TTFT percentile.
+
+        With ``percentile`` set (e.g. 95), the hedge fires at that percentile
+        of recent TTFTs once enough of them are known, so roughly the slowest
+        ``100 - percentile`` percent of requests are hedged.
+        """
+        self.fixed_delay = delay
+        self.percentile = percentile
+        self.requests = 0
+        self.fired = 0
+        self.wins = 0
+        # Hedges not sent because the rate limit had no budget for them
+        self.skipped = 0
+        self.saved: list[float] = []
+        self._lock = threading.Lock()
+
+    def delay(self, recent_ttfts: Sequence[float]) -> float:
+        """Return how long to wait for a first token before hedging."""
+        if self.percentile > 0 and len(recent_ttfts) >= MIN_SAMPLES:
+            return percentile(list(recent_ttfts), self.percentile)
+        return self.fixed_delay
+
+    def race(
+        self,
+        primary: Endpoint,
+        alternate: Endpoint,
+        open_stream: Callable[[Endpoint], Any],
+        abort: Callable[[Any], None],
+        cancelled: threading.Event,
+        recent_ttfts: Sequence[float],
+        admit: Callable[[], bool] | None = None,
+    ) -> HedgeResult:
+        """Open a stream on ``primary`` and hedge on ``alternate`` if it is slow.
+
+        ``admit`` is asked right before the hedge fires, to take rate limit
+        budget for the duplicate; if it returns False no hedge is sent.
+
+        Raises:
+            HedgeCancelled: If ``cancelled`` is set before a token arrives.
+            Exception: The primary's error if it fails before the hedge fires,
+                or the first error if every attempt fails.
+        """
+        results: queue.Queue[Attempt] = queue.Queue()
+        attempts = [self._start(primary, open_stream, abort, results)]
+        delay = self.delay(recent_ttfts)
+        start = time.perf_counter()
+        errors: list[Exception] = []
+        # Whether the hedge may still fire
+        pending = True
+        with self._lock:
+            self.requests += 1
+
+        while True:
+            if cancelled.is_set():
+                self._abandon(attempts, abort)
+                raise HedgeCancelled()
+            timeout = POLL_INTERVAL
+            if pending:
+                timeout = min(timeout, max(0.0, start + delay - time.perf_counter()))
+            try:
+                attempt = results.get(timeout=timeout)
+            except queue.Empty:
+                if pending and time.perf_counter() - start >= delay:
+                    pending = False
+                    if admit is not None and not admit():
+                        with self._lock:
+                            self.skipped += 1
+                        continue
+                    with self._lock:
+                        self.fired += 1
+                    attempts.append(self._start(alternate, open_stream, abort, results))
+                continue
+
+            if attempt.error is not None:
+                errors.append(attempt.error)
+                if len(attempts) == 1 or len(errors) == len(attempts):
+                    raise errors[0]
+                continue
+
+            self._abandon([a for a in attempts if a is not attempt], abort)
+            assert attempt.iterator is not None
+            result = HedgeResult(
+                attempt.endpoint,
+                attempt.response,
+                chain(attempt.chunks, attempt.iterator),
+            )
+            if attempt is not attempts[0]:
+                elapsed = time.perf_counter() - start
+                result.primary_wait = elapsed
+                self._record_win(elapsed, recent_ttfts)
+            return result
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return hedging statistics for display."""
+        with self._lock:
+            stats: dict[str, int | float | str] = {
+                "requests": self.requests,
+                "hedges fired": self.fired,
+                "hedges won": self.wins,
+            }
+            if self.skipped:
+                stats["skipped (rate limit)"] = self.skipped
+            if self.requests:
+                stats["fire rate (%)"] = self.fired / self.requests * 100
+            if self.saved:
+                stats["est. latency saved (s)"] = sum(self.saved)
+                stats["est. saved per win (s)"] = sum(self.saved) / len(self.saved)
+        return stats
+
+    def _record_win(self, elapsed: float, recent_ttfts: Sequence[float]) -> None:
+        """Estimate the latency saved by a hedge that won.
+
+        The primary had no token after ``elapsed`` seconds, so its TTFT is
+        estimated as the mean of recent TTFTs slower than that.
+        """
+        slower = [ttft for ttft in recent_ttfts if ttft > elapsed]
+        expected = sum(slower) / len(slower) if slower else elapsed
+        with self._lock:
+            self.wins += 1
+            self.saved.append(expected - elapsed)
+
+    def _start(
+        self,
+        endpoint: Endpoint,
+        open_stream: Callable[[Endpoint], Any],
+        abort: Callable[[Any], None],
+        results: "queue.Queue[Attempt]",
+    ) -> Attempt:
+        """Start a request in the background and report its first token."""
+        attempt = Attempt(endpoint)
+
+        def run() -> None:
+            try:
+                attempt.response = open_stream(endpoint)
+                if attempt.abandoned:
+                    abort(attempt.response)
+                    return
+                iterator = iter(attempt.response)
+                for chunk in iterator:
+                    attempt.chunks.append(chunk)
+                    if chunk_text(chunk):
+                        break
+                attempt.iterator = iterator
+            except Exception as e:
+                attempt.error = e
+            results.put(attempt)
+
+        threading.Thread(target=run, name="mindterm-hedge", daemon=True).start()
+        return attempt
+
+    @staticmethod
+    def _abandon(attempts: list[Attempt], abort: Callable[[Any], None]) -> None:
+        """Abort attempts that lost the race or were cancelled."""
+        for attempt in attempts:
+            attempt.abandoned = True
+            if attempt.response is not None:
+                abort(attempt.response)
@@ -1,31 +1,249 @@
 """Main module for Mind Terminal."""
+import argparse
+import sys
+from functools import partial
+
+from mindterm.batch import run_headless
 from mindterm.client import LLMClient
-from mindterm.config import config
+from mindterm.codeblocks import copy_to_clipboard, parse_code_command, save_code
+from mindterm.compare import parse_compare
+from mindterm.config import DEFAULT_PROFILE, ConfigError, config
 from mindterm.ui import TerminalUI
+from mindterm.worker import ResponseWorker
+
+
+def parse_setting(text: str) -> tuple[str, str]:
+    """Split a ``--set KEY=VALUE`` argument."""
+    name, sep, value = text.partition("=")
+    if not sep or not name.strip():
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    return name.strip(), value.strip()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="mdt", description="Intelligent terminal like thinking."
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="run headless: read prompts from stdin or --input and write answers to stdout",
+    )
+    parser.add_argument(
+        "-i", "--input", help="file to read prompts from in batch mode (default: stdin)"
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=["text", "jsonl"],
+        help="prompt format: one per line or JSONL with a 'prompt' key (default: by file extension)",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["text", "jsonl"],
+        default="text",
+        help="answer format in batch mode (default: text)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="maximum number of concurrent requests in batch mode",
+    )
+    parser.add_argument(
+        "--config",
+        help="TOML config file (default: $MINDTERM_CONFIG or ~/.config/mindterm/config.toml)",
+    )
+    parser.add_argument("--profile", help="profile of the config file to use")
+    parser.add_argument("-m", "--model", help="model to use")
+    parser.add_argument(
+        "--set",
+        dest="settings",
+        action="append",
+        default=[],
+        type=parse_setting,
+        metavar="KEY=VALUE",
+        help="override a setting of the config file (repeatable)",
+    )
+    return parser.parse_args(argv)
+
+
+def new_conversation(client: LLMClient, ui: TerminalUI) -> None:
+    """Handle the \\chat command."""
+    client.reset_conversation()
+    ui.display_new_conversation()
+
+
+def resume_session(client: LLMClient, ui: TerminalUI, argument: str) -> None:
+    """Handle the \\resume command."""
+    try:
+        session_id = int(argument)
+        turns = client.resume_session(session_id)
+    except ValueError:
+        ui.display_notice("Usage: \\resume <id>", style="red")
+    except KeyError:
+        ui.display_notice(f"No saved session with id {argument}.", style="red")
+    else:
+        ui.display_notice(f"Resumed session {session_id} ({turns} turns).")
+
+
+def attach_files(client: LLMClient, ui: TerminalUI, pattern: str) -> None:
+    """Handle the \\attach command."""
+    if not pattern:
+        ui.display_notice("Usage: \\attach <path|glob>", style="red")
+        return
+    ui.set_status(f"Attaching {pattern}")
+    try:
+        ui.display_attachments(client.attach(pattern))
+    except (OSError, ValueError) as e:
+        ui.display_notice(f"Could not attach {pattern}: {e}", style="red")
+    except Exception as e:
+        ui.display_notice(f"Could not summarize {pattern}: {e}", style="red")
+    finally:
+        ui.set_status(None)
+
+
+def compare_models(client: LLMClient, ui: TerminalUI, argument: str) -> None:
+    """Handle the \\compare command."""
+    try:
+        models, prompt = parse_compare(argument)
+    except ValueError as e:
+        ui.display_notice(str(e), style="red")
+        return
+    comparison = client.compare(models, prompt)
+    ui.display_comparison(comparison)
+    if comparison.cancelled:
+        ui.display_notice("Response cancelled.")
+
+
+def copy_code(ui: TerminalUI, argument: str) -> None:
+    """Handle the \\code command."""
+    try:
+        number, path = parse_code_command(argument)
+    except ValueError as e:
+        ui.display_notice(str(e), style="red")
+        return
+    blocks = ui.code_blocks
+    if not blocks:
+        ui.display_notice("The last answer has no code blocks.", style="red")
+        return
+    if number > len(blocks):
+        count = f"{len(blocks)} code block{'s' if len(blocks) > 1 else ''}"
+        ui.display_notice(f"The last answer has only {count}.", style="red")
+        return
+    block = blocks[number - 1]
+    try:
+        if path is not None:
+            where = save_code(block, path)
+        else:
+            copy_to_clipboard(block.code, ui.console.file)
+            where = "the clipboard"
+    except OSError as e:
+        ui.display_notice(f"Could not copy code block {number}: {e}", style="red")
+    else:
+        ui.display_notice(
+            f"Copied code block {number} ({block.describe()}) to {where}."
+        )
+
+
+def show_profiles(ui: TerminalUI) -> None:
+    """Handle the \\profile command without a name."""
+    if not config.profiles:
+        ui.display_notice(f"No profiles in {config.path}.")
+        return
+    active = config.profile or DEFAULT_PROFILE
+    names = [
+        f"{name} (active)" if name == active else name
+        for name in dict.fromkeys([DEFAULT_PROFILE, *config.profiles])
+    ]
+    ui.display_notice(f"Profiles: {', '.join(names)}")
+
+
+def switch_profile(client: LLMClient, ui: TerminalUI, name: str) -> None:
+    """Handle the \\profile command."""
+    previous = config.profile or DEFAULT_PROFILE
+    try:
+        config.use_profile(name)
+    except ConfigError as e:
+        ui.display_notice(str(e), style="red")
+        return
+    if not config.validate():
+        config.use_profile(previous)
+        ui.display_notice(f"Profile {name} has no API key.", style="red")
+        return
+    client.reconfigure()
+    ui.display_notice(
+        f"Switched to profile {name} ({config.model} at {config.base_url})."
+    )
 
 
-def run() -> None:
+def reload_config(client: LLMClient, ui: TerminalUI) -> None:
+    """Apply changes to the config file made while running."""
+    try:
+        changed = config.refresh(require_api_key=True)
+    except ConfigError as e:
+        ui.display_notice(f"Kept the previous settings: {e}", style="red")
+        return
+    if not changed:
+        return
+    client.reconfigure()
+    ui.display_notice(f"Reloaded {config.path}.")
+
+
+def run(argv: list[str] | None = None) -> None:
     """Run the Mind Terminal application."""
+    args = parse_args(argv)
+
+    # Layer the config file, profile and command line over the environment
+    overrides = dict(args.settings)
+    if args.model:
+        overrides["model"] = args.model
+    try:
+        config.configure(args.config, args.profile, overrides)
+    except ConfigError as e:
+        print(f"Error: {e}")
+        return
+
     # Validate configuration
     if not config.validate():
         print("Error: OPENAI_API_KEY environment variable is not set.")
         return
 
+    if args.batch:
+        sys.exit(
+            run_headless(args.input, args.input_format, args.output_format, args.jobs)
+        )
+
     # Initialize components
     try:
         client = LLMClient()
     except ValueError as e:
         print(f"Error initializing client: {e}")
         return
+    # Build the OpenAI client in the background while the prompt is shown
+    if config.warmup:
+        client.warm_up()
+    else:
+        client.preload()
 
     ui = TerminalUI()
     ui.display_welcome()
 
+    # Answers stream on a worker thread while the next prompt is typed, so
+    # they are printed block by block above the prompt
+    ui.live = False
+    worker = ResponseWorker(client, ui)
+
     # Main loop
     while True:
+        if config.stale():
+            # The config file was edited; apply it between answers
+            worker.submit(partial(reload_config, client, ui))
         try:
             text = ui.get_user_input()
         except KeyboardInterrupt:
+            # Ctrl+C cancels the answer being streamed
+            worker.cancel()
             continue
         except EOFError:
             break
@@ -33,14 +251,64 @@ def run() -> None:
             # Handle built-in commands
             if text == "\\bye":
                 break
+            elif not text.strip():
+                continue
+            elif text == "\\fresh":
+                worker.submit_fresh()
+                continue
+            elif text == "\\chat":
+                worker.submit(partial(new_conversation, client, ui))
+                continue
             elif text == "\\help":
                 ui.display_help()
                 continue
+            elif text == "\\stats":
+                ui.display_stats(client.stats())
+                continue
+            elif text == "\\sessions":
+                sessions = client.sessions
+                ui.display_sessions(sessions.list_sessions() if sessions else [])
+                continue
+            elif text.startswith("\\search"):
+                query = text.removeprefix("\\search").strip()
+                if query:
+                    ui.display_search_results(query, client.search(query))
+                else:
+                    ui.display_notice("Usage: \\search <query>", style="red")
+                continue
+            elif text.startswith("\\attach"):
+                pattern = text.removeprefix("\\attach").strip()
+                worker.submit(partial(attach_files, client, ui, pattern))
+                continue
+            elif text == "\\code" or text.startswith("\\code "):
+                argument = text.removeprefix("\\code").strip()
+                worker.submit(partial(copy_code, ui, argument))
+                continue
+            elif text.startswith("\\compare"):
+                argument = text.removeprefix("\\compare").strip()
+                worker.submit(partial(compare_models, client, ui, argument))
+                continue
+            elif text == "\\profile" or text.startswith("\\profile "):
+                name = text.removeprefix("\\profile").strip()
+                if name:
+                    worker.submit(partial(switch_profile, client, ui, name))
+                else:
+                    show_profiles(ui)
+                continue
+            elif text.startswith("\\resume"):
+                argument = text.removeprefix("\\resume").strip()
+                worker.submit(partial(resume_session, client, ui, argument))
+                continue
 
-            # Get and display response
-            response = client.get_completion(text)
-            ui.display_streamed_response(response)
+            # Queue the prompt behind any answer still streaming
+            worker.submit_prompt(text)
 
+    # Let queued answers finish; Ctrl+C drops them
+    try:
+        worker.close()
+    except KeyboardInterrupt:
+        worker.cancel_all()
+        worker.close()
     ui.display_goodbye()
 
 
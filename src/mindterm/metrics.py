@@ -0,0 +1,194 @@
+"""Streaming latency metrics for Mind Terminal.
+
+Each streamed completion is timed from the request until the last chunk. Time
+spent waiting on the HTTP stream counts as network time, and time the consumer
+holds a chunk before asking for the next one counts as render time. Comparing
+the two shows whether a slow answer comes from the provider and network or
+from rendering.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from mindterm.conversation import estimate_tokens
+from mindterm.stream import StreamInfo
+
+T = TypeVar("T")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the ``q``-th percentile (0-100) of values by nearest rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(q / 100 * len(ordered)) - 1
+    return ordered[max(0, min(rank, len(ordered) - 1))]
+
+
+@dataclass
+class RequestMetrics:
+    """Timings of a single streamed completion."""
+
+    model: str
+    endpoint: str = ""
+    started: float = field(default_factory=time.time)
+    ttft: float | None = None
+    gaps: list[float] = field(default_factory=list)
+    chunks: int = 0
+    chars: int = 0
+    tokens: int = 0
+    network_time: float = 0.0
+    render_time: float = 0.0
+    total_time: float = 0.0
+    cancelled: bool = False
+    # Batches of text passed on, and what the provider reported, if anything
+    batches: int = 0
+    finish_reason: str | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+    _last_chunk: float | None = field(default=None, repr=False)
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Return the generation rate after the first token."""
+        generating = self.total_time - (self.ttft or 0.0)
+        return self.tokens / generating if generating > 0 else 0.0
+
+    def timed(self, stream: Iterable[T]) -> Iterator[T]:
+        """Yield items from a stream, timing waits and the consumer's work."""
+        iterator = iter(stream)
+        while True:
+            waiting = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.network_time += time.perf_counter() - waiting
+                return
+            received = time.perf_counter()
+            self.network_time += received - waiting
+            yield item
+            self.render_time += time.perf_counter() - received
+
+    def chunk(self, text: str) -> None:
+        """Record the arrival of a content chunk."""
+        now = time.perf_counter()
+        if self._last_chunk is None:
+            self.ttft = now - self._start
+        else:
+            self.gaps.append(now - self._last_chunk)
+        self._last_chunk = now
+        self.chunks += 1
+        self.chars += len(text)
+
+    def finish(
+        self, reply: str, cancelled: bool = False, info: StreamInfo | None = None
+    ) -> None:
+        """Record the end of the stream.
+
+        The token count is the provider's if ``info`` carries usage, and an
+        estimate otherwise.
+        """
+        self.total_time = time.perf_counter() - self._start
+        self.tokens = estimate_tokens(reply) if reply else 0
+        self.cancelled = cancelled
+        if info is not None:
+            self.batches = info.batches
+            self.finish_reason = info.finish_reason
+            self.prompt_tokens = info.prompt_tokens
+            self.completion_tokens = info.completion_tokens
+            if info.completion_tokens is not None:
+                self.tokens = info.completion_tokens
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the metrics as a JSON-serializable record."""
+        return {
+            "time": self.started,
+            "model": self.model,
+            "endpoint": self.endpoint,
+            "ttft": self.ttft,
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "chars": self.chars,
+            "tokens": self.tokens,
+            "tokens_per_sec": self.tokens_per_second,
+            "gap_p50": percentile(self.gaps, 50),
+            "gap_p95": percentile(self.gaps, 95),
+            "gap_max": max(self.gaps, default=0.0),
+            "network_time": self.network_time,
+            "render_time": self.render_time,
+            "total_time": self.total_time,
+            "cancelled": self.cancelled,
+            "finish_reason": self.finish_reason,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "gaps": [round(gap, 6) for gap in self.gaps],
+        }
+
+
+class MetricsRecorder:
+    """Collect request metrics and optionally append them to a JSONL log."""
+
+    def __init__(self, log_path: str | None = None) -> None:
+        """Initialize the recorder; ``log_path`` enables the JSONL log."""
+        self.log_path = log_path
+        self.requests: list[RequestMetrics] = []
+        self._lock = threading.Lock()
+
+    def record(self, metrics: RequestMetrics) -> None:
+        """Add the metrics of a finished request."""
+        with self._lock:
+            self.requests.append(metrics)
+            if self.log_path is None:
+                return
+            directory = os.path.dirname(os.path.abspath(self.log_path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(metrics.to_dict()) + "\n")
+
+    def summary(self) -> dict[str, int | float | str]:
+        """Return aggregate streaming statistics for display."""
+        with self._lock:
+            requests = list(self.requests)
+        summary: dict[str, int | float | str] = {"requests": len(requests)}
+        if not requests:
+            return summary
+        ttfts = [m.ttft for m in requests if m.ttft is not None]
+        gaps = [gap for m in requests for gap in m.gaps]
+        rates = [m.tokens_per_second for m in requests if m.tokens_per_second > 0]
+        network = sum(m.network_time for m in requests)
+        render = sum(m.render_time for m in requests)
+        if ttfts:
+            summary["TTFT p50 (s)"] = percentile(ttfts, 50)
+            summary["TTFT p95 (s)"] = percentile(ttfts, 95)
+        if gaps:
+            summary["chunk gap p50 (ms)"] = percentile(gaps, 50) * 1000
+            summary["chunk gap p95 (ms)"] = percentile(gaps, 95) * 1000
+            summary["chunk gap p99 (ms)"] = percentile(gaps, 99) * 1000
+            summary["chunk gap max (ms)"] = max(gaps) * 1000
+        if rates:
+            summary["tokens/sec"] = sum(rates) / len(rates)
+        summary["network (s)"] = network
+        summary["render (s)"] = render
+        if network + render > 0:
+            summary["render share (%)"] = render / (network + render) * 100
+        summary["cancelled"] = sum(m.cancelled for m in requests)
+        batches = sum(m.batches for m in requests)
+        if batches:
+            summary["chunks per batch"] = sum(m.chunks for m in requests) / batches
+        billed = [m for m in requests if m.prompt_tokens is not None]
+        if billed:
+            summary["prompt tokens"] = sum(m.prompt_tokens or 0 for m in billed)
+            summary["completion tokens"] = sum(m.completion_tokens or 0 for m in billed)
+        last = requests[-1]
+        summary["last: network (s)"] = last.network_time
+        summary["last: render (s)"] = last.render_time
+        summary["last: total (s)"] = last.total_time
+        if self.log_path is not None:
+            summary["log"] = self.log_path
+        return summary
@@ -0,0 +1,137 @@
+"""Adaptive pacing of terminal redraws for Mind Terminal.
+
+Redrawing the live region of a streamed answer costs the time to render it
+and the time to write it, and over SSH or in tmux the write can block for a
+long time once the terminal falls behind. ``FrameScheduler`` measures both
+for every frame and stretches the refresh interval so redraws take at most a
+fixed share of the time, coming back to the configured rate as frames get
+cheaper again. ``TerminalOutput`` counts what reaches the terminal.
+"""
+import math
+import sys
+import threading
+import time
+from typing import IO, Any
+
+# Share of each refresh interval that redrawing may take
+FRAME_BUDGET = 0.25
+# Slowest rate the live region is redrawn at, however expensive frames are
+MIN_REFRESH_PER_SECOND = 2.0
+# Weight of the latest frame in the moving average of frame cost
+FRAME_SMOOTHING = 0.3
+
+
+class TerminalOutput:
+    """Console file that counts the bytes and time spent writing to the terminal.
+
+    Without a file it writes to whatever ``sys.stdout`` is at the time, like a
+    Console without a file, so it keeps working under ``patch_stdout``.
+    """
+
+    def __init__(self, file: IO[str] | None = None) -> None:
+        """Wrap a file, or standard output."""
+        self._file = file
+        self.bytes_written = 0
+        self.writes = 0
+        self.write_time = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def file(self) -> IO[str]:
+        """Return the file written to."""
+        file = self._file or sys.stdout
+        # Rich's Live swaps stdout for a proxy that prints through the console
+        proxied: IO[str] = getattr(file, "rich_proxied_file", file)
+        return proxied
+
+    def write(self, text: str) -> int:
+        """Write text and count its encoded size."""
+        start = time.perf_counter()
+        written = self.file.write(text)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.bytes_written += len(text.encode("utf-8", "replace"))
+            self.writes += 1
+            self.write_time += elapsed
+        return written
+
+    def flush(self) -> None:
+        """Flush the file; a terminal that fell behind blocks here."""
+        start = time.perf_counter()
+        self.file.flush()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.write_time += elapsed
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward everything else (``isatty``, ``fileno``, ...) to the file."""
+        return getattr(self.file, name)
+
+
+class FrameScheduler:
+    """Decide when to redraw from what the last frames cost.
+
+    States that arrive between two frames are never drawn; only the latest
+    one is, when the next frame is due. One scheduler can pace many answers,
+    so a slow terminal is remembered from one answer to the next.
+    """
+
+    def __init__(self, refresh_per_second: float = 15) -> None:
+        """Initialize at the configured (fastest) refresh rate."""
+        self.frames = 0
+        self.skipped = 0
+        self.render_time = 0.0
+        self.write_time = 0.0
+        # Moving average of the cost of a frame, in seconds
+        self.frame_cost = 0.0
+        self._last = -math.inf
+        self.set_rate(refresh_per_second)
+
+    def set_rate(self, refresh_per_second: float) -> None:
+        """Change the configured refresh rate, keeping what was measured."""
+        self.refresh_per_second = refresh_per_second
+        self.min_interval = 1.0 / refresh_per_second
+        self.max_interval = max(self.min_interval, 1.0 / MIN_REFRESH_PER_SECOND)
+        self.interval = self._interval()
+
+    @property
+    def rate(self) -> float:
+        """Return the current refresh rate in frames per second."""
+        return 1.0 / self.interval
+
+    def delay(self, now: float) -> float:
+        """Return how long until the next frame is due (0 if it is)."""
+        return max(self._last + self.interval - now, 0.0)
+
+    def skip(self) -> None:
+        """Count a state that was replaced before it was drawn."""
+        self.skipped += 1
+
+    def record(self, start: float, render_time: float, write_time: float) -> None:
+        """Account for a frame started at ``start`` and adapt the interval."""
+        cost = render_time + write_time
+        if self.frames == 0:
+            self.frame_cost = cost
+        else:
+            self.frame_cost += FRAME_SMOOTHING * (cost - self.frame_cost)
+        self.frames += 1
+        self.render_time += render_time
+        self.write_time += write_time
+        self._last = start
+        self.interval = self._interval()
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return redraw statistics for display."""
+        frames = max(self.frames, 1)
+        return {
+            "frames drawn": self.frames,
+            "states skipped": self.skipped,
+            "mean render (ms)": self.render_time / frames * 1000,
+            "mean write (ms)": self.write_time / frames * 1000,
+            "refresh rate (/s)": self.rate,
+        }
+
+    def _interval(self) -> float:
+        """Return the interval that keeps redraws within the frame budget."""
+        wanted = self.frame_cost / FRAME_BUDGET
+        return min(max(wanted, self.min_interval), self.max_interval)
@@ -0,0 +1,301 @@
+"""Speculative prefetch of follow-up questions for Mind Terminal.
+
+After an answer completes, a small request asks the model for the follow-up
+questions the user is likely to ask next, and their answers are requested
+right away in the background. The suggestions are offered as completions at
+the prompt; picking one replays its answer from the buffer, or joins its
+stream if it is still arriving, instead of waiting for a new request.
+
+Speculative answers are capped at a token budget each. An answer that reaches
+the cap is aborted and discarded, so picking it falls back to a normal
+request; an answer that is picked while still streaming has its cap lifted.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from mindterm.conversation import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+from mindterm.router import Endpoint
+from mindterm.stream import chunk_text
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
+SUGGESTION_PROMPT = (
+    "Suggest {count} short follow-up questions I might ask next about your "
+    "last answer. Reply with one question per line and nothing else."
+)
+
+# Output cap of the suggestion request
+SUGGESTION_MAX_TOKENS = 120
+
+_LIST_MARKER_RE = re.compile(r"^\s*(?:[-*•]|\d{1,2}[.)])\s*")
+
+OpenStream = Callable[[Endpoint, "list[ChatCompletionMessageParam]", "int | None"], Any]
+
+
+def parse_suggestions(text: str, count: int) -> list[str]:
+    """Extract up to ``count`` distinct questions from the suggestion reply."""
+    suggestions: list[str] = []
+    for line in text.splitlines():
+        question = _LIST_MARKER_RE.sub("", line).strip().strip("\"'").strip()
+        if question and question not in suggestions:
+            suggestions.append(question)
+        if len(suggestions) == count:
+            break
+    return suggestions
+
+
+@dataclass
+class PrefetchedAnswer:
+    """A speculative answer streaming into a buffer."""
+
+    suggestion: str
+    # The request messages, ending with the suggestion as the user turn
+    messages: list[ChatCompletionMessageParam]
+    endpoint: Endpoint
+    budget: int
+    abort: Callable[[Any], None]
+    response: Any = None
+    chunks: list[Any] = field(default_factory=list)
+    tokens: int = 0
+    done: bool = False
+    error: Exception | None = None
+    # Stopped at the budget (or discarded) before it was picked
+    aborted: bool = False
+    promoted: bool = False
+    _changed: threading.Condition = field(default_factory=threading.Condition)
+
+    def run(self, open_stream: OpenStream) -> None:
+        """Stream the answer into the buffer until done, aborted or over budget."""
+        try:
+            response = open_stream(self.endpoint, self.messages, None)
+            with self._changed:
+                self.response = response
+                if self.aborted:
+                    self.abort(response)
+                    return
+            for chunk in response:
+                content = chunk_text(chunk)
+                with self._changed:
+                    if self.aborted:
+                        return
+                    self.chunks.append(chunk)
+                    if content:
+                        self.tokens += (
+                            estimate_tokens(content) - MESSAGE_OVERHEAD_TOKENS
+                        )
+                    if self.tokens > self.budget and not self.promoted:
+                        self.aborted = True
+                        self.abort(response)
+                        return
+                    self._changed.notify_all()
+        except Exception as e:
+            with self._changed:
+                self.error = None if self.aborted else e
+        finally:
+            with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    def promote(self) -> bool:
+        """Claim the answer for display, lifting its budget if it is still usable."""
+        with self._changed:
+            if self.aborted or (self.done and self.error is not None):
+                return False
+            self.promoted = True
+            return True
+
+    def discard(self) -> None:
+        """Stop streaming an answer that will not be used."""
+        with self._changed:
+            if self.aborted or self.promoted:
+                return
+            self.aborted = True
+            response = self.response
+            self._changed.notify_all()
+        if response is not None and not self.done:
+            self.abort(response)
+
+    def replay(self) -> Iterator[Any]:
+        """Yield the buffered chunks, then the rest of the stream as it arrives.
+
+        Raises:
+            Exception: The stream's error, once the buffered chunks are used up.
+        """
+        i = 0
+        while True:
+            with self._changed:
+                while i == len(self.chunks) and not self.done:
+                    self._changed.wait()
+                if i == len(self.chunks):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                chunk = self.chunks[i]
+            i += 1
+            yield chunk
+
+    def close(self) -> None:
+        """Abort the stream of a promoted answer, e.g. when it is cancelled."""
+        with self._changed:
+            self.aborted = True
+            response = self.response
+            self._changed.notify_all()
+        if response is not None:
+            self.abort(response)
+
+
+class Prefetcher:
+    """Suggest follow-up questions and prefetch their answers."""
+
+    def __init__(
+        self,
+        choose: Callable[[], Endpoint],
+        open_stream: OpenStream,
+        abort: Callable[[Any], None],
+        budget: int,
+        count: int = 3,
+    ) -> None:
+        """Initialize with a stream opener and a per-answer token budget.
+
+        ``choose()`` picks the endpoint of a request and
+        ``open_stream(endpoint, messages, max_tokens)`` starts it streaming.
+        """
+        self.choose = choose
+        self.open_stream = open_stream
+        self.abort = abort
+        self.budget = budget
+        self.count = count
+        self.suggestions: list[str] = []
+        self.rounds = 0
+        self.prefetched = 0
+        self.hits = 0
+        self.over_budget = 0
+        self.tokens = 0
+        self._answers: list[PrefetchedAnswer] = []
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        on_suggestions: Callable[[list[str]], None],
+    ) -> threading.Thread:
+        """Suggest follow-ups to a conversation and prefetch their answers.
+
+        Runs in the background; ``on_suggestions`` is called with the
+        suggestions once they are known. Earlier prefetches are discarded.
+        """
+        self.discard()
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self.rounds += 1
+
+        def run() -> None:
+            try:
+                suggestions = self.suggest(messages)
+            except Exception:
+                return  # Suggestions are best-effort
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self.suggestions = suggestions
+                answers = [
+                    PrefetchedAnswer(
+                        suggestion,
+                        [*messages, {"role": "user", "content": suggestion}],
+                        self.choose(),
+                        self.budget,
+                        self.abort,
+                    )
+                    for suggestion in suggestions
+                ]
+                self._answers = answers
+                self.prefetched += len(answers)
+            for answer in answers:
+                threading.Thread(
+                    target=answer.run,
+                    args=(self.open_stream,),
+                    name="mindterm-prefetch",
+                    daemon=True,
+                ).start()
+            on_suggestions(suggestions)
+
+        thread = threading.Thread(target=run, name="mindterm-suggest", daemon=True)
+        thread.start()
+        return thread
+
+    def suggest(self, messages: list[ChatCompletionMessageParam]) -> list[str]:
+        """Ask the model for likely follow-up questions."""
+        request: list[ChatCompletionMessageParam] = [
+            *messages,
+            {"role": "user", "content": SUGGESTION_PROMPT.format(count=self.count)},
+        ]
+        response = self.open_stream(self.choose(), request, SUGGESTION_MAX_TOKENS)
+        text = "".join(chunk_text(chunk) or "" for chunk in response)
+        return parse_suggestions(text, self.count)
+
+    def take(
+        self, prompt: str, messages: list[ChatCompletionMessageParam]
+    ) -> PrefetchedAnswer | None:
+        """Return the prefetched answer for a prompt and discard the others.
+
+        ``messages`` are the request messages of the prompt; an answer is only
+        used if it was prefetched for exactly that conversation.
+        """
+        with self._lock:
+            answers, self._answers = self._answers, []
+            self.suggestions = []
+            self._generation += 1
+        picked = None
+        for answer in answers:
+            if (
+                picked is None
+                and answer.suggestion == prompt.strip()
+                and answer.messages == messages
+                and answer.promote()
+            ):
+                picked = answer
+            else:
+                self._settle(answer)
+        if picked is not None:
+            with self._lock:
+                self.hits += 1
+        return picked
+
+    def discard(self) -> None:
+        """Drop the current suggestions and stop their prefetches."""
+        with self._lock:
+            answers, self._answers = self._answers, []
+            self.suggestions = []
+            self._generation += 1
+        for answer in answers:
+            self._settle(answer)
+
+    def _settle(self, answer: PrefetchedAnswer) -> None:
+        """Discard an unused answer and account for what it cost."""
+        answer.discard()
+        with self._lock:
+            self.tokens += answer.tokens
+            self.over_budget += answer.tokens > answer.budget
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return prefetch statistics for display."""
+        with self._lock:
+            stats: dict[str, int | float | str] = {
+                "rounds": self.rounds,
+                "answers prefetched": self.prefetched,
+                "picked": self.hits,
+                "stopped at budget": self.over_budget,
+                "unused tokens": self.tokens,
+                "budget per answer": self.budget,
+            }
+            if self.prefetched:
+                stats["hit rate (%)"] = self.hits / self.prefetched * 100
+        return stats
@@ -0,0 +1,296 @@
+"""Client-side rate limiting for Mind Terminal.
+
+Requests are scheduled against requests-per-minute and tokens-per-minute
+budgets with token buckets, so bursts from several users or scripts sharing
+one API key are smoothed out before the provider answers them with 429s.
+
+Interactive prompts go first: background requests (batch mode, prefetched
+follow-ups, attachment summaries) wait while an interactive request is
+waiting, and leave part of each bucket unused for the next one. A 429, or a
+rate-limit header reporting an exhausted quota, pauses every request until the
+provider's reset time.
+
+With a state file, the buckets are shared by all processes on the host: each
+update reads and rewrites the small file under an exclusive ``flock``.
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+from mindterm.conversation import estimate_tokens
+
+# Request priorities
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Share of each bucket background requests leave to interactive ones
+BACKGROUND_RESERVE = 0.2
+# Output tokens reserved for a request until its actual size is known
+OUTPUT_ESTIMATE = 500
+# How long an interactive request counts as waiting after it last checked
+INTERACTIVE_TTL = 1.0
+# How long background requests wait before checking again when yielding
+POLL_INTERVAL = 0.05
+# Waits asked for by the provider are capped at this many seconds
+MAX_RETRY_AFTER = 120.0
+# Wait after a 429 that does not say how long to wait
+DEFAULT_RETRY_AFTER = 1.0
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> float | None:
+    """Parse a reset duration such as ``"1.5"``, ``"20ms"`` or ``"6m0s"``."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> float | None:
+    """Return the seconds a rate-limited response asks to wait, if it says."""
+    wait: float | None = None
+    if (value := headers.get("retry-after-ms")) is not None:
+        try:
+            wait = float(value) / 1000
+        except ValueError:
+            pass
+    if wait is None and (value := headers.get("retry-after")) is not None:
+        wait = parse_duration(value)
+        if wait is None:
+            try:
+                wait = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+    if wait is None:
+        resets = [
+            parse_duration(value)
+            for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+            if (value := headers.get(name)) is not None
+        ]
+        wait = max((reset for reset in resets if reset is not None), default=None)
+    return None if wait is None else min(max(wait, 0.0), MAX_RETRY_AFTER)
+
+
+def exhausted_for(headers: Mapping[str, str]) -> float | None:
+    """Return how long a quota reported as used up by the headers stays so."""
+    waits = []
+    for kind in ("requests", "tokens"):
+        if headers.get(f"x-ratelimit-remaining-{kind}") == "0":
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+            waits.append(DEFAULT_RETRY_AFTER if reset is None else reset)
+    return min(max(waits), MAX_RETRY_AFTER) if waits else None
+
+
+def request_tokens(texts: Iterable[str], output: int = OUTPUT_ESTIMATE) -> int:
+    """Estimate the tokens a request counts against the budget."""
+    return sum(estimate_tokens(text) for text in texts) + output
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute.
+
+    A limit of 0 leaves that dimension unlimited. With ``state_path`` the
+    buckets are kept in that file and shared with other processes.
+    """
+
+    def __init__(self, rpm: int, tpm: int, state_path: str | None = None) -> None:
+        """Initialize with full buckets."""
+        self.rpm = rpm
+        self.tpm = tpm
+        self.state_path = state_path
+        if state_path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+        self.requests = 0
+        self.delayed = 0
+        self.wait_time = 0.0
+        self.limited = 0
+        self._state = self._full(time.time())
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, tokens: int, priority: int = INTERACTIVE) -> float:
+        """Take budget for a request if it fits now.
+
+        Returns 0 if it was taken, or else the seconds to wait before trying
+        again.
+        """
+        with self._shared() as state:
+            now = time.time()
+            self._refill(state, now)
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            if priority == BACKGROUND and (
+                self._interactive_waiting or state["interactive_until"] > now
+            ):
+                return POLL_INTERVAL
+            reserve = BACKGROUND_RESERVE if priority == BACKGROUND else 0.0
+            wait = max(
+                _shortfall(state["requests"], 1, self.rpm, reserve),
+                _shortfall(state["tokens"], tokens, self.tpm, reserve),
+            )
+            if wait > 0:
+                if priority == INTERACTIVE:
+                    state["interactive_until"] = now + INTERACTIVE_TTL
+                return wait
+            state["requests"] -= 1
+            state["tokens"] -= tokens
+            return 0.0
+
+    def acquire(
+        self,
+        tokens: int,
+        priority: int = INTERACTIVE,
+        cancel: threading.Event | None = None,
+    ) -> bool:
+        """Wait until a request fits the budgets; return False if cancelled."""
+        start = time.monotonic()
+        with self._waiting(priority):
+            while (wait := self.try_acquire(tokens, priority)) > 0:
+                # Check again regularly, so interactive requests stay announced
+                wait = min(wait, INTERACTIVE_TTL / 2)
+                if cancel is not None:
+                    if cancel.wait(wait):
+                        return False
+                else:
+                    time.sleep(wait)
+        self._record(time.monotonic() - start)
+        return True
+
+    async def acquire_async(self, tokens: int, priority: int = BACKGROUND) -> None:
+        """Wait until a request fits the budgets without blocking the event loop."""
+        start = time.monotonic()
+        with self._waiting(priority):
+            while (wait := self.try_acquire(tokens, priority)) > 0:
+                await asyncio.sleep(min(wait, INTERACTIVE_TTL / 2))
+        self._record(time.monotonic() - start)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Correct the token bucket once a request's actual size is known."""
+        with self._shared() as state:
+            state["tokens"] += reserved - used
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Pause all requests if the provider reports an exhausted quota."""
+        wait = exhausted_for(headers)
+        if wait is not None:
+            self.block(wait)
+
+    def rate_limited(self, headers: Mapping[str, str]) -> float:
+        """Pause all requests after a 429 and return how long for."""
+        wait = retry_after(headers)
+        if wait is None:
+            wait = DEFAULT_RETRY_AFTER
+        with self._lock:
+            self.limited += 1
+        self.block(wait)
+        return wait
+
+    def block(self, seconds: float) -> None:
+        """Hold every request back for a number of seconds."""
+        with self._shared() as state:
+            state["blocked_until"] = max(state["blocked_until"], time.time() + seconds)
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return rate limiting statistics for display."""
+        with self._lock:
+            return {
+                "requests per minute": self.rpm or "unlimited",
+                "tokens per minute": self.tpm or "unlimited",
+                "shared": "yes" if self.state_path else "no",
+                "requests": self.requests,
+                "delayed": self.delayed,
+                "total wait (s)": self.wait_time,
+                "rate limited (429)": self.limited,
+            }
+
+    def _full(self, now: float) -> dict[str, float]:
+        """Return the state of full buckets."""
+        return {
+            "requests": float(self.rpm),
+            "tokens": float(self.tpm),
+            "updated": now,
+            "blocked_until": 0.0,
+            "interactive_until": 0.0,
+        }
+
+    def _refill(self, state: dict[str, float], now: float) -> None:
+        """Add the budget earned since the state was last updated."""
+        elapsed = max(now - state["updated"], 0.0)
+        state["requests"] = min(state["requests"] + elapsed * self.rpm / 60, self.rpm)
+        state["tokens"] = min(state["tokens"] + elapsed * self.tpm / 60, self.tpm)
+        state["updated"] = now
+
+    def _record(self, waited: float) -> None:
+        """Count an admitted request."""
+        with self._lock:
+            self.requests += 1
+            if waited > POLL_INTERVAL / 2:
+                self.delayed += 1
+                self.wait_time += waited
+
+    @contextmanager
+    def _waiting(self, priority: int) -> Iterator[None]:
+        """Announce an interactive request while it waits for budget."""
+        if priority != INTERACTIVE:
+            yield
+            return
+        with self._lock:
+            self._interactive_waiting += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._interactive_waiting -= 1
+
+    @contextmanager
+    def _shared(self) -> Iterator[dict[str, float]]:
+        """Yield the bucket state for an update, locked across processes."""
+        with self._lock:
+            if self.state_path is None or fcntl is None:
+                yield self._state
+                return
+            with open(self.state_path, "a+", encoding="utf-8") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = {**self._full(time.time()), **json.loads(f.read())}
+                    except (TypeError, ValueError):
+                        state = self._full(time.time())  # New or torn file
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _shortfall(level: float, amount: int, limit: int, reserve: float) -> float:
+    """Return the seconds until a bucket can pay ``amount``, keeping a reserve.
+
+    A request larger than the bucket only needs it full, so it is not held
+    back forever.
+    """
+    if limit <= 0:
+        return 0.0
+    needed = min(amount + reserve * limit, limit)
+    return max(needed - level, 0.0) * 60 / limit
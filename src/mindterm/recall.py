@@ -0,0 +1,337 @@
+"""Recall of answers to near-duplicate earlier prompts.
+
+Each prompt is reduced to a one-permutation MinHash signature of its byte
+4-grams: 64 bins of 16-bit values, so the Jaccard similarity of two prompts
+is estimated by the share of equal bins. Signatures are kept in a single
+append-only ``array`` and indexed by locality-sensitive hashing: 10 bands of
+6 bins each, stored per band as a sorted ``array`` of ``key << 32 | id`` and
+searched with ``bisect``. Entries added since the bands were last merged sit
+in a small dict and are merged in batches.
+
+Entry ids are assigned by SQLite, and each signature is written at the
+offset of its id while the directory is locked, so several processes can
+add to the same index; each takes in the others' entries on its next add.
+
+Lookups hash the prompt, probe 10 sorted arrays and compare a few candidate
+signatures, which stays well under a millisecond at 100k entries. The prompts
+and answers themselves live in SQLite and are only read on a hit.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from mindterm.sessions import file_lock
+
+BINS = 64
+SIGNATURE_BYTES = 2 * BINS
+# Bands of ROWS bins each; the last BINS - BANDS * ROWS bins are only compared
+BANDS = 10
+ROWS = 6
+SHINGLE_BYTES = 4
+# Prompts are compared by their beginning only
+MAX_PROMPT_CHARS = 4000
+# Prompts shorter than this (once normalized) are not indexed or looked up
+MIN_PROMPT_CHARS = 12
+# Unmerged entries that trigger a merge into the sorted band arrays
+MERGE_AFTER = 4096
+# Candidates compared per lookup, and taken from one bucket, at most
+MAX_CANDIDATES = 256
+MAX_BUCKET = 64
+
+_EMPTY = 0xFFFFFFFF
+_LANE_LOW_BITS = int("0001" * BINS, 16)
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prompt TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    time REAL NOT NULL
+);
+"""
+
+
+def _entry(row_id: int) -> int:
+    """Return the position in the signature file of a database row."""
+    return row_id - 1
+
+
+def _row_id(entry: int) -> int:
+    """Return the database row of a position in the signature file."""
+    return entry + 1
+
+
+def normalize(prompt: str) -> str:
+    """Lowercase a prompt and collapse punctuation and whitespace."""
+    return _NON_WORD_RE.sub(" ", prompt[:MAX_PROMPT_CHARS].lower()).strip()
+
+
+def signature(prompt: str) -> array[int] | None:
+    """Return the MinHash signature of a prompt, or None if it is too short.
+
+    Every shingle is hashed once and goes to the bin given by its low bits
+    (one-permutation hashing). Empty bins borrow the value of the next
+    non-empty bin, mixed with the distance, so short prompts still compare
+    bin by bin.
+    """
+    text = normalize(prompt)
+    if len(text) < MIN_PROMPT_CHARS:
+        return None
+    data = text.encode("utf-8")
+    mins = [_EMPTY] * BINS
+    for i in range(len(data) - SHINGLE_BYTES + 1):
+        h = zlib.crc32(data[i : i + SHINGLE_BYTES])
+        b = h & (BINS - 1)
+        value = h >> 6
+        if value < mins[b]:
+            mins[b] = value
+    values = array("H", bytes(2 * BINS))
+    for b in range(BINS):
+        distance = 0
+        while mins[(b + distance) % BINS] == _EMPTY:
+            distance += 1
+        values[b] = (mins[(b + distance) % BINS] ^ (distance * 0x9E37)) & 0xFFFF
+    return values
+
+
+def band_keys(values: array[int]) -> list[int]:
+    """Return the LSH key of each band of a signature."""
+    data = values.tobytes()
+    step = ROWS * values.itemsize
+    return [zlib.crc32(data[i * step : (i + 1) * step]) for i in range(BANDS)]
+
+
+def _lanes(values: array[int]) -> int:
+    """Pack a signature into one integer of 16-bit lanes."""
+    return int.from_bytes(values.tobytes(), "little")
+
+
+def _equal_lanes(a: int, b: int) -> int:
+    """Count the equal 16-bit lanes of two packed signatures.
+
+    Each lane of ``a ^ b`` is folded onto its lowest bit, so the nonzero
+    lanes can be counted with a single ``bit_count``.
+    """
+    x = a ^ b
+    x |= x >> 1
+    x |= x >> 2
+    x |= x >> 4
+    x |= x >> 8
+    return BINS - (x & _LANE_LOW_BITS).bit_count()
+
+
+def similarity(a: array[int], b: array[int]) -> float:
+    """Estimate the Jaccard similarity of two prompts from their signatures."""
+    return _equal_lanes(_lanes(a), _lanes(b)) / BINS
+
+
+@dataclass
+class RecallMatch:
+    """An earlier prompt similar to the current one and its answer."""
+
+    prompt: str
+    answer: str
+    similarity: float
+    time: float
+
+
+class RecallIndex:
+    """Persistent MinHash/LSH index of answered prompts."""
+
+    def __init__(self, directory: str, threshold: float = 0.8) -> None:
+        """Open (or create) the index in a directory."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.threshold = threshold
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_time = 0.0
+        self._signatures_path = os.path.join(directory, "signatures.bin")
+        self._bands_path = os.path.join(directory, "bands.bin")
+        self._db = sqlite3.connect(
+            os.path.join(directory, "recall.db"), check_same_thread=False
+        )
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+        self._signatures = array("H")
+        if os.path.exists(self._signatures_path):
+            with open(self._signatures_path, "rb") as f:
+                data = f.read()
+            # Ignore a signature torn by an interrupted write
+            self._signatures.frombytes(data[: len(data) - len(data) % SIGNATURE_BYTES])
+        self._bands = [array("Q") for _ in range(BANDS)]
+        self._merged = 0
+        self._load_bands()
+        self._pending: dict[tuple[int, int], list[int]] = {}
+        for entry in range(self._merged, len(self)):
+            self._add_pending(entry, self._signature(entry))
+
+    def __len__(self) -> int:
+        """Return the number of indexed prompts."""
+        return len(self._signatures) // BINS
+
+    def add(self, prompt: str, answer: str) -> bool:
+        """Index an answered prompt; return False if it is too short."""
+        return self.add_many([(prompt, answer)]) == 1
+
+    def add_many(self, pairs: Iterable[tuple[str, str]]) -> int:
+        """Index answered prompts in one transaction; return how many were added."""
+        prepared = [
+            (prompt, answer, values)
+            for prompt, answer in pairs
+            if (values := signature(prompt)) is not None
+        ]
+        if not prepared:
+            return 0
+        now = time.time()
+        with self._lock, file_lock(self.directory):
+            fd = os.open(self._signatures_path, os.O_WRONLY | os.O_CREAT, 0o644)
+            # The file is flushed on exit, before the rows are committed
+            with self._db, os.fdopen(fd, "wb") as f:
+                for prompt, answer, values in prepared:
+                    cursor = self._db.execute(
+                        "INSERT INTO entries (prompt, answer, time) VALUES (?, ?, ?)",
+                        (prompt, answer, now),
+                    )
+                    assert cursor.lastrowid is not None
+                    f.seek(_entry(cursor.lastrowid) * SIGNATURE_BYTES)
+                    f.write(values.tobytes())
+            self._catch_up()
+        return len(prepared)
+
+    def lookup(self, prompt: str) -> RecallMatch | None:
+        """Return the most similar earlier prompt above the threshold, if any."""
+        start = time.perf_counter()
+        values = signature(prompt)
+        if values is None:
+            return None
+        with self._lock:
+            self.lookups += 1
+            query = _lanes(values)
+            best, best_entry = 0, -1
+            for entry in self._candidates(values):
+                equal = _equal_lanes(query, _lanes(self._signature(entry)))
+                # Prefer the newest of equally similar prompts
+                if (equal, entry) > (best, best_entry):
+                    best, best_entry = equal, entry
+            match = None
+            if best_entry >= 0 and best / BINS >= self.threshold:
+                row = self._db.execute(
+                    "SELECT prompt, answer, time FROM entries WHERE id = ?",
+                    (_row_id(best_entry),),
+                ).fetchone()
+                if row is not None:
+                    self.hits += 1
+                    match = RecallMatch(
+                        str(row[0]), str(row[1]), best / BINS, float(row[2])
+                    )
+            self.lookup_time += time.perf_counter() - start
+        return match
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return index statistics for display."""
+        with self._lock:
+            stats: dict[str, int | float | str] = {
+                "entries": len(self),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "threshold": self.threshold,
+            }
+            if self.lookups:
+                stats["mean lookup (ms)"] = self.lookup_time / self.lookups * 1000
+        return stats
+
+    def close(self) -> None:
+        """Merge unmerged entries into the band arrays and close the database."""
+        with self._lock, file_lock(self.directory):
+            if len(self) > self._merged:
+                self._merge()
+            self._db.close()
+
+    def _catch_up(self) -> None:
+        """Index the signatures written since this index last read the file.
+
+        These are this process's own and those added by other processes.
+        """
+        with open(self._signatures_path, "rb") as f:
+            f.seek(len(self) * SIGNATURE_BYTES)
+            data = f.read()
+        first = len(self)
+        self._signatures.frombytes(data[: len(data) - len(data) % SIGNATURE_BYTES])
+        for entry in range(first, len(self)):
+            self._add_pending(entry, self._signature(entry))
+        if len(self) - self._merged >= MERGE_AFTER:
+            self._merge()
+
+    def _signature(self, entry: int) -> array[int]:
+        """Return the stored signature of an entry."""
+        return self._signatures[entry * BINS : (entry + 1) * BINS]
+
+    def _candidates(self, values: array[int]) -> set[int]:
+        """Return recent entries sharing at least one band with a signature."""
+        candidates: set[int] = set()
+        for band, key in enumerate(band_keys(values)):
+            keys = self._bands[band]
+            # Newest entries first; a bucket shared by many prompts (a common
+            # phrase) only contributes its most recent ones
+            end = bisect_left(keys, (key + 1) << 32)
+            start = max(bisect_left(keys, key << 32, hi=end), end - MAX_BUCKET)
+            candidates.update(keys[i] & 0xFFFFFFFF for i in range(start, end))
+            candidates.update(self._pending.get((band, key), ())[-MAX_BUCKET:])
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+        return candidates
+
+    def _add_pending(self, entry: int, values: array[int]) -> None:
+        """Index an entry in the unmerged dict."""
+        for band, key in enumerate(band_keys(values)):
+            self._pending.setdefault((band, key), []).append(entry)
+
+    def _merge(self) -> None:
+        """Merge unmerged entries into the sorted band arrays and save them."""
+        added: list[list[int]] = [[] for _ in range(BANDS)]
+        for (band, key), entries in self._pending.items():
+            added[band].extend(key << 32 | entry for entry in entries)
+        for band in range(BANDS):
+            # Both parts are sorted runs, which sorted() merges in linear time
+            self._bands[band] = array(
+                "Q", sorted([*self._bands[band], *sorted(added[band])])
+            )
+        self._pending.clear()
+        self._merged = len(self)
+        header = array("Q", [len(self)])
+        tmp_path = self._bands_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            header.tofile(f)
+            for keys in self._bands:
+                keys.tofile(f)
+        os.replace(tmp_path, self._bands_path)
+
+    def _load_bands(self) -> None:
+        """Load the sorted band arrays saved by the last merge."""
+        if not os.path.exists(self._bands_path):
+            return
+        with open(self._bands_path, "rb") as f:
+            header = array("Q")
+            header.fromfile(f, 1)
+            count = header[0]
+            if count > len(self):
+                return  # Signatures were lost; rebuild from what is left
+            try:
+                for keys in self._bands:
+                    keys.fromfile(f, count)
+            except EOFError:
+                self._bands = [array("Q") for _ in range(BANDS)]
+                return
+        self._merged = count
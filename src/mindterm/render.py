@@ -0,0 +1,513 @@
+"""Incremental Markdown rendering for streamed responses."""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from rich.console import Console, ConsoleOptions, Group, RenderableType, RenderResult
+from rich.live import Live
+from rich.markdown import Markdown
+from rich.segment import Segment
+from rich.syntax import Syntax
+from rich.text import Text
+
+from mindterm.codeblocks import CodeBlock, parse_code_block
+from mindterm.pacing import FrameScheduler, TerminalOutput
+
+_FENCE_RE = re.compile(r"^( {0,3})(`{3,}|~{3,})")
+_LIST_RE = re.compile(r"^ {0,3}(?:[-+*]|\d{1,9}[.)])(?:\s|$)")
+
+# Rich's default theme for Markdown code blocks
+CODE_THEME = "monokai"
+# Highlighted code blocks kept for reuse, by content hash and width
+HIGHLIGHT_CACHE_SIZE = 256
+
+_highlighted: OrderedDict[tuple[str, int], list[list[Segment]]] = OrderedDict()
+
+
+class HighlightedCode:
+    """A syntax-highlighted code block, rendered once per content and width.
+
+    Highlighting is the most expensive part of rendering an answer, so the
+    rendered lines are cached by a hash of the code, its language and its
+    padding; showing the same block again (a recalled or cached answer, a
+    resumed session) costs a dictionary lookup.
+    """
+
+    hits = 0
+    misses = 0
+
+    def __init__(self, code: str, language: str, top: bool, bottom: bool) -> None:
+        """Initialize with the code and which vertical padding to draw."""
+        self.code = code
+        self.language = language
+        self.top = top
+        self.bottom = bottom
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        digest = hashlib.blake2b(
+            f"{self.language}\0{self.top:d}{self.bottom:d}\0{self.code}".encode(),
+            digest_size=16,
+        ).hexdigest()
+        key = (digest, options.max_width)
+        lines = _highlighted.get(key)
+        if lines is None:
+            HighlightedCode.misses += 1
+            syntax = Syntax(
+                self.code.rstrip("\n"),
+                self.language or "text",
+                theme=CODE_THEME,
+                word_wrap=True,
+                padding=(int(self.top), 1, int(self.bottom), 1),
+            )
+            lines = console.render_lines(syntax, options, pad=False)
+            _highlighted[key] = lines
+            if len(_highlighted) > HIGHLIGHT_CACHE_SIZE:
+                _highlighted.popitem(last=False)
+        else:
+            HighlightedCode.hits += 1
+            _highlighted.move_to_end(key)
+        for line in lines:
+            yield from line
+            yield Segment.line()
+
+
+class MarkdownBlockSplitter:
+    """Split streamed Markdown into completed top-level blocks.
+
+    A block is complete once it can no longer be changed by text that follows
+    it: a paragraph followed by a blank line and a non-continuation line, or a
+    fenced code block whose closing fence has been seen. Lists are kept whole
+    until a line that cannot belong to them arrives.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty splitter."""
+        self._reset()
+
+    def _reset(self) -> None:
+        """Clear all parser state."""
+        self._partial = ""  # Text after the last newline
+        self._lines: list[str] = []  # Complete lines of the open block
+        self._fence: str | None = None
+        self._fence_owns_block = False
+        self._is_list = False
+        self._saw_blank = False
+        self._released = False
+
+    @property
+    def tail(self) -> str:
+        """Return the text of the block that is still open."""
+        return "".join(self._lines) + self._partial
+
+    @property
+    def open_lines(self) -> int:
+        """Return the number of complete lines in the open block."""
+        return len(self._lines)
+
+    @property
+    def continued(self) -> bool:
+        """Return whether lines of the open block were already released."""
+        return self._released
+
+    @property
+    def in_code(self) -> bool:
+        """Return whether the open block is a top-level fenced code block."""
+        return self._fence is not None and self._fence_owns_block
+
+    @property
+    def code_language(self) -> str:
+        """Return the info string language of the open code block."""
+        if not self.in_code:
+            return ""
+        opening = self._lines[0].strip().lstrip(self._fence or "")
+        return opening.split(" ", 1)[0] if opening else ""
+
+    def release(self, keep: int) -> str:
+        """Remove all but the last ``keep`` lines from the open block.
+
+        Only cuts where the pieces render like the whole: between lines of a
+        fenced code block (whose opening fence stays with the open block),
+        between top-level list items and between lines of a paragraph.
+        Returns the removed text, or an empty string if nothing was cut.
+        """
+        cut = len(self._lines) - keep
+        if cut <= 0 or self._lines[0].lstrip().startswith(("|", "#")):
+            return ""
+        if self._fence is not None:
+            if not self._fence_owns_block:
+                return ""
+            released = self._lines[1:cut]
+            del self._lines[1:cut]
+        else:
+            if self._is_list:
+                cut = max(
+                    (
+                        i
+                        for i in range(1, cut + 1)
+                        if _LIST_RE.match(self._lines[i])
+                        and self._lines[i][:1] not in (" ", "\t")
+                    ),
+                    default=0,
+                )
+            while cut > 0 and not self._lines[cut - 1].strip():
+                cut -= 1  # Keep trailing blank lines with the open block
+            released = self._lines[:cut]
+            del self._lines[:cut]
+        if not released:
+            return ""
+        self._released = True
+        return "".join(released)
+
+    def feed(self, text: str) -> list[str]:
+        """Consume streamed text and return any blocks it completed."""
+        completed: list[str] = []
+        data = self._partial + text
+        start = 0
+        while True:
+            end = data.find("\n", start)
+            if end == -1:
+                break
+            self._consume_line(data[start : end + 1], completed)
+            start = end + 1
+        self._partial = data[start:]
+
+        # An unindented line after a blank line closes a non-list block as
+        # soon as its first character arrives
+        if (
+            self._saw_blank
+            and not self._is_list
+            and self._partial[:1] not in ("", " ", "\t")
+        ):
+            self._emit(completed)
+        return completed
+
+    def flush(self) -> str:
+        """Return the remaining open text and reset the splitter."""
+        remaining = self.tail
+        self._reset()
+        return remaining
+
+    def _consume_line(self, line: str, completed: list[str]) -> None:
+        """Process a single complete line."""
+        if self._fence is not None:
+            self._lines.append(line)
+            if self._closes_fence(line):
+                self._fence = None
+                if self._fence_owns_block:
+                    self._emit(completed)
+            return
+
+        blank = not line.strip()
+        if blank:
+            if self._lines:
+                self._saw_blank = True
+                self._lines.append(line)
+            return
+
+        fence = _FENCE_RE.match(line)
+        indented = line[0] in " \t"
+        is_list_item = _LIST_RE.match(line) is not None
+
+        if self._saw_blank and not (self._is_list and (indented or is_list_item)):
+            self._emit(completed)
+
+        if fence is not None and not (self._is_list and indented):
+            # A top-level fence interrupts the open block and owns a new one
+            self._emit(completed)
+            self._fence_owns_block = True
+        elif fence is not None:
+            self._fence_owns_block = False
+
+        if fence is not None:
+            self._fence = fence.group(2)
+
+        if not self._lines:
+            self._is_list = is_list_item
+        self._saw_blank = False
+        self._lines.append(line)
+
+    def _closes_fence(self, line: str) -> bool:
+        """Check whether a line closes the currently open fence."""
+        assert self._fence is not None
+        stripped = line.strip()
+        return (
+            len(stripped) >= len(self._fence)
+            and set(stripped) == {self._fence[0]}
+            and len(line) - len(line.lstrip(" ")) < 4
+        )
+
+    def _emit(self, completed: list[str]) -> None:
+        """Move the open block into the completed list."""
+        text = "".join(self._lines).rstrip("\n")
+        if text.strip():
+            completed.append(text)
+        self._lines = []
+        self._is_list = False
+        self._saw_blank = False
+        self._fence_owns_block = False
+        self._released = False
+
+
+class _WithoutLeadingBlank:
+    """Render a Markdown fragment without the blank line Rich puts before lists."""
+
+    def __init__(self, markdown: Markdown) -> None:
+        self.markdown = markdown
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> RenderResult:
+        lines = console.render_lines(self.markdown, options, pad=False)
+        if lines and not "".join(segment.text for segment in lines[0]).strip():
+            lines = lines[1:]
+        for line in lines:
+            yield from line
+            yield Segment.line()
+
+
+class StreamingMarkdownRenderer:
+    """Render streamed Markdown without re-parsing completed blocks.
+
+    Completed blocks are printed once above the live region and never touched
+    again; only the open tail block is re-parsed, and only when a frame is
+    drawn. Frames are drawn on a background thread, paced by a
+    ``FrameScheduler`` that lowers the refresh rate while frames are slow to
+    render or to write, and show only the latest state. With ``live=False``,
+    or when the console is not a terminal, there is no live region at all:
+    blocks are printed as they complete and the tail when the stream ends,
+    which keeps output append-only (e.g. while a prompt is active below it,
+    or when piped to a file).
+
+    Code blocks are shown as plain text while they stream and highlighted
+    once, when they close. They are collected in ``code_blocks`` as they
+    close, so the answer is never parsed again to find them.
+
+    A single block can be arbitrarily long (a generated file, a log), so once
+    the open block exceeds ``window`` lines its older lines are committed to
+    scrollback and released. The live region, and the memory and re-render
+    cost per update, stay bounded by the window however long the response is.
+    The window defaults to the terminal height; 0 disables it.
+    """
+
+    def __init__(
+        self,
+        console: Console,
+        refresh_per_second: float = 15,
+        live: bool = True,
+        window: int | None = None,
+        scheduler: FrameScheduler | None = None,
+    ) -> None:
+        """Initialize the renderer."""
+        self.console = console
+        self.refresh_per_second = refresh_per_second
+        self.live = live and console.is_terminal and not console.is_dumb_terminal
+        self.window = max(console.height - 4, 8) if window is None else window
+        if scheduler is None:
+            scheduler = FrameScheduler(refresh_per_second)
+        else:
+            scheduler.set_rate(refresh_per_second)
+        self.scheduler = scheduler
+        self._splitter = MarkdownBlockSplitter()
+        self._live: Live | None = None
+        self._frames: threading.Thread | None = None
+        # Guards the splitter and the console between feed and the frames
+        self._changed = threading.Condition()
+        self._closed = False
+        self._blocks_printed = 0
+        self._dirty = False
+        self._continued = False
+        self._code_language: str | None = None
+        self.code_blocks: list[CodeBlock] = []
+        # Lines of the open code block already committed to scrollback
+        self._code_parts: list[str] = []
+
+    def __enter__(self) -> "StreamingMarkdownRenderer":
+        """Start the live region."""
+        if self.live:
+            # Redrawn by the frame thread only when the tail changed
+            self._live = Live("", auto_refresh=False, console=self.console)
+            self._live.__enter__()
+            self._frames = threading.Thread(
+                target=self._draw_frames, name="mindterm-frames", daemon=True
+            )
+            self._frames.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Render the remaining tail and stop the live region."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify()
+        if self._frames is not None:
+            self._frames.join()
+            self._frames = None
+        tail = self._tail_renderable(self._splitter.flush(), closed=True)
+        if self._live is None:
+            self.console.print(tail)
+            return
+        self._live.update(tail)
+        self._live.__exit__(None, None, None)
+        self._live = None
+
+    def feed(self, chunk: str) -> None:
+        """Add a streamed chunk to the output."""
+        with self._changed:
+            self._feed(chunk)
+
+    def _feed(self, chunk: str) -> None:
+        """Print the blocks a chunk completes and mark the tail for redrawing."""
+        console = self._live.console if self._live is not None else self.console
+        blocks = self._splitter.feed(chunk)
+        if blocks and self._live is not None:
+            # Clear the stale tail so it is not redrawn below each block
+            self._live.update(Text(""), refresh=False)
+        for block in blocks:
+            if self._continued:
+                # The rest of a block whose start was already committed
+                console.print(self._continuation(block, closed=True))
+                self._continued = False
+            else:
+                if self._needs_separator(block):
+                    console.print()
+                console.print(self._block(block))
+            self._blocks_printed += 1
+
+        if self.window and self._splitter.open_lines > self.window:
+            self._commit_lines(console)
+
+        if self._live is not None and (chunk or blocks):
+            if self._dirty:
+                # The state waiting for the next frame is replaced unseen
+                self.scheduler.skip()
+            else:
+                self._dirty = True
+                self._changed.notify()
+
+    def _draw_frames(self) -> None:
+        """Redraw the tail whenever it changed and a frame is due."""
+        with self._changed:
+            while not self._closed:
+                delay = self.scheduler.delay(time.perf_counter())
+                if not self._dirty:
+                    self._changed.wait()
+                elif delay > 0:
+                    self._changed.wait(delay)
+                else:
+                    self._draw()
+
+    def _draw(self) -> None:
+        """Render the tail into the live region and time it."""
+        assert self._live is not None
+        output = self.console.file
+        written = output.write_time if isinstance(output, TerminalOutput) else 0.0
+        start = time.perf_counter()
+        self._live.update(self._tail_renderable(self._splitter.tail), refresh=True)
+        elapsed = time.perf_counter() - start
+        if isinstance(output, TerminalOutput):
+            write_time = min(output.write_time - written, elapsed)
+        else:
+            write_time = 0.0
+        self.scheduler.record(start, elapsed - write_time, write_time)
+        self._dirty = False
+
+    def _commit_lines(self, console: Console) -> None:
+        """Print the older lines of the open block and release them."""
+        first = not self._continued
+        opening = self._splitter.tail.split("\n", 1)[0]
+        language = self._splitter.code_language
+        in_code = self._splitter.in_code
+        released = self._splitter.release(self.window // 4)
+        if not released:
+            return
+        if self._live is not None:
+            self._live.update(Text(""), refresh=False)
+        if first and self._needs_separator(opening):
+            console.print()
+        if in_code:
+            self._code_parts.append(released)
+            console.print(self._code(released, language, top=first, bottom=False))
+        elif first:
+            console.print(Markdown(released))
+        else:
+            console.print(_WithoutLeadingBlank(Markdown(released)))
+        self._continued = True
+        self._code_language = language if in_code else None
+
+    def _continuation(self, text: str, closed: bool) -> RenderableType:
+        """Build the renderable for the rest of a partly committed block."""
+        if self._code_language is None:
+            return _WithoutLeadingBlank(Markdown(text))
+        # Drop the opening fence kept with the open block and the closing one
+        lines = text.split("\n")[1:]
+        if closed and lines and _FENCE_RE.match(lines[-1]):
+            lines = lines[:-1]
+        code = "\n".join(lines)
+        if closed:
+            whole = "".join(self._code_parts) + code
+            self.code_blocks.append(CodeBlock(self._code_language, whole.rstrip("\n")))
+            self._code_parts = []
+            return self._code(code, self._code_language, top=False, bottom=True)
+        return self._code(code, "", top=False, bottom=True)
+
+    def _block(self, block: str) -> RenderableType:
+        """Build the renderable for a completed block."""
+        code = self._collect(block)
+        if code is None:
+            return Markdown(block)
+        return self._code(code.code, code.language, top=True, bottom=True)
+
+    def _collect(self, block: str) -> CodeBlock | None:
+        """Record a block that is a fenced code block and return it."""
+        code = parse_code_block(block)
+        if code is not None:
+            self.code_blocks.append(code)
+        return code
+
+    @staticmethod
+    def _code(code: str, language: str, top: bool, bottom: bool) -> RenderableType:
+        """Render a piece of a code block like Rich's Markdown code blocks.
+
+        Code without a language is not highlighted, which is how open blocks
+        are shown while they stream.
+        """
+        if not language:
+            return Syntax(
+                code.rstrip("\n"),
+                "text",
+                theme=CODE_THEME,
+                word_wrap=True,
+                padding=(int(top), 1, int(bottom), 1),
+            )
+        return HighlightedCode(code, language, top, bottom)
+
+    def _tail_renderable(self, tail: str, closed: bool = False) -> RenderableType:
+        """Build the renderable for the open tail block."""
+        if self._continued:
+            return self._continuation(tail, closed=closed)
+        if closed:
+            # The end of the answer, which may be an unclosed code block
+            renderable = self._block(tail) if tail.strip() else Markdown(tail)
+        elif self._splitter.in_code:
+            # Highlighted once the block closes; plain text until then
+            body = tail.split("\n", 1)[1] if "\n" in tail else ""
+            renderable = self._code(body, "", top=True, bottom=True)
+        else:
+            renderable = Markdown(tail)
+        if not self._needs_separator(tail):
+            return renderable
+        return Group(Text(""), renderable)
+
+    def _needs_separator(self, block: str) -> bool:
+        """Check whether a blank line should precede a block.
+
+        Rich already renders a leading blank line for lists.
+        """
+        return (
+            self._blocks_printed > 0
+            and bool(block.strip())
+            and _LIST_RE.match(block) is None
+        )
@@ -0,0 +1,201 @@
+"""Latency-aware routing across OpenAI-compatible endpoints.
+
+Endpoints are listed in a TOML file::
+
+    [[endpoints]]
+    name = "dashscope"
+    base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+    model = "qwen-plus"
+
+    [[endpoints]]
+    name = "local"
+    base_url = "http://localhost:8000/v1"
+    model = "qwen2.5-7b-instruct"
+    api_key_env = "LOCAL_API_KEY"
+
+Without a file the single endpoint from ``OPENAI_BASE_URL``/``OPENAI_MODEL``
+is used. The router keeps a rolling window of time-to-first-token and
+outcomes per endpoint, prefers the fastest healthy endpoint and puts an
+endpoint that keeps failing on an exponentially growing cooldown.
+"""
+import os
+import statistics
+import threading
+import time
+import tomllib
+from collections import deque
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+from mindterm.config import config
+
+
+@dataclass
+class Endpoint:
+    """An OpenAI-compatible endpoint and the model to use on it."""
+
+    name: str
+    base_url: str
+    model: str
+    api_key: str | None
+
+
+@dataclass
+class EndpointHealth:
+    """Rolling request history of an endpoint."""
+
+    ttfts: deque[float]
+    outcomes: deque[bool]
+    requests: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    retry_at: float = 0.0
+
+    @property
+    def ttft(self) -> float:
+        """Return the median recent TTFT, or 0 for an endpoint not yet tried."""
+        return statistics.median(self.ttfts) if self.ttfts else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        """Return the share of recent requests that failed."""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+def default_endpoint() -> Endpoint:
+    """Return the endpoint configured through the environment."""
+    return Endpoint("default", config.base_url, config.model, config.api_key)
+
+
+def load_endpoints(path: str) -> list[Endpoint]:
+    """Load endpoints from a TOML file, or the default endpoint if it is missing.
+
+    Raises:
+        ValueError: If the file is malformed.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    except FileNotFoundError:
+        return [default_endpoint()]
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Invalid endpoints file {path}: {e}") from e
+
+    endpoints = []
+    for entry in data.get("endpoints", []):
+        if not isinstance(entry, dict) or "base_url" not in entry:
+            raise ValueError(f"Invalid endpoints file {path}: base_url is required")
+        api_key_env = entry.get("api_key_env")
+        endpoints.append(
+            Endpoint(
+                name=entry.get("name") or urlparse(entry["base_url"]).netloc,
+                base_url=entry["base_url"],
+                model=entry.get("model", config.model),
+                api_key=os.getenv(api_key_env) if api_key_env else config.api_key,
+            )
+        )
+    if not endpoints:
+        raise ValueError(f"Invalid endpoints file {path}: no endpoints listed")
+    return endpoints
+
+
+class Router:
+    """Choose endpoints by recent latency and health."""
+
+    def __init__(
+        self,
+        endpoints: list[Endpoint],
+        window: int = 20,
+        cooldown: float = 1.0,
+        max_cooldown: float = 60.0,
+    ) -> None:
+        """Initialize the router with endpoints in order of preference."""
+        self.endpoints = endpoints
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.health = {
+            endpoint.name: EndpointHealth(deque(maxlen=window), deque(maxlen=window))
+            for endpoint in endpoints
+        }
+        self._lock = threading.Lock()
+
+    def healthy(self, endpoint: Endpoint) -> bool:
+        """Return whether an endpoint is not cooling down after failures."""
+        return time.monotonic() >= self.health[endpoint.name].retry_at
+
+    def order(self) -> list[Endpoint]:
+        """Return endpoints to try, fastest healthy ones first.
+
+        Untried endpoints sort first so they get measured, and endpoints that
+        failed most recent requests sort after the others. Endpoints cooling
+        down come last, soonest to recover first, so a request is still
+        attempted when every endpoint is degraded.
+        """
+        with self._lock:
+            healthy = [e for e in self.endpoints if self.healthy(e)]
+            unhealthy = [e for e in self.endpoints if not self.healthy(e)]
+            healthy.sort(
+                key=lambda e: (
+                    self.health[e.name].error_rate >= 0.5,
+                    self.health[e.name].ttft,
+                )
+            )
+            unhealthy.sort(key=lambda e: self.health[e.name].retry_at)
+        return healthy + unhealthy
+
+    def choose(self) -> Endpoint:
+        """Return the endpoint for the next request."""
+        return self.order()[0]
+
+    def resolve(self, name: str) -> Endpoint:
+        """Return the endpoint for an endpoint or model name.
+
+        Configured endpoints are matched by name, then by model. Any other
+        name is taken as a model served by the preferred endpoint.
+        """
+        for endpoint in self.endpoints:
+            if endpoint.name == name:
+                return endpoint
+        for endpoint in self.endpoints:
+            if endpoint.model == name:
+                return endpoint
+        preferred = self.choose()
+        return Endpoint(name, preferred.base_url, name, preferred.api_key)
+
+    def record_success(self, endpoint: Endpoint, ttft: float) -> None:
+        """Record a request that produced a response."""
+        with self._lock:
+            health = self.health[endpoint.name]
+            health.requests += 1
+            health.ttfts.append(ttft)
+            health.outcomes.append(True)
+            health.consecutive_failures = 0
+            health.retry_at = 0.0
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        """Record a failed request and put the endpoint on cooldown."""
+        with self._lock:
+            health = self.health[endpoint.name]
+            health.requests += 1
+            health.errors += 1
+            health.outcomes.append(False)
+            health.consecutive_failures += 1
+            delay = self.cooldown * 2 ** (health.consecutive_failures - 1)
+            health.retry_at = time.monotonic() + min(delay, self.max_cooldown)
+
+    def stats(self) -> dict[str, dict[str, int | float | str]]:
+        """Return per-endpoint statistics grouped by section."""
+        stats: dict[str, dict[str, int | float | str]] = {}
+        for endpoint in self.endpoints:
+            health = self.health[endpoint.name]
+            stats[f"Endpoint {endpoint.name}"] = {
+                "model": endpoint.model,
+                "requests": health.requests,
+                "errors": health.errors,
+                "recent error rate (%)": health.error_rate * 100,
+                "recent TTFT p50 (s)": health.ttft,
+                "status": "healthy" if self.healthy(endpoint) else "cooling down",
+            }
+        return stats
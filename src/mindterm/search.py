@@ -0,0 +1,110 @@
+"""Full-text search over stored conversations."""
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+from mindterm.sessions import SessionStore
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS turns USING fts5(
+    content,
+    session UNINDEXED,
+    role UNINDEXED,
+    time UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+# Markers around matched terms in snippets
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+
+@dataclass
+class SearchResult:
+    """A stored turn matching a search query."""
+
+    session: int
+    role: str
+    time: float
+    snippet: str
+    score: float
+
+
+def fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching all of its terms.
+
+    Each term is quoted, so characters with a special meaning in the FTS5
+    query syntax are searched for literally.
+    """
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    return " AND ".join(terms)
+
+
+class SearchIndex:
+    """SQLite FTS5 index over the turns of a session store.
+
+    The index remembers how many stored turns it has seen and only indexes
+    newer ones when synced, so it is never rebuilt.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open (or create) the search index."""
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @property
+    def position(self) -> int:
+        """Return the number of stored turns indexed so far."""
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'position'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def sync(self, store: SessionStore) -> int:
+        """Index turns added to the store since the last sync; return the count."""
+        with self._lock:
+            start = self.position
+            rows = [
+                (turn.content, session, turn.role, turn.time)
+                for session, turn in store.iter_turns(start)
+            ]
+            if not rows:
+                return 0
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO turns (content, session, role, time) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('position', ?)",
+                    (start + len(rows),),
+                )
+            return len(rows)
+
+    def search(self, query: str, limit: int = 10) -> list[SearchResult]:
+        """Return the best matching turns, ranked by BM25."""
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT session, role, time, "
+                f"snippet(turns, 0, '{MATCH_START}', '{MATCH_END}', '…', 16), rank "
+                "FROM turns WHERE turns MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [
+            SearchResult(int(session), role, float(time), snippet, -float(rank))
+            for session, role, time, snippet, rank in rows
+        ]
+
+    def close(self) -> None:
+        """Close the index database."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,175 @@
+"""Persistent session transcripts for Mind Terminal.
+
+Turns are appended to a JSONL log and located through a fixed-size binary
+offset index, so a session can be listed or resumed without reading the whole
+history. Both files are read through memory maps.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+# Index record: session id, log offset, record length
+_INDEX_RECORD = struct.Struct("<IQI")
+
+
+@dataclass
+class SessionInfo:
+    """Summary of a stored session."""
+
+    id: int
+    started: float
+    title: str
+    turns: int
+
+
+@dataclass
+class StoredTurn:
+    """A single stored message."""
+
+    role: str
+    content: str
+    time: float
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[bytes | mmap.mmap]:
+    """Map a file read-only, yielding empty bytes for missing or empty files."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        yield b""
+        return
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+@contextmanager
+def file_lock(directory: str) -> Iterator[None]:
+    """Serialize writers to a directory across processes on the same host."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class SessionStore:
+    """Append-only on-disk store of conversation sessions."""
+
+    def __init__(self, directory: str) -> None:
+        """Open (or create) a session store in a directory."""
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.log_path = os.path.join(directory, "turns.log")
+        self.index_path = os.path.join(directory, "turns.idx")
+        self.sessions_path = os.path.join(directory, "sessions.jsonl")
+
+    def create_session(self, title: str) -> int:
+        """Register a new session and return its id."""
+        with self._locked():
+            session_id = len(self._read_sessions()) + 1
+            record = {"id": session_id, "started": time.time(), "title": title[:200]}
+            with open(self.sessions_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return session_id
+
+    def append(self, session_id: int, role: str, content: str) -> None:
+        """Append a turn to a session."""
+        record = {
+            "session": session_id,
+            "role": role,
+            "content": content,
+            "time": time.time(),
+        }
+        data = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        with self._locked():
+            with open(self.log_path, "ab") as log:
+                offset = log.seek(0, os.SEEK_END)
+                log.write(data)
+            with open(self.index_path, "ab") as index:
+                index.write(_INDEX_RECORD.pack(session_id, offset, len(data)))
+
+    def list_sessions(self) -> list[SessionInfo]:
+        """Return all stored sessions, oldest first."""
+        counts: dict[int, int] = {}
+        with _mapped(self.index_path) as index:
+            for session_id, _offset, _length in _INDEX_RECORD.iter_unpack(
+                index[: len(index) - len(index) % _INDEX_RECORD.size]
+            ):
+                counts[session_id] = counts.get(session_id, 0) + 1
+        return [
+            SessionInfo(
+                record["id"],
+                record["started"],
+                record["title"],
+                counts.get(record["id"], 0),
+            )
+            for record in self._read_sessions()
+        ]
+
+    def load(self, session_id: int) -> list[StoredTurn]:
+        """Load the turns of a session.
+
+        Raises:
+            KeyError: If no session with this id exists.
+        """
+        if not 0 < session_id <= len(self._read_sessions()):
+            raise KeyError(session_id)
+        with _mapped(self.index_path) as index, _mapped(self.log_path) as log:
+            # Parse all records in one pass as a single JSON array
+            records = [
+                log[offset : offset + length - 1]
+                for sid, offset, length in _INDEX_RECORD.iter_unpack(
+                    index[: len(index) - len(index) % _INDEX_RECORD.size]
+                )
+                if sid == session_id
+            ]
+        return [
+            StoredTurn(record["role"], record["content"], record["time"])
+            for record in json.loads(b"[" + b",".join(records) + b"]")
+        ]
+
+    def iter_turns(self, start: int = 0) -> Iterator[tuple[int, StoredTurn]]:
+        """Yield ``(session_id, turn)`` for all turns from position ``start`` on.
+
+        Positions count turns across all sessions in the order they were
+        written, so callers can resume reading where they left off.
+        """
+        with _mapped(self.index_path) as index, _mapped(self.log_path) as log:
+            end = len(index) - len(index) % _INDEX_RECORD.size
+            for sid, offset, length in _INDEX_RECORD.iter_unpack(
+                index[start * _INDEX_RECORD.size : end]
+            ):
+                record = json.loads(log[offset : offset + length])
+                yield sid, StoredTurn(record["role"], record["content"], record["time"])
+
+    def _read_sessions(self) -> list[dict[str, Any]]:
+        """Read the session metadata records."""
+        try:
+            with open(self.sessions_path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _locked(self) -> AbstractContextManager[None]:
+        """Serialize writers across processes on the same host."""
+        return file_lock(self.directory)
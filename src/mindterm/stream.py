@@ -0,0 +1,173 @@
+"""Chunk handling for streamed chat completions.
+
+The OpenAI SDK yields one chunk per server-sent event, usually a token or two
+of text. ``iter_text`` reads the text of each chunk once and skips frames
+without any (role-only frames, and usage-only frames whose ``choices`` is
+empty), recording the finish reason and token usage on a ``StreamInfo`` as
+they pass. ``coalesce`` then merges the pieces into batches, so the client and
+the renderer handle a few strings per refresh instead of one per token.
+"""
+import math
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+# Defaults of coalesce(): seconds between batches and characters per batch
+BATCH_INTERVAL = 0.05
+BATCH_CHARS = 1024
+
+
+@dataclass
+class StreamInfo:
+    """Metadata of a completion stream, kept out of band of its text."""
+
+    finish_reason: str | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    # Chunks received, chunks with text, and batches of text yielded
+    frames: int = 0
+    pieces: int = 0
+    batches: int = 0
+
+    @property
+    def total_tokens(self) -> int | None:
+        """Return the tokens the provider billed, if it reported usage."""
+        if self.prompt_tokens is None or self.completion_tokens is None:
+            return None
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def truncated(self) -> bool:
+        """Return whether the answer stopped at the output token limit."""
+        return self.finish_reason == "length"
+
+
+def chunk_text(chunk: Any) -> str | None:
+    """Return the text of a chat completion chunk, if it has any."""
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return None
+    delta = choices[0].delta
+    return delta.content if delta is not None else None
+
+
+def iter_text(
+    chunks: Iterable[Any],
+    info: StreamInfo,
+    on_text: Callable[[str], None] | None = None,
+) -> Iterator[str]:
+    """Yield the text of each chunk, recording the stream's metadata.
+
+    ``on_text`` is called with every piece as it arrives, before any batching.
+    """
+    for chunk in chunks:
+        info.frames += 1
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            info.prompt_tokens = usage.prompt_tokens
+            info.completion_tokens = usage.completion_tokens
+        choices = getattr(chunk, "choices", None)
+        if not choices:
+            continue
+        choice = choices[0]
+        if choice.finish_reason is not None:
+            info.finish_reason = choice.finish_reason
+        text = choice.delta.content if choice.delta is not None else None
+        if text:
+            info.pieces += 1
+            if on_text is not None:
+                on_text(text)
+            yield text
+
+
+def coalesce(
+    pieces: Iterable[str],
+    info: StreamInfo | None = None,
+    interval: float = BATCH_INTERVAL,
+    max_chars: int = BATCH_CHARS,
+) -> Iterator[str]:
+    """Merge streamed text into batches.
+
+    The first piece is yielded at once, so the time to first token is not
+    affected. Later pieces are held until ``interval`` seconds have passed
+    since the last batch or ``max_chars`` characters are waiting; the rest is
+    yielded when the stream ends. The stream is read on a thread, so held
+    text is yielded when the interval ends even if the stream stalls. With an
+    interval of 0 every piece is yielded as it arrives.
+    """
+    if interval <= 0:
+        for piece in pieces:
+            if info is not None:
+                info.batches += 1
+            yield piece
+        return
+    received: queue.Queue[str | Exception | None] = queue.Queue()
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read,
+        args=(pieces, received, stop),
+        name="mindterm-stream",
+        daemon=True,
+    )
+    reader.start()
+    buffer: list[str] = []
+    size = 0
+    deadline = -math.inf
+    try:
+        while True:
+            if buffer:
+                try:
+                    timeout = max(deadline - time.perf_counter(), 0.0)
+                    item = received.get(timeout=timeout)
+                except queue.Empty:
+                    # The stream stalled; show what arrived before it did
+                    yield _batch(buffer, info)
+                    size = 0
+                    deadline = time.perf_counter() + interval
+                    continue
+            else:
+                item = received.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            buffer.append(item)
+            size += len(item)
+            now = time.perf_counter()
+            if now >= deadline or size >= max_chars:
+                yield _batch(buffer, info)
+                size = 0
+                deadline = now + interval
+        if buffer:
+            yield _batch(buffer, info)
+    finally:
+        stop.set()
+
+
+def _read(
+    pieces: Iterable[str],
+    received: queue.Queue[str | Exception | None],
+    stop: threading.Event,
+) -> None:
+    """Pass a stream's pieces, then None or its error, to a queue."""
+    try:
+        for piece in pieces:
+            received.put(piece)
+            if stop.is_set():
+                return
+    except Exception as e:
+        received.put(e)
+    else:
+        received.put(None)
+
+
+def _batch(buffer: list[str], info: StreamInfo | None) -> str:
+    """Join and clear the held pieces, counting the batch."""
+    text = "".join(buffer)
+    buffer.clear()
+    if info is not None:
+        info.batches += 1
+    return text
@@ -0,0 +1,259 @@
+"""Rolling summaries of long conversations for Mind Terminal.
+
+Every prompt is sent with the conversation so far, so a long session gets
+slower and more expensive with each turn. Once the turns outgrow a token
+threshold, a background thread folds the older ones (and the previous
+summary) into a new summary while the user reads the answer or types the
+next prompt. The next request sends the summary in place of those turns if it
+is ready, and the full history otherwise; it never waits for it.
+
+Summaries are cached in SQLite by a hash of the previous summary and the
+turns they cover, so a range of turns is only ever summarized once, even
+across restarts and resumed sessions.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from mindterm.conversation import Conversation, Turn
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionMessageParam
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+"""
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You compress conversations between a user and an assistant into notes "
+    "the assistant can rely on to continue them."
+)
+
+SUMMARY_PROMPT = (
+    "Update the summary of our conversation with the turns below. Keep the "
+    "user's goals and preferences, decisions, names, numbers, code identifiers "
+    "and open questions; drop pleasantries and repetition. Reply with the "
+    "summary only.\n\n"
+    "Summary so far:\n{summary}\n\nNew turns:\n{transcript}"
+)
+
+
+def range_key(summary: str | None, turns: Sequence[Turn]) -> str:
+    """Return the cache key of a summary of turns following an earlier summary."""
+    digest = hashlib.sha256((summary or "").encode("utf-8"))
+    for turn in turns:
+        digest.update(f"\0{turn.role}\0".encode())
+        digest.update(turn.content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def summary_messages(
+    summary: str | None, turns: Sequence[Turn]
+) -> list[ChatCompletionMessageParam]:
+    """Build the request that folds turns into the previous summary."""
+    transcript = "\n\n".join(
+        f"{turn.role.capitalize()}: {turn.content}" for turn in turns
+    )
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": SUMMARY_PROMPT.format(
+                summary=summary or "(none)", transcript=transcript
+            ),
+        },
+    ]
+
+
+class SummaryCache:
+    """SQLite store of summaries keyed by ``range_key``."""
+
+    def __init__(self, path: str) -> None:
+        """Open (or create) the cache database."""
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        """Return the summary stored under a key."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else str(row[0])
+
+    def put(self, key: str, text: str) -> None:
+        """Store a summary."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?)", (key, text)
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._db.close()
+
+
+@dataclass
+class SummaryJob:
+    """A summary of the oldest turns of a conversation, possibly in progress."""
+
+    # The summary the turns follow, and the turns it replaces
+    previous: str | None
+    turns: tuple[Turn, ...]
+    key: str
+    text: str | None = None
+    cached: bool = False
+
+
+class Summarizer:
+    """Compress the older turns of a conversation in the background."""
+
+    def __init__(
+        self,
+        cache: SummaryCache,
+        complete: Callable[[list[ChatCompletionMessageParam]], str],
+        threshold: int,
+        keep: int,
+    ) -> None:
+        """Initialize the summarizer.
+
+        Once the turns of a conversation exceed ``threshold`` tokens, all but
+        the last ``keep`` of them are summarized with ``complete``, which
+        sends a request and returns the answer.
+        """
+        self.cache = cache
+        self.complete = complete
+        self.threshold = threshold
+        self.keep = keep
+        self.requests = 0
+        self.cached = 0
+        self.failed = 0
+        self.applied = 0
+        self.turns_summarized = 0
+        self.tokens_saved = 0
+        self._job: SummaryJob | None = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def schedule(self, conversation: Conversation) -> SummaryJob | None:
+        """Start summarizing the older turns if the conversation has grown.
+
+        Returns at once: a cached summary is ready immediately and any other
+        is requested on a background thread. Returns the job, if any.
+        """
+        turns = tuple(conversation.turns)
+        if sum(turn.tokens for turn in turns) <= self.threshold:
+            return None
+        count = len(turns) - self.keep
+        # Keep the history starting with a user message
+        while count > 0 and turns[count - 1].role != "assistant":
+            count -= 1
+        if count <= 0:
+            return None
+        job = SummaryJob(
+            conversation.summary,
+            turns[:count],
+            range_key(conversation.summary, turns[:count]),
+        )
+        with self._lock:
+            if self._running or self._ready(conversation):
+                return None
+            self._job = job
+            job.text = self.cache.get(job.key)
+            if job.text is not None:
+                job.cached = True
+                self.cached += 1
+                return job
+            self._running = True
+        threading.Thread(
+            target=self._run, args=(job,), name="mindterm-summarize", daemon=True
+        ).start()
+        return job
+
+    def apply(self, conversation: Conversation) -> bool:
+        """Replace the summarized turns with the summary if it is ready.
+
+        Never waits: a summary still being written is used by a later
+        request. A summary of turns the conversation no longer starts with
+        is dropped.
+        """
+        with self._lock:
+            job = self._job
+            if job is None or job.text is None:
+                return False
+            self._job = None
+        if not _covers(job, conversation):
+            return False
+        before = conversation.total_tokens
+        conversation.compact(len(job.turns), job.text)
+        with self._lock:
+            self.applied += 1
+            self.turns_summarized += len(job.turns)
+            self.tokens_saved += max(before - conversation.total_tokens, 0)
+        return True
+
+    def discard(self) -> None:
+        """Drop the pending summary, e.g. when a new conversation starts."""
+        with self._lock:
+            self._job = None
+
+    def stats(self) -> dict[str, int | float | str]:
+        """Return summarization statistics for display."""
+        with self._lock:
+            return {
+                "threshold (tokens)": self.threshold,
+                "summary requests": self.requests,
+                "cached": self.cached,
+                "failed": self.failed,
+                "applied": self.applied,
+                "turns summarized": self.turns_summarized,
+                "tokens saved": self.tokens_saved,
+                "pending": "yes" if self._running else "no",
+            }
+
+    def _ready(self, conversation: Conversation) -> bool:
+        """Return whether a finished summary still applies to a conversation."""
+        job = self._job
+        return job is not None and job.text is not None and _covers(job, conversation)
+
+    def _run(self, job: SummaryJob) -> None:
+        """Request a summary and store it for the next request."""
+        try:
+            text = self.complete(summary_messages(job.previous, job.turns)).strip()
+        except Exception:
+            text = ""
+        with self._lock:
+            self._running = False
+            self.requests += 1
+            if not text:
+                self.failed += 1
+                if self._job is job:
+                    self._job = None
+                return
+            job.text = text
+        self.cache.put(job.key, text)
+
+
+def _covers(job: SummaryJob, conversation: Conversation) -> bool:
+    """Return whether a conversation still starts with the turns of a job."""
+    turns = conversation.turns
+    return (
+        conversation.summary == job.previous
+        and len(turns) >= len(job.turns)
+        # Only the job's turns are compared; later turns may follow them
+        and all(a is b for a, b in zip(job.turns, turns, strict=False))
+    )
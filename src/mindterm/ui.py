@@ -1,34 +1,94 @@
-"""UI components for Mind Terminal."""
+"""UI components for Mind Terminal.
+
+Rich's Markdown, Live and Table renderers are imported when first used, so
+they stay off the startup path before the first prompt is shown.
+"""
+import time
 from collections.abc import Generator
+from typing import IO, cast
 
 from prompt_toolkit import PromptSession
 from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.document import Document
 from prompt_toolkit.formatted_text import HTML
+from prompt_toolkit.patch_stdout import patch_stdout
 from prompt_toolkit.styles import Style
-from rich.console import Console
-from rich.live import Live
-from rich.markdown import Markdown
+from rich.console import Console, RenderableType
 from rich.rule import Rule
+from rich.text import Text
+
+from mindterm.attach import Attachment
+from mindterm.codeblocks import CodeBlock, extract_code_blocks
+from mindterm.compare import Comparison, ModelAnswer
+from mindterm.pacing import FrameScheduler, TerminalOutput
+from mindterm.recall import RecallMatch
+from mindterm.search import MATCH_END, MATCH_START, SearchResult
+from mindterm.sessions import SessionInfo
+
+# Built-in commands and their descriptions for \help
+COMMAND_HELP = [
+    ("\\chat", "Start a new conversation"),
+    ("\\bye", "Exit the application"),
+    ("\\help", "Show this help message"),
+    ("\\stats", "Show runtime statistics"),
+    ("\\sessions", "List saved sessions"),
+    ("\\resume <id>", "Continue a saved session"),
+    ("\\search <query>", "Search past conversations"),
+    ("\\attach <path|glob>", "Send files with the next prompt"),
+    ("\\fresh", "Ask the model instead of using a recalled answer"),
+    ("\\compare <m1,m2> <prompt>", "Stream a prompt from several models at once"),
+    ("\\code [n] [path]", "Copy or save a code block of the last answer"),
+    ("\\profile [name]", "List configuration profiles or switch to one"),
+]
+
+# Narrowest panel of \compare shown side by side
+COMPARE_MIN_WIDTH = 40
+
+# Status line shown while follow-up suggestions are available
+SUGGESTIONS_STATUS = "Tab: suggested follow-ups"
+
+
+def highlight_snippet(snippet: str) -> Text:
+    """Convert a search snippet with match markers into styled text."""
+    text = Text()
+    for i, part in enumerate(snippet.split(MATCH_START)):
+        matched, _, rest = part.partition(MATCH_END) if i else ("", "", part)
+        text.append(matched, style="bold #70C0BA")
+        text.append(rest)
+    return text
 
 
 class CommandCompleter(Completer):
-    """Custom completer that only works at the beginning of the line."""
+    """Custom completer that only works at the beginning of the line.
+
+    Completes commands, and suggested follow-up questions to the last answer
+    when there are any.
+    """
 
     def __init__(self) -> None:
-        self.commands = ["\\chat", "\\bye", "\\help"]
+        self.commands = [command.split()[0] for command, _ in COMMAND_HELP]
+        self.suggestions: list[str] = []
 
     def get_completions(
         self, document: Document, complete_event: object
     ) -> Generator[Completion, None, None]:
         """Generate completions only at the beginning of the line."""
         # Only provide completions at the beginning of the line
-        if document.text.startswith("\\") and document.cursor_position == len(
-            document.text
-        ):
+        if document.cursor_position != len(document.text):
+            return
+        if document.text.startswith("\\"):
             for command in self.commands:
                 if command.startswith(document.text):
                     yield Completion(command, start_position=-len(document.text))
+            return
+        typed = document.text.lower()
+        for suggestion in self.suggestions:
+            if suggestion.lower().startswith(typed):
+                yield Completion(
+                    suggestion,
+                    start_position=-len(document.text),
+                    display_meta="prefetched",
+                )
 
 
 class TerminalUI:
@@ -44,13 +104,27 @@ class TerminalUI:
                 "prompt": "#5D87BF bold",  # Professional blue for prompt
                 "command": "#70C0BA",  # Teal for commands
                 "separator": "#6C757D",  # Gray for separators
+                "bottom-toolbar": "noreverse #6C757D",
             }
         )
 
         self.session: PromptSession[str] = PromptSession(
             completer=self.completer, style=style
         )
-        self.console = Console()
+        # Counts what is written to the terminal, for \stats
+        self.output = TerminalOutput()
+        self.console = Console(file=cast(IO[str], self.output))
+        # Redraw the unfinished tail of a streamed answer in place; turned off
+        # when answers stream while the prompt accepts the next one
+        self.live = True
+        # Redraws per second of the live region, at most
+        self.refresh_per_second: float = 15
+        # Paces redraws of every streamed answer, so a slow terminal is
+        # remembered from one answer to the next
+        self.frames = FrameScheduler(self.refresh_per_second)
+        self.status: str | None = None
+        # Code blocks of the last answer shown, for \code
+        self.code_blocks: list[CodeBlock] = []
 
     def display_welcome(self) -> None:
         """Display welcome message."""
@@ -66,12 +140,15 @@ class TerminalUI:
 
     def display_response(self, response: str | None) -> None:
         """Display the LLM response."""
+        from rich.markdown import Markdown
+
         if response:
             # Professional response display
             self.console.print()
             self.console.print("Assistant:", style="bold #70C0BA")
             self.console.print(Markdown(response))
             self.console.print()
+            self.code_blocks = extract_code_blocks(response)
         else:
             self.console.print()
             self.console.print("No response received.", style="red")
@@ -81,41 +158,261 @@ class TerminalUI:
         self, content_generator: Generator[str, None, None]
     ) -> None:
         """Display streamed response from the LLM."""
-        # Initialize with a waiting message
-        markdown_text = ""
+        from mindterm.render import StreamingMarkdownRenderer
 
         self.console.print()
         self.console.print("Assistant:", style="bold #70C0BA")
 
-        with Live("", refresh_per_second=15, console=self.console) as live:
+        with StreamingMarkdownRenderer(
+            self.console,
+            refresh_per_second=self.refresh_per_second,
+            live=self.live,
+            scheduler=self.frames,
+        ) as renderer:
+            # Filled in by the renderer as the answer's code blocks close
+            self.code_blocks = renderer.code_blocks
             try:
                 for chunk in content_generator:
                     if chunk is not None:
-                        markdown_text += chunk
-                        # Update live display with rendered markdown
-                        live.update(Markdown(markdown_text))
+                        renderer.feed(chunk)
                     else:
-                        markdown_text += "\nError occurred during streaming."
-                        live.update(Markdown(markdown_text))
+                        renderer.feed("\nError occurred during streaming.")
                         return
             except Exception as e:
-                markdown_text += f"\nError displaying streamed response: {e}"
-                live.update(Markdown(markdown_text))
+                renderer.feed(f"\nError displaying streamed response: {e}")
 
         # Add a newline after the response
         self.console.print()
 
+    def display_comparison(self, comparison: Comparison) -> None:
+        """Display the answers of several models as they stream.
+
+        With a live region the answers update in place, in panels side by side
+        when the terminal is wide enough. Otherwise their progress is shown
+        in the status line and each answer is printed once it is complete.
+        """
+        self.console.print()
+        if self.live:
+            from rich.live import Live
+
+            with Live(
+                console=self.console, refresh_per_second=10, transient=True
+            ) as live:
+                while not comparison.wait(0.1):
+                    live.update(self._comparison_view(comparison, streaming=True))
+            self.console.print(self._comparison_view(comparison, streaming=False))
+        else:
+            printed: set[int] = set()
+            finished = False
+            while not finished:
+                finished = comparison.wait(0.1)
+                self.set_status(comparison.progress())
+                for i, answer in enumerate(comparison.answers):
+                    if answer.done and i not in printed:
+                        printed.add(i)
+                        self.console.print(
+                            self._answer_panel(answer, comparison.elapsed)
+                        )
+            self.set_status(None)
+        total = sum(answer.elapsed or 0.0 for answer in comparison.answers)
+        self.console.print(
+            f"{len(comparison.answers)} models in {comparison.elapsed:.2f}s"
+            f" (one after another: {total:.2f}s)",
+            style="dim",
+        )
+        self.console.print()
+
+    def _comparison_view(
+        self, comparison: Comparison, streaming: bool
+    ) -> RenderableType:
+        """Lay out the answer panels side by side, or stacked if too narrow."""
+        from rich.console import Group
+        from rich.table import Table
+
+        count = len(comparison.answers)
+        side_by_side = self.console.width // count >= COMPARE_MIN_WIDTH
+        tail = None
+        if streaming:
+            rows = 1 if side_by_side else count
+            tail = max(self.console.height // rows - 3, 3)
+        now = comparison.elapsed
+        panels = [self._answer_panel(a, now, tail) for a in comparison.answers]
+        if not side_by_side:
+            return Group(*panels)
+        grid = Table.grid(expand=True, padding=(0, 1))
+        for _ in panels:
+            grid.add_column(ratio=1)
+        grid.add_row(*panels)
+        return grid
+
+    def _answer_panel(
+        self, answer: ModelAnswer, now: float, tail: int | None = None
+    ) -> RenderableType:
+        """Render one model's answer with its speed, or its last lines only."""
+        from rich.markdown import Markdown
+        from rich.panel import Panel
+
+        body: RenderableType
+        if answer.error is not None and not answer.chunks:
+            body = Text(answer.error, style="red")
+        elif tail is not None:
+            body = Text("\n".join(answer.text.splitlines()[-tail:]))
+        else:
+            body = Markdown(answer.text)
+        return Panel(
+            body,
+            title=Text(answer.label, style="bold #70C0BA"),
+            title_align="left",
+            subtitle=Text(answer.summary(now), style="#6C757D"),
+            subtitle_align="right",
+            border_style="red" if answer.error else "#6C757D",
+        )
+
+    def display_stats(self, stats: dict[str, dict[str, int | float | str]]) -> None:
+        """Display runtime statistics grouped by section, and the UI's own."""
+        from rich.table import Table
+
+        self.console.print()
+        if not stats:
+            self.console.print("No statistics available.", style="dim")
+            self.console.print()
+            return
+        stats = {**stats, "Rendering": self.render_stats()}
+        for section, values in stats.items():
+            table = Table(title=section, title_style="bold #70C0BA", show_header=False)
+            table.add_column(style="dim")
+            table.add_column(justify="right")
+            for name, value in values.items():
+                table.add_row(
+                    name, f"{value:.3f}" if isinstance(value, float) else str(value)
+                )
+            self.console.print(table)
+        self.console.print()
+
+    def render_stats(self) -> dict[str, int | float | str]:
+        """Return terminal output statistics, and redraw ones with a live region."""
+        stats: dict[str, int | float | str] = {
+            "bytes written": self.output.bytes_written,
+            "writes": self.output.writes,
+            "write time (s)": self.output.write_time,
+        }
+        if self.live:
+            # Without a live region nothing is redrawn, so there is nothing to pace
+            stats.update(self.frames.stats())
+        return stats
+
+    def display_recalled(self, match: RecallMatch) -> None:
+        """Display an earlier answer recalled for a similar prompt."""
+        from rich.markdown import Markdown
+
+        answered = time.strftime("%Y-%m-%d %H:%M", time.localtime(match.time))
+        self.console.print()
+        self.console.print("Assistant:", style="bold #70C0BA")
+        self.console.print(Markdown(match.answer))
+        self.code_blocks = extract_code_blocks(match.answer)
+        self.console.print()
+        self.console.print(
+            f"Recalled answer to: {' '.join(match.prompt.split())}",
+            style="dim",
+            markup=False,
+            overflow="ellipsis",
+            no_wrap=True,
+        )
+        self.console.print(
+            f"Answered {answered} ({match.similarity:.0%} similar prompt)"
+            " · \\fresh asks the model instead",
+            style="dim",
+            markup=False,
+        )
+        self.console.print()
+
+    def display_sessions(self, sessions: list[SessionInfo]) -> None:
+        """Display the list of saved sessions."""
+        from rich.table import Table
+
+        self.console.print()
+        if not sessions:
+            self.console.print("No saved sessions.", style="dim")
+            self.console.print()
+            return
+        table = Table(title="Sessions", title_style="bold #70C0BA")
+        table.add_column("ID", justify="right", style="#70C0BA")
+        table.add_column("Started", style="dim")
+        table.add_column("Turns", justify="right")
+        table.add_column("Title", overflow="ellipsis", no_wrap=True)
+        for session in sessions:
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(session.started))
+            table.add_row(str(session.id), started, str(session.turns), session.title)
+        self.console.print(table)
+        self.console.print()
+
+    def display_search_results(self, query: str, results: list[SearchResult]) -> None:
+        """Display ranked search results."""
+        self.console.print()
+        if not results:
+            self.console.print(f"No results for '{query}'.", style="dim", markup=False)
+            self.console.print()
+            return
+        self.console.print(
+            f"Results for '{query}':", style="bold #70C0BA", markup=False
+        )
+        for result in results:
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(result.time))
+            header = Text(f"session {result.session} · {result.role} · {started}")
+            header.stylize("#6C757D")
+            self.console.print()
+            self.console.print(header)
+            self.console.print(highlight_snippet(result.snippet))
+        self.console.print()
+
+    def display_notice(self, message: str, style: str = "dim") -> None:
+        """Display a short status or error message."""
+        self.console.print()
+        self.console.print(message, style=style)
+        self.console.print()
+
+    def set_status(self, status: str | None) -> None:
+        """Show a status line below the prompt, or clear it with None."""
+        self.status = status
+        self.session.bottom_toolbar = status
+        self.session.app.invalidate()
+
+    def set_suggestions(self, suggestions: list[str]) -> None:
+        """Offer follow-up questions as completions at the prompt."""
+        self.completer.suggestions = suggestions
+        if suggestions:
+            self.set_status(SUGGESTIONS_STATUS)
+        elif self.status == SUGGESTIONS_STATUS:
+            self.set_status(None)
+
     def get_user_input(self) -> str:
-        """Get input from the user."""
+        """Get input from the user.
+
+        Output printed by other threads while the prompt is shown appears
+        above it. Ctrl+C raises KeyboardInterrupt so the caller can cancel
+        the answer being streamed.
+        """
         # Professional prompt with clear visual separation
-        try:
+        with patch_stdout(raw=True):
             text = self.session.prompt(
                 HTML("<prompt>MindTerm</prompt><separator>:</separator> "),
                 completer=self.completer,
             )
-            return str(text)
-        except KeyboardInterrupt:
-            return ""  # Return empty string on Ctrl+C
+        return str(text)
+
+    def display_attachments(self, attachments: list[Attachment]) -> None:
+        """Display the files attached to the next prompt."""
+        self.console.print()
+        for attachment in attachments:
+            details = f"{attachment.tokens:,} tokens"
+            if attachment.summarized:
+                details += f", summarized from {attachment.chunks} chunks"
+            if attachment.cached:
+                details += ", cached"
+            self.console.print(
+                f"Attached {attachment.path} ({details})", style="dim", markup=False
+            )
+        self.console.print()
 
     def display_goodbye(self) -> None:
         """Display goodbye message."""
@@ -124,14 +421,21 @@ class TerminalUI:
         self.console.print("Thank you for using Mind Terminal!", style="dim")
         self.console.print()
 
+    def display_new_conversation(self) -> None:
+        """Display a notice that a new conversation has started."""
+        self.console.print()
+        self.console.print(Rule("New Conversation", style="#6C757D", characters="─"))
+        self.console.print()
+
     def display_help(self) -> None:
         """Display help message."""
         self.console.print()
         self.console.print("Available Commands:", style="bold #70C0BA")
         self.console.print()
-        self.console.print("  \\chat  - Start a new conversation")
-        self.console.print("  \\bye   - Exit the application")
-        self.console.print("  \\help  - Show this help message")
+        width = max(len(command) for command, _ in COMMAND_HELP)
+        for command, description in COMMAND_HELP:
+            # Usages like [n] are arguments, not markup
+            self.console.print(f"  {command:<{width}} - {description}", markup=False)
         self.console.print()
         self.console.print(
             "Tip: You can start typing your query directly without any command",
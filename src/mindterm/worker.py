@@ -0,0 +1,126 @@
+"""Background response worker for Mind Terminal.
+
+Prompts are answered on a worker thread, one at a time and in order, so the
+main thread can keep reading input while an answer streams.
+"""
+import queue
+import threading
+from collections.abc import Callable
+
+from mindterm.client import LLMClient
+from mindterm.ui import TerminalUI
+
+
+class ResponseWorker:
+    """Run prompts and conversation commands in submission order."""
+
+    def __init__(self, client: LLMClient, ui: TerminalUI) -> None:
+        """Initialize the worker; its thread starts on the first submission."""
+        self.client = client
+        self.ui = ui
+        self._queue: queue.Queue[Callable[[], None] | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._active = threading.Event()
+
+    @property
+    def busy(self) -> bool:
+        """Return whether an answer is streaming or prompts are queued."""
+        return self._active.is_set() or not self._queue.empty()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of queued items that have not started yet."""
+        return self._queue.qsize()
+
+    def submit_prompt(self, text: str) -> None:
+        """Queue a prompt to be answered after the ones before it."""
+        self.submit(lambda: self._answer(text))
+
+    def submit_fresh(self) -> None:
+        """Queue asking the model again in place of the last recalled answer."""
+        self.submit(self._fresh)
+
+    def submit(self, task: Callable[[], None]) -> None:
+        """Queue a task, such as a command that changes the conversation."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="mindterm-worker", daemon=True
+            )
+            self._thread.start()
+        self._queue.put(task)
+
+    def cancel(self) -> None:
+        """Cancel the answer currently streaming; queued prompts still run."""
+        if self._active.is_set():
+            self.client.cancel()
+
+    def cancel_all(self) -> None:
+        """Drop queued prompts and cancel the answer currently streaming."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        self.cancel()
+
+    def close(self) -> None:
+        """Wait for queued work to finish and stop the worker thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        """Process queued tasks until the stop marker is received."""
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                self._active.set()
+                task()
+            finally:
+                self._active.clear()
+                self._queue.task_done()
+
+    def _answer(self, text: str, recall: bool = True) -> None:
+        """Answer a prompt, then prefetch likely follow-ups.
+
+        An earlier answer to a near-duplicate prompt is shown at once if there
+        is one; otherwise the answer is streamed from the model.
+        """
+        self.ui.set_suggestions([])
+        match = self.client.recall(text) if recall else None
+        if match is not None:
+            self.client.accept_recalled(text, match)
+            self.ui.display_recalled(match)
+        else:
+            self.ui.set_status("Streaming answer · Ctrl+C to cancel")
+            try:
+                self.ui.display_streamed_response(self.client.get_completion(text))
+                stream = self.client.last_stream
+                if self.client.cancelled:
+                    self.ui.display_notice("Response cancelled.")
+                elif self.client.last_error is not None:
+                    self.ui.display_notice(
+                        f"Error getting completion: {self.client.last_error}",
+                        style="red",
+                    )
+                elif stream is not None and stream.truncated:
+                    self.ui.display_notice(
+                        "The answer was cut off at the model's output limit."
+                    )
+            finally:
+                self.ui.set_status(None)
+        if not self.client.cancelled:
+            self.client.prefetch_followups(self.ui.set_suggestions)
+
+    def _fresh(self) -> None:
+        """Replace the last recalled answer with one from the model."""
+        prompt = self.client.forget_recalled()
+        if prompt is None:
+            self.ui.display_notice("The last answer was not recalled.", style="red")
+            return
+        self._answer(prompt, recall=False)
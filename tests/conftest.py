@@ -0,0 +1,182 @@
+"""Shared fixtures for the Mind Terminal tests."""
+import json
+import threading
+import time
+from collections.abc import Callable, Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pytest
+
+from mindterm.config import config
+
+
+@pytest.fixture(autouse=True)
+def isolated_data_dir(tmp_path) -> Generator[str, None, None]:
+    """Keep session transcripts, indexes and endpoint files out of $HOME."""
+    data_dir = str(tmp_path / "data")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(config, "data_dir", data_dir)
+        monkeypatch.setattr(config, "endpoints_file", str(tmp_path / "endpoints.toml"))
+        yield data_dir
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Local OpenAI-compatible server that streams echo completions."""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0, token_delay: float = 0.0) -> None:
+        """Start listening on a free local port."""
+        super().__init__(("127.0.0.1", 0), FakeOpenAIHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        # Status code returned instead of a stream, to simulate an outage
+        self.status = 200
+        # Requests still to be answered with a 429 and this Retry-After
+        self.rate_limited = 0
+        self.retry_after = "0.2"
+        self.requests: list[dict[str, Any]] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """Return the base URL clients should use."""
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}/v1"
+
+    def enter(self) -> None:
+        """Record the start of a request."""
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self) -> None:
+        """Record the end of a request."""
+        with self._lock:
+            self.in_flight -= 1
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the streaming chat completions API."""
+
+    server: FakeOpenAIServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Silence request logging."""
+
+    def do_GET(self) -> None:
+        """Answer the models endpoint."""
+        body = json.dumps({"object": "list", "data": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        """Answer connection warm-up requests."""
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        """Stream back the last user message prefixed with ``Echo:``."""
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length))
+        self.server.requests.append(payload)
+        self.server.enter()
+        try:
+            time.sleep(self.server.latency)
+            if self.server.rate_limited > 0:
+                self.server.rate_limited -= 1
+                self._send_rate_limited()
+                return
+            if self.server.status != 200:
+                self.send_error(self.server.status)
+                return
+            text = "Echo: " + payload["messages"][-1]["content"]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in text.split(" "):
+                self._send_event(payload["model"], {"content": word + " "}, None)
+                time.sleep(self.server.token_delay)
+            self._send_event(payload["model"], {}, "stop")
+            if payload.get("stream_options", {}).get("include_usage"):
+                self._send_usage(payload, text)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client cancelled the stream
+        finally:
+            self.server.leave()
+
+    def _send_rate_limited(self) -> None:
+        """Reject a request with a 429 and a Retry-After header."""
+        body = json.dumps({"error": {"message": "Rate limit reached"}}).encode()
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Retry-After", self.server.retry_after)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_usage(self, payload: dict[str, Any], text: str) -> None:
+        """Write the final usage-only chunk, which has no choices."""
+        prompt = sum(len(m["content"].split()) for m in payload["messages"])
+        completion = len(text.split(" "))
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": payload["model"],
+            "choices": [],
+            "usage": {
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "total_tokens": prompt + completion,
+            },
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send_event(
+        self, model: str, delta: dict[str, str], finish_reason: str | None
+    ) -> None:
+        """Write a single chat completion chunk as a server-sent event."""
+        chunk = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+
+
+@pytest.fixture
+def make_fake_openai_server() -> Generator[Callable[..., FakeOpenAIServer], None, None]:
+    """Return a factory for fake servers that are shut down after the test."""
+    servers: list[FakeOpenAIServer] = []
+
+    def start(latency: float = 0.2, token_delay: float = 0.0) -> FakeOpenAIServer:
+        server = FakeOpenAIServer(latency=latency, token_delay=token_delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def fake_openai_server(
+    make_fake_openai_server: Callable[..., FakeOpenAIServer],
+) -> FakeOpenAIServer:
+    """Run a fake OpenAI-compatible server with 200 ms of latency per request."""
+    return make_fake_openai_server()
@@ -0,0 +1,161 @@
+"""Tests for the attach module."""
+import hashlib
+from unittest.mock import patch
+
+import pytest
+
+from mindterm.attach import (
+    Attacher,
+    AttachmentCache,
+    Chunker,
+    TokenCounter,
+    count_tokens,
+    format_attachments,
+    read_chunks,
+)
+from mindterm.conversation import MESSAGE_OVERHEAD_TOKENS, estimate_tokens
+
+LOG = "".join(
+    f"2024-01-01 12:00:{i % 60:02d} worker {i} finished job\n" for i in range(400)
+)
+
+
+def test_token_counter_matches_estimate() -> None:
+    """Test counting text in pieces gives the same estimate as counting it whole."""
+    text = "hello world, 你好世界\n" * 50
+    counter = TokenCounter()
+    for start in range(0, len(text), 7):
+        counter.add(text[start : start + 7])
+    assert counter.tokens == estimate_tokens(text) - MESSAGE_OVERHEAD_TOKENS
+
+
+def test_chunker_splits_at_lines_within_limit() -> None:
+    """Test chunks end at line boundaries and never exceed the limit."""
+    chunker = Chunker(50)
+    for start in range(0, len(LOG), 1000):
+        chunker.feed(LOG[start : start + 1000])
+    chunks = chunker.finish()
+    assert "".join(chunks) == LOG
+    assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+    assert all(chunk.endswith("\n") for chunk in chunks)
+
+
+def test_chunker_cuts_long_lines() -> None:
+    """Test a line longer than a chunk is cut."""
+    chunker = Chunker(10)
+    chunker.feed("x" * 100)
+    chunks = chunker.finish()
+    assert "".join(chunks) == "x" * 100
+    assert all(count_tokens(chunk) <= 10 for chunk in chunks)
+
+
+@pytest.mark.parametrize("threshold", [0, 1 << 30])
+def test_read_chunks(tmp_path, threshold) -> None:
+    """Test files are hashed and counted the same whether mapped or read."""
+    path = tmp_path / "app.log"
+    path.write_text(LOG)
+    with patch("mindterm.attach.MMAP_THRESHOLD", threshold):
+        with patch("mindterm.attach.BLOCK_SIZE", 4096):
+            digest, tokens, chunks = read_chunks(str(path), 500)
+    assert digest == hashlib.sha256(LOG.encode()).hexdigest()
+    assert tokens == count_tokens(LOG)
+    assert "".join(chunks) == LOG
+
+
+def test_read_chunks_decodes_across_blocks(tmp_path) -> None:
+    """Test multi-byte characters split between blocks are decoded intact."""
+    path = tmp_path / "notes.txt"
+    path.write_text("é" * 5000)
+    with patch("mindterm.attach.BLOCK_SIZE", 1001):
+        _, tokens, chunks = read_chunks(str(path), 100_000)
+    assert "".join(chunks) == "é" * 5000
+    assert tokens == 5000
+
+
+def test_read_chunks_rejects_binary(tmp_path) -> None:
+    """Test binary files are not attached."""
+    path = tmp_path / "image.png"
+    path.write_bytes(b"\x89PNG\0\0\0")
+    with pytest.raises(ValueError, match="binary"):
+        read_chunks(str(path), 100)
+
+
+def test_attacher_small_file_is_sent_whole(tmp_path) -> None:
+    """Test a file within the budget is attached as is and cached."""
+    path = tmp_path / "config.yaml"
+    path.write_text("debug: true\n")
+    attacher = Attacher(AttachmentCache(":memory:"), 100, 50, lambda prompts: [])
+    (attachment,) = attacher.attach(str(path))
+    assert attachment.text == "debug: true\n"
+    assert not attachment.summarized
+    assert not attachment.cached
+
+    # Unchanged files are neither read nor hashed again
+    with patch("mindterm.attach.read_chunks") as mock_read:
+        (again,) = attacher.attach(str(path))
+    mock_read.assert_not_called()
+    assert again.cached
+    assert again.text == attachment.text
+
+    # Changed files are read again
+    path.write_text("debug: false\n")
+    (changed,) = attacher.attach(str(path))
+    assert changed.text == "debug: false\n"
+    assert not changed.cached
+
+
+def test_attacher_summarizes_large_files(tmp_path) -> None:
+    """Test a file over the budget is summarized chunk by chunk."""
+    path = tmp_path / "app.log"
+    path.write_text(LOG)
+    calls: list[list[str]] = []
+
+    def summarize(prompts: list[str]) -> list[str]:
+        calls.append(prompts)
+        return [f"summary {i}" for i in range(len(prompts))]
+
+    attacher = Attacher(AttachmentCache(":memory:"), 1000, 500, summarize)
+    (attachment,) = attacher.attach(str(tmp_path / "*.log"))
+    assert attachment.summarized
+    assert attachment.chunks == len(calls[0]) > 1
+    assert attachment.text.startswith("summary 0\n\nsummary 1")
+    assert "part 1 of" in calls[0][0] and "app.log" in calls[0][0]
+    assert len(calls) == 1
+
+    # The summary is reused while the file is unchanged
+    attacher.attach(str(path))
+    assert len(calls) == 1
+    assert attacher.stats()["cached"] == 1
+
+
+def test_attacher_collapses_summaries_until_they_fit(tmp_path) -> None:
+    """Test summaries over the budget are summarized again."""
+    path = tmp_path / "app.log"
+    path.write_text(LOG)
+    rounds: list[int] = []
+
+    def summarize(prompts: list[str]) -> list[str]:
+        rounds.append(len(prompts))
+        return ["word " * 10 for _ in prompts]
+
+    attacher = Attacher(AttachmentCache(":memory:"), 200, 100, summarize)
+    (attachment,) = attacher.attach(str(path))
+    assert len(rounds) > 1
+    assert rounds == sorted(rounds, reverse=True)
+    assert count_tokens(attachment.text) <= 200
+
+
+def test_attacher_no_match(tmp_path) -> None:
+    """Test a pattern matching nothing is an error."""
+    attacher = Attacher(AttachmentCache(":memory:"), 100, 50, lambda prompts: [])
+    with pytest.raises(ValueError, match="No files match"):
+        attacher.attach(str(tmp_path / "*.txt"))
+
+
+def test_format_attachments(tmp_path) -> None:
+    """Test attachments are wrapped in tagged blocks."""
+    path = tmp_path / "a.txt"
+    path.write_text("alpha\n")
+    attacher = Attacher(AttachmentCache(":memory:"), 100, 50, lambda prompts: [])
+    text = format_attachments(attacher.attach(str(path)))
+    assert text == f'<file path="{path}">\nalpha\n</file>'
@@ -0,0 +1,116 @@
+"""Tests for the batch module."""
+import asyncio
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+
+from mindterm import main
+from mindterm.batch import (
+    BatchJob,
+    JsonlWriter,
+    TextWriter,
+    read_prompts,
+    run_batch,
+    run_headless,
+)
+from mindterm.client import AsyncLLMClient
+from mindterm.config import config
+
+
+def test_read_prompts_text() -> None:
+    """Test reading one prompt per non-empty line."""
+    jobs = read_prompts(io.StringIO("first\n\n  second  \n"))
+    assert [(job.index, job.prompt) for job in jobs] == [(0, "first"), (1, "second")]
+
+
+def test_read_prompts_jsonl() -> None:
+    """Test reading JSONL prompts with optional ids."""
+    stream = io.StringIO('{"prompt": "a", "id": "x"}\n{"prompt": "b"}\n')
+    jobs = read_prompts(stream, "jsonl")
+    assert [(job.prompt, job.id) for job in jobs] == [("a", "x"), ("b", None)]
+
+
+def test_read_prompts_invalid_jsonl() -> None:
+    """Test invalid JSONL reports the offending line."""
+    with pytest.raises(ValueError, match="line 2"):
+        read_prompts(io.StringIO('{"prompt": "a"}\n{"text": "b"}\n'), "jsonl")
+
+
+def test_text_writer_preserves_input_order() -> None:
+    """Test out-of-order completions are written in input order."""
+    output = io.StringIO()
+    writer = TextWriter(output)
+    first, second = BatchJob(0, "a"), BatchJob(1, "b")
+    writer.add(first)
+    writer.add(second)
+
+    second.chunks.append("two")
+    writer.on_chunk(second, "two")
+    writer.on_done(second)
+    assert output.getvalue() == ""
+
+    first.chunks.append("one")
+    writer.on_chunk(first, "one")
+    assert output.getvalue() == "one"
+
+    writer.on_done(first)
+    assert output.getvalue() == "one\ntwo\n"
+
+
+def test_run_batch_jsonl(fake_openai_server) -> None:
+    """Test a JSONL batch run against a fake server."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = AsyncLLMClient()
+                jobs = [BatchJob(i, f"q{i}", id=f"id{i}") for i in range(6)]
+                output = io.StringIO()
+
+                async def run() -> object:
+                    try:
+                        return await run_batch(client, jobs, JsonlWriter(output), 3)
+                    finally:
+                        await client.close()
+
+                stats = asyncio.run(run())
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(r["index"] for r in records) == list(range(6))
+    for record in records:
+        assert record["response"] == f"Echo: q{record['index']} "
+        assert record["id"] == f"id{record['index']}"
+        assert record["error"] is None
+    assert stats.prompts == 6
+    assert stats.errors == 0
+    assert stats.throughput > 0
+    assert fake_openai_server.peak_in_flight <= 3
+
+
+def test_run_headless_text(fake_openai_server, tmp_path, capsys) -> None:
+    """Test headless mode reads a prompt file and reports throughput."""
+    prompts = tmp_path / "prompts.txt"
+    prompts.write_text("hello\nworld\n")
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                exit_code = run_headless(str(prompts), max_concurrency=2)
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    assert captured.out == "Echo: hello \nEcho: world \n"
+    assert "prompts/sec" in captured.err
+
+
+@patch("mindterm.main.TerminalUI")
+@patch("mindterm.main.run_headless", return_value=0)
+def test_run_batch_flag(mock_run_headless, mock_terminal_ui) -> None:
+    """Test the --batch flag skips the interactive UI."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        with pytest.raises(SystemExit):
+            main.run(["--batch", "-i", "p.jsonl", "-j", "4"])
+
+    mock_run_headless.assert_called_once_with("p.jsonl", None, "text", 4)
+    mock_terminal_ui.assert_not_called()
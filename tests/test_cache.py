@@ -0,0 +1,65 @@
+"""Tests for the cache module."""
+from unittest.mock import patch
+
+from mindterm.cache import ResponseCache, cache_key
+
+
+def test_cache_key_depends_on_request() -> None:
+    """Test the cache key covers model, endpoint, messages and parameters."""
+    messages = [{"role": "user", "content": "Hi"}]
+    key = cache_key("m", "http://a", messages)
+    assert key == cache_key("m", "http://a", [{"content": "Hi", "role": "user"}])
+    assert key != cache_key("other", "http://a", messages)
+    assert key != cache_key("m", "http://b", messages)
+    assert key != cache_key("m", "http://a", [{"role": "user", "content": "Ho"}])
+    assert key != cache_key("m", "http://a", messages, {"temperature": 0.5})
+
+
+def test_cache_hit_and_miss(tmp_path) -> None:
+    """Test stored responses are returned and counted."""
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=1024, ttl=60)
+    assert cache.get("k") is None
+    cache.put("k", "value")
+    assert cache.get("k") == "value"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": 5}
+    cache.close()
+
+
+def test_cache_persists_across_instances(tmp_path) -> None:
+    """Test the cache survives reopening the database."""
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path, max_bytes=1024, ttl=60)
+    cache.put("k", "value")
+    cache.close()
+
+    reopened = ResponseCache(path, max_bytes=1024, ttl=60)
+    assert reopened.get("k") == "value"
+    reopened.close()
+
+
+def test_cache_ttl_expiry() -> None:
+    """Test entries older than the TTL are treated as misses."""
+    cache = ResponseCache(":memory:", max_bytes=1024, ttl=10)
+    with patch("mindterm.cache.time.time", return_value=1000.0):
+        cache.put("k", "value")
+    with patch("mindterm.cache.time.time", return_value=1011.0):
+        assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_lru_eviction() -> None:
+    """Test the least recently used entries are evicted over the size limit."""
+    cache = ResponseCache(":memory:", max_bytes=10, ttl=60)
+    with patch("mindterm.cache.time.time", return_value=1.0):
+        cache.put("a", "aaaa")
+    with patch("mindterm.cache.time.time", return_value=2.0):
+        cache.put("b", "bbbb")
+    with patch("mindterm.cache.time.time", return_value=3.0):
+        assert cache.get("a") == "aaaa"
+    with patch("mindterm.cache.time.time", return_value=4.0):
+        cache.put("c", "cccc")
+
+    with patch("mindterm.cache.time.time", return_value=5.0):
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+        assert cache.get("c") == "cccc"
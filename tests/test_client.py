@@ -1,13 +1,21 @@
 """Tests for the client module."""
-from unittest.mock import Mock, patch
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import Mock, call, patch
 
 import pytest
-from mindterm.client import LLMClient
+
+from mindterm.attach import Attacher, AttachmentCache
+from mindterm.client import AsyncLLMClient, LLMClient, http_client_options
 from mindterm.config import config
+from mindterm.prefetch import Prefetcher
+from mindterm.worker import ResponseWorker
 
 
 @patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
-@patch("mindterm.client.OpenAI")
+@patch("openai.OpenAI")
 def test_llm_client_initialization(mock_openai) -> None:
     """Test LLMClient initialization."""
     # Mock config validation to return True
@@ -21,7 +29,10 @@ def test_llm_client_initialization(mock_openai) -> None:
                     assert hasattr(client, "model")
                     assert client.model == "test-model"
                     mock_openai.assert_called_once_with(
-                        api_key="test-key", base_url="http://test-url"
+                        api_key="test-key",
+                        base_url="http://test-url",
+                        http_client=client.http_client,
+                        max_retries=0,
                     )
 
 
@@ -38,7 +49,7 @@ def test_llm_client_initialization_failure() -> None:
 
 
 @patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
-@patch("mindterm.client.OpenAI")
+@patch("openai.OpenAI")
 def test_llm_client_get_completion(mock_openai) -> None:
     """Test LLMClient get_completion method."""
     # Mock config validation to return True
@@ -47,16 +58,16 @@ def test_llm_client_get_completion(mock_openai) -> None:
             with patch.object(config, "base_url", "http://test-url"):
                 with patch.object(config, "model", "test-model"):
                     # Create mock response chunks
-                    mock_chunk1 = Mock()
-                    mock_chunk1.choices = [Mock()]
+                    mock_chunk1 = Mock(usage=None)
+                    mock_chunk1.choices = [Mock(finish_reason=None)]
                     mock_chunk1.choices[0].delta.content = "Hello"
 
-                    mock_chunk2 = Mock()
-                    mock_chunk2.choices = [Mock()]
+                    mock_chunk2 = Mock(usage=None)
+                    mock_chunk2.choices = [Mock(finish_reason=None)]
                     mock_chunk2.choices[0].delta.content = " World"
 
-                    mock_chunk3 = Mock()
-                    mock_chunk3.choices = [Mock()]
+                    mock_chunk3 = Mock(usage=None)
+                    mock_chunk3.choices = [Mock(finish_reason=None)]
                     mock_chunk3.choices[0].delta.content = None
 
                     mock_response = Mock()
@@ -86,14 +97,15 @@ def test_llm_client_get_completion(mock_openai) -> None:
                             {"role": "user", "content": "Hello"},
                         ],
                         stream=True,
+                        stream_options={"include_usage": True},
                     )
 
 
 @patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
-@patch("mindterm.client.OpenAI")
+@patch("openai.OpenAI")
 @patch("builtins.print")
 def test_llm_client_get_completion_exception(mock_print, mock_openai) -> None:
-    """Test LLMClient get_completion method handles exceptions."""
+    """Test a failed completion is reported through the UI, not printed."""
     # Mock config validation to return True
     with patch.object(config, "validate", return_value=True):
         with patch.object(config, "api_key", "test-key"):
@@ -106,11 +118,701 @@ def test_llm_client_get_completion_exception(mock_print, mock_openai) -> None:
                         Exception("Test error")
                     )
 
-                    # Create client and test
+                    # Create client and answer through the worker
                     client = LLMClient()
-                    result = list(client.get_completion("Hello"))
+                    ui = Mock()
+                    shown: list[str] = []
+                    ui.display_streamed_response.side_effect = shown.extend
+                    worker = ResponseWorker(client, ui)
+                    worker.submit_prompt("Hello")
+                    worker.close()
+
+    assert shown == []
+    assert str(client.last_error) == "Test error"
+    assert not client.conversation.turns
+    ui.display_notice.assert_called_once_with(
+        "Error getting completion: Test error", style="red"
+    )
+    mock_print.assert_not_called()
+
+
+def test_async_llm_client_streams_from_server(fake_openai_server) -> None:
+    """Test AsyncLLMClient streams chunks from an OpenAI-compatible server."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch.object(config, "model", "test-model"):
+                    client = AsyncLLMClient()
+
+                    async def collect() -> list[str]:
+                        try:
+                            return [c async for c in client.get_completion("Hi")]
+                        finally:
+                            await client.close()
+
+                    result = asyncio.run(collect())
+
+                    assert "".join(result) == "Echo: Hi "
+                    assert fake_openai_server.requests[0]["model"] == "test-model"
+
+
+def test_async_llm_client_complete_many(fake_openai_server) -> None:
+    """Test complete_many runs concurrently and preserves input order."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch.object(config, "model", "test-model"):
+                    client = AsyncLLMClient(max_concurrency=5)
+                    prompts = [f"prompt {i}" for i in range(10)]
+
+                    async def run_batch() -> list[str]:
+                        try:
+                            return await client.complete_many(prompts)
+                        finally:
+                            await client.close()
+
+                    start = time.perf_counter()
+                    results = asyncio.run(run_batch())
+                    elapsed = time.perf_counter() - start
+
+                    assert results == [f"Echo: prompt {i} " for i in range(10)]
+                    assert fake_openai_server.peak_in_flight <= 5
+                    assert fake_openai_server.peak_in_flight > 1
+                    # Ten requests at 200 ms each take 2 s when run serially
+                    assert elapsed < 1.5
+
+
+@patch("openai.OpenAI")
+def test_llm_client_get_completion_cached(mock_openai, tmp_path) -> None:
+    """Test a cached response is replayed without a network request."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "cache_enabled", True):
+            with patch.object(config, "cache_path", str(tmp_path / "cache.db")):
+                mock_chunk = Mock(usage=None)
+                mock_chunk.choices = [Mock(finish_reason=None)]
+                mock_chunk.choices[0].delta.content = "Hello"
+                mock_client_instance = Mock()
+                mock_client_instance.base_url = "http://test-url"
+                mock_openai.return_value = mock_client_instance
+                mock_client_instance.chat.completions.create.return_value = iter(
+                    [mock_chunk]
+                )
+
+                client = LLMClient()
+                assert list(client.get_completion("Hi")) == ["Hello"]
+                client.reset_conversation()
+                assert list(client.get_completion("Hi")) == ["Hello"]
+
+                mock_client_instance.chat.completions.create.assert_called_once()
+                assert client.stats()["Cache"]["hits"] == 1
+                assert client.stats()["Cache"]["misses"] == 1
+
+
+def test_http_client_options() -> None:
+    """Test transport settings are taken from the configuration."""
+    with patch.object(config, "max_connections", 7):
+        with patch.object(config, "keepalive_expiry", 12.5):
+            with patch.object(config, "connect_timeout", 2.0):
+                with patch.object(config, "read_timeout", 30.0):
+                    options = http_client_options()
+
+    assert options["limits"].max_connections == 7
+    assert options["limits"].keepalive_expiry == 12.5
+    assert options["timeout"].connect == 2.0
+    assert options["timeout"].read == 30.0
+    assert options["http2"] is False
+
+
+@patch("mindterm.client.importlib.util.find_spec", return_value=None)
+@patch("builtins.print")
+def test_http_client_options_http2_unavailable(mock_print, _mock_find_spec) -> None:
+    """Test HTTP/2 falls back to HTTP/1.1 when h2 is not installed."""
+    with patch.object(config, "http2", True):
+        options = http_client_options()
+
+    assert options["http2"] is False
+    mock_print.assert_called_once()
+
+
+def test_llm_client_warm_up_and_ttft(fake_openai_server) -> None:
+    """Test warm-up opens a connection and TTFT is recorded per request."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                client.warm_up().join(timeout=5)
+                assert client.warmup_time is not None
+
+                assert "".join(client.get_completion("one")) == "Echo: one "
+                assert "".join(client.get_completion("two")) == "Echo: two "
+
+                latency = client.stats()["Latency"]
+                assert latency["requests"] == 2
+                assert latency["first request TTFT (s)"] >= 0.2
+                assert "subsequent mean TTFT (s)" in latency
+
+
+def test_llm_client_multi_turn_conversation(fake_openai_server) -> None:
+    """Test follow-up prompts are sent with the earlier turns."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                "".join(client.get_completion("first"))
+                "".join(client.get_completion("second"))
+
+                messages = fake_openai_server.requests[-1]["messages"]
+                assert [m["role"] for m in messages] == [
+                    "system",
+                    "user",
+                    "assistant",
+                    "user",
+                ]
+                assert messages[2]["content"] == "Echo: first "
+
+                client.reset_conversation()
+                "".join(client.get_completion("third"))
+                assert len(fake_openai_server.requests[-1]["messages"]) == 2
+
+
+@patch("openai.OpenAI")
+@patch("builtins.print")
+def test_llm_client_failed_prompt_not_kept(_mock_print, mock_openai) -> None:
+    """Test a prompt that failed is removed from the conversation."""
+    with patch.object(config, "validate", return_value=True):
+        mock_openai.return_value.chat.completions.create.side_effect = Exception(
+            "Test error"
+        )
+        client = LLMClient()
+        assert list(client.get_completion("Hello")) == []
+        assert len(client.conversation.turns) == 0
+
+
+def test_llm_client_records_and_resumes_sessions(fake_openai_server) -> None:
+    """Test completed turns are saved and a session can be resumed."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                "".join(client.get_completion("first"))
+                "".join(client.get_completion("second"))
+                assert client.session_id == 1
+
+                restarted = LLMClient()
+                assert restarted.resume_session(1) == 4
+                "".join(restarted.get_completion("third"))
+
+                messages = fake_openai_server.requests[-1]["messages"]
+                assert [m["content"] for m in messages[1:]] == [
+                    "first",
+                    "Echo: first ",
+                    "second",
+                    "Echo: second ",
+                    "third",
+                ]
+                assert restarted.sessions.list_sessions()[0].turns == 6
+
+                with pytest.raises(KeyError):
+                    restarted.resume_session(99)
+
+
+def test_llm_client_search(fake_openai_server) -> None:
+    """Test completed turns are indexed for search as they are saved."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                "".join(client.get_completion("tell me about pelicans"))
+                "".join(client.get_completion("and flamingos"))
+                assert client.search_index.position == 4
+
+                results = client.search("flamingos")
+                assert sorted(r.role for r in results) == ["assistant", "user"]
+                assert all(r.session == 1 for r in results)
+                assert client.search("penguins") == []
+
+
+@patch("openai.OpenAI")
+def test_llm_client_defers_openai_client(mock_openai) -> None:
+    """Test the OpenAI client is built on first use or by preload()."""
+    with patch.object(config, "validate", return_value=True):
+        client = LLMClient()
+        mock_openai.assert_not_called()
+
+        client.preload().join(timeout=5)
+        mock_openai.assert_called_once()
+        assert client.client is mock_openai.return_value
+        mock_openai.assert_called_once()
+
+
+def test_llm_client_cancel_closes_stream(fake_openai_server) -> None:
+    """Test cancelling stops a blocked stream at once and drops the turn."""
+    fake_openai_server.token_delay = 0.5
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                chunks: list[str] = []
+                stream = client.get_completion("one two three four five six")
+                chunks.append(next(stream))
+
+                # Cancel from another thread while the stream waits for data
+                timer = threading.Timer(0.1, client.cancel)
+                start = time.perf_counter()
+                timer.start()
+                chunks.extend(stream)
+                elapsed = time.perf_counter() - start
+
+                assert client.cancelled is True
+                assert chunks == ["Echo: "]
+                assert elapsed < 0.4
+                assert len(client.conversation.turns) == 0
+
+
+def test_llm_client_closes_stream_when_caller_stops(fake_openai_server) -> None:
+    """Test the response is closed as soon as the caller stops reading."""
+    fake_openai_server.token_delay = 0.1
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                stream = client.get_completion(" ".join(["word"] * 50))
+                assert next(stream) == "Echo: "
+                stream.close()
+
+                # The server notices the closed connection long before the
+                # five-second answer would have finished
+                deadline = time.monotonic() + 2
+                while fake_openai_server.in_flight:
+                    assert time.monotonic() < deadline
+                    time.sleep(0.02)
+                assert len(client.conversation.turns) == 0
+
+
+def test_llm_client_streaming_metrics(fake_openai_server, tmp_path) -> None:
+    """Test each streamed request is timed and written to the metrics log."""
+    log_path = tmp_path / "metrics.jsonl"
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch.object(config, "metrics_log", str(log_path)):
+                    client = LLMClient()
+                    "".join(client.get_completion("one two three"))
+
+                    streaming = client.stats()["Streaming"]
+                    assert streaming["requests"] == 1
+                    assert streaming["TTFT p50 (s)"] >= 0.2
+                    assert streaming["network (s)"] >= 0.2
+                    assert "chunk gap p95 (ms)" in streaming
+
+                    record = json.loads(log_path.read_text())
+                    assert record["chunks"] == 4
+                    assert len(record["gaps"]) == 3
+                    assert record["cancelled"] is False
+
 
-                    assert result == []
-                    mock_print.assert_called_once_with(
-                        "Error getting completion: Test error"
+def test_llm_client_times_rendering_by_the_caller(make_fake_openai_server) -> None:
+    """Test the time the caller spends on each batch counts as render time."""
+    server = make_fake_openai_server(latency=0.0, token_delay=0.02)
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", server.base_url):
+                client = LLMClient()
+                batches = 0
+                for _ in client.get_completion("one two three four"):
+                    batches += 1
+                    time.sleep(0.1)
+
+    (metrics,) = client.metrics.requests
+    assert batches >= 2
+    assert metrics.render_time >= 0.1 * batches
+    assert metrics.render_time > metrics.network_time
+
+
+def test_llm_client_fails_over_to_healthy_endpoint(
+    fake_openai_server, make_fake_openai_server, tmp_path
+) -> None:
+    """Test a request is retried on another endpoint when one is down."""
+    down = make_fake_openai_server()
+    down.status = 503
+    endpoints_file = tmp_path / "endpoints.toml"
+    endpoints_file.write_text(
+        f'[[endpoints]]\nname = "down"\nbase_url = "{down.base_url}"\n\n'
+        f'[[endpoints]]\nname = "up"\nbase_url = "{fake_openai_server.base_url}"\n'
+    )
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "endpoints_file", str(endpoints_file)):
+                with patch.object(config, "retry_backoff", 0.0):
+                    client = LLMClient()
+                    assert "".join(client.get_completion("Hi")) == "Echo: Hi "
+                    assert "".join(client.get_completion("Hi")) == "Echo: Hi "
+
+                    # The failed endpoint is skipped while it cools down
+                    assert len(down.requests) == 1
+                    assert len(fake_openai_server.requests) == 2
+                    stats = client.stats()
+                    assert stats["Endpoint down"]["errors"] == 1
+                    assert stats["Endpoint up"]["requests"] == 2
+
+
+def test_llm_client_hedged_request(make_fake_openai_server, tmp_path) -> None:
+    """Test a slow endpoint is hedged and the faster stream is used."""
+    slow = make_fake_openai_server(latency=1.0)
+    fast = make_fake_openai_server(latency=0.0)
+    endpoints_file = tmp_path / "endpoints.toml"
+    endpoints_file.write_text(
+        f'[[endpoints]]\nname = "slow"\nbase_url = "{slow.base_url}"\n\n'
+        f'[[endpoints]]\nname = "fast"\nbase_url = "{fast.base_url}"\n'
+    )
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "endpoints_file", str(endpoints_file)):
+                with patch.object(config, "hedge", True):
+                    with patch.object(config, "hedge_delay", 0.1):
+                        client = LLMClient()
+                        start = time.perf_counter()
+                        assert "".join(client.get_completion("Hi")) == "Echo: Hi "
+                        assert time.perf_counter() - start < 0.8
+
+                        assert len(slow.requests) == 1
+                        assert len(fast.requests) == 1
+                        hedging = client.stats()["Hedging"]
+                        assert hedging["hedges fired"] == 1
+                        assert hedging["hedges won"] == 1
+                        assert client.metrics.requests[-1].endpoint == "fast"
+
+
+def test_llm_client_hedge_returns_unused_rate_limit_budget(
+    make_fake_openai_server, tmp_path
+) -> None:
+    """Test only the answer that was read keeps its rate limit budget."""
+    slow = make_fake_openai_server(latency=1.0)
+    fast = make_fake_openai_server(latency=0.0)
+    endpoints_file = tmp_path / "endpoints.toml"
+    endpoints_file.write_text(
+        f'[[endpoints]]\nname = "slow"\nbase_url = "{slow.base_url}"\n\n'
+        f'[[endpoints]]\nname = "fast"\nbase_url = "{fast.base_url}"\n'
+    )
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "endpoints_file", str(endpoints_file)):
+                with patch.object(config, "hedge", True):
+                    with patch.object(config, "hedge_delay", 0.1):
+                        with patch.object(config, "rate_tpm", 100_000):
+                            client = LLMClient()
+                            limiter = client.rate_limiter
+                            assert limiter is not None
+                            with (
+                                patch.object(
+                                    limiter, "try_acquire", wraps=limiter.try_acquire
+                                ) as try_acquire,
+                                patch.object(
+                                    limiter, "settle", wraps=limiter.settle
+                                ) as settle,
+                            ):
+                                "".join(client.get_completion("Hi"))
+
+    # The primary and the duplicate each reserved the same budget
+    reservations = [c.args[0] for c in try_acquire.call_args_list]
+    assert len(reservations) == 2
+    assert reservations[0] == reservations[1]
+    # One reservation is returned whole, the other settled with the usage
+    assert call(reservations[0], 0) in settle.call_args_list
+    assert settle.call_count == 2
+    taken = sum(reservations) - sum(
+        r - u for r, u in (c.args for c in settle.call_args_list)
+    )
+    assert taken == client.last_stream.total_tokens
+
+
+def test_llm_client_serves_prefetched_follow_up(fake_openai_server) -> None:
+    """Test a picked follow-up is answered from its prefetched stream."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch.object(config, "prefetch", True):
+                    with patch.object(
+                        Prefetcher, "suggest", return_value=["Why?", "How?"]
+                    ):
+                        client = LLMClient()
+                        "".join(client.get_completion("Hi"))
+                        ready = threading.Event()
+                        client.prefetch_followups(lambda suggestions: ready.set())
+                        assert ready.wait(timeout=5)
+                        time.sleep(0.4)  # Let the prefetched answers arrive
+
+                        start = time.perf_counter()
+                        assert "".join(client.get_completion("Why?")) == "Echo: Why? "
+                        assert time.perf_counter() - start < 0.1
+
+                        # One request per answer; none for the picked follow-up
+                        assert len(fake_openai_server.requests) == 3
+                        assert [t.content for t in client.conversation.turns] == [
+                            "Hi",
+                            "Echo: Hi ",
+                            "Why?",
+                            "Echo: Why? ",
+                        ]
+                        assert client.stats()["Prefetch"]["picked"] == 1
+
+
+def test_llm_client_attach(fake_openai_server, tmp_path) -> None:
+    """Test attached files are sent with the next prompt only."""
+    path = tmp_path / "notes.txt"
+    path.write_text("remember the milk\n")
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                (attachment,) = client.attach(str(path))
+                assert attachment.text == "remember the milk\n"
+
+                "".join(client.get_completion("What should I buy?"))
+                sent = fake_openai_server.requests[-1]["messages"][-1]["content"]
+                assert sent == (
+                    f'<file path="{path}">\nremember the milk\n</file>\n\n'
+                    "What should I buy?"
+                )
+
+                "".join(client.get_completion("Thanks"))
+                sent = fake_openai_server.requests[-1]["messages"][-1]["content"]
+                assert sent == "Thanks"
+
+
+def test_llm_client_attach_summarizes_concurrently(
+    fake_openai_server, tmp_path
+) -> None:
+    """Test a file over the budget is summarized with concurrent requests."""
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"line {i} of the log\n" for i in range(1000)))
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch("mindterm.client.CHUNK_TOKENS", 1000):
+                    client = LLMClient()
+                    (attachment,) = client.attach(str(path))
+
+                    assert attachment.summarized
+                    assert attachment.chunks == len(fake_openai_server.requests) > 2
+                    assert fake_openai_server.peak_in_flight > 1
+                    assert client.stats()["Attachments"]["summary requests"] == (
+                        attachment.chunks
                     )
+
+
+def test_llm_client_recalls_near_duplicate_prompt(fake_openai_server) -> None:
+    """Test a near-duplicate first prompt is answered from the recall index."""
+    prompt = "How do I reverse a list in Python without copying it?"
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch.object(config, "recall", True):
+                    client = LLMClient()
+                    assert client.recall(prompt) is None
+                    answer = "".join(client.get_completion(prompt))
+                    # Follow-up prompts depend on the conversation; not indexed
+                    "".join(client.get_completion("And a tuple, in place?"))
+                    assert client.recall(prompt) is None
+                    client.reset_conversation()
+
+                    similar = "how do i reverse a list in python without copying it!"
+                    match = client.recall(similar)
+                    assert match is not None and match.answer == answer
+                    client.accept_recalled(similar, match)
+                    assert len(fake_openai_server.requests) == 2
+                    assert [t.content for t in client.conversation.turns] == [
+                        similar,
+                        answer,
+                    ]
+                    assert client.stats()["Recall"]["hits"] == 1
+
+                    # \fresh drops the recalled answer and returns its prompt
+                    assert client.forget_recalled() == similar
+                    assert not client.conversation.turns
+                    assert client.forget_recalled() is None
+
+
+def test_llm_client_honours_rate_limits(fake_openai_server) -> None:
+    """Test a 429 is retried after its Retry-After instead of failing."""
+    fake_openai_server.rate_limited = 1
+    fake_openai_server.retry_after = "0.3"
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch.object(config, "rate_rpm", 60):
+                    client = LLMClient()
+                    start = time.perf_counter()
+                    assert "".join(client.get_completion("Hi")) == "Echo: Hi "
+                    assert time.perf_counter() - start >= 0.3
+
+                    assert len(fake_openai_server.requests) == 2
+                    stats = client.stats()["Rate limits"]
+                    assert stats["rate limited (429)"] == 1
+                    assert stats["requests"] == 2
+
+
+def test_async_llm_client_retries_rate_limited_requests(fake_openai_server) -> None:
+    """Test batch requests wait out a 429 shared through the rate limiter."""
+    fake_openai_server.rate_limited = 2
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                with patch.object(config, "rate_tpm", 100_000):
+                    client = AsyncLLMClient(max_concurrency=3)
+
+                    async def run_batch() -> list[str]:
+                        try:
+                            return await client.complete_many(["a", "b", "c"])
+                        finally:
+                            await client.close()
+
+                    results = asyncio.run(run_batch())
+
+                    assert results == ["Echo: a ", "Echo: b ", "Echo: c "]
+                    assert client.rate_limiter is not None
+                    assert client.rate_limiter.limited == 2
+
+
+def test_llm_client_coalesces_stream_and_reads_usage(make_fake_openai_server) -> None:
+    """Test deltas are batched and the usage-only final frame is handled."""
+    server = make_fake_openai_server(latency=0.0, token_delay=0.02)
+    prompt = " ".join(f"w{i}" for i in range(20))
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", server.base_url):
+                client = LLMClient()
+                batches = list(client.get_completion(prompt))
+
+                assert "".join(batches) == f"Echo: {prompt} "
+                assert 1 < len(batches) < 21
+                info = client.last_stream
+                assert info is not None
+                assert info.finish_reason == "stop"
+                assert info.completion_tokens == 21
+                assert info.batches == len(batches)
+                assert server.requests[0]["stream_options"] == {"include_usage": True}
+                streaming = client.stats()["Streaming"]
+                assert streaming["completion tokens"] == 21
+                assert streaming["chunks per batch"] > 1
+
+
+def test_llm_client_compares_models_concurrently(fake_openai_server) -> None:
+    """Test \\compare streams from every model at once, outside the conversation."""
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", fake_openai_server.base_url):
+                client = LLMClient()
+                comparison = client.compare(["model-a", "model-b"], "Hi")
+                while not comparison.wait(1.0):
+                    pass
+
+                # Each request reached the server before the other was answered
+                assert fake_openai_server.peak_in_flight == 2
+                assert [a.text for a in comparison.answers] == ["Echo: Hi "] * 2
+                assert [a.tokens for a in comparison.answers] == [2, 2]
+                assert sorted(r["model"] for r in fake_openai_server.requests) == [
+                    "model-a",
+                    "model-b",
+                ]
+                assert not client.conversation.turns
+
+
+def test_llm_client_sends_rolling_summary(make_fake_openai_server) -> None:
+    """Test older turns are summarized in the background and replaced."""
+    server = make_fake_openai_server(latency=0.0)
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", server.base_url):
+                with patch.object(config, "summarize", True):
+                    with patch.object(config, "summarize_after", 50):
+                        with patch.object(config, "summarize_keep", 2):
+                            client = LLMClient()
+                            "".join(client.get_completion("first " + "a" * 100))
+                            "".join(client.get_completion("second " + "b" * 100))
+                            assert client.summarizer is not None
+                            deadline = time.monotonic() + 5
+                            while client.summarizer.stats()["pending"] == "yes":
+                                assert time.monotonic() < deadline
+                                time.sleep(0.01)
+
+                            "".join(client.get_completion("third"))
+
+                            # Two answers, the summary, and the third answer
+                            assert len(server.requests) == 4
+                            summary_request = server.requests[2]["messages"]
+                            assert "first" in summary_request[-1]["content"]
+                            sent = server.requests[3]["messages"]
+                            assert "Summary of the earlier" in sent[0]["content"]
+                            assert [m["content"][:6] for m in sent[1:]] == [
+                                "second",
+                                "Echo: ",
+                                "third",
+                            ]
+                            assert client.stats()["Summaries"]["applied"] == 1
+
+
+def test_llm_client_reconfigure_keeps_conversation(make_fake_openai_server) -> None:
+    """Test switching endpoint and model applies to the next request only."""
+    first = make_fake_openai_server()
+    second = make_fake_openai_server()
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "base_url", first.base_url):
+                client = LLMClient()
+                assert "".join(client.get_completion("Hi")) == "Echo: Hi "
+                http_client = client.http_client
+                client.attacher = Attacher(
+                    AttachmentCache(":memory:"), 2000, 800, lambda prompts: []
+                )
+
+                with patch.object(config, "base_url", second.base_url):
+                    with patch.object(config, "model", "other-model"):
+                        with patch.object(config, "context_budget", 500):
+                            client.reconfigure()
+                            reply = "".join(client.get_completion("Again"))
+
+    assert reply == "Echo: Again "
+    assert http_client.is_closed
+    assert client.http_client is not http_client
+    assert len(first.requests) == 1
+    assert second.requests[0]["model"] == "other-model"
+    # The conversation so far is sent to the new endpoint
+    assert len(second.requests[0]["messages"]) == 4
+    assert client.conversation.budget == 500
+    # Files attached from now on are prepared for the new budget
+    assert client.attacher.budget == 250
+    assert client.attacher.chunk_tokens == 250
+
+
+def test_llm_client_caches_failover_answer_under_its_endpoint(
+    fake_openai_server, make_fake_openai_server, tmp_path
+) -> None:
+    """Test an answer from a failover endpoint is not served as the primary's."""
+    down = make_fake_openai_server()
+    down.status = 503
+    endpoints_file = tmp_path / "endpoints.toml"
+    endpoints_file.write_text(
+        f'[[endpoints]]\nname = "down"\nbase_url = "{down.base_url}"\n'
+        f'model = "primary-model"\n\n'
+        f'[[endpoints]]\nname = "up"\nbase_url = "{fake_openai_server.base_url}"\n'
+        f'model = "other-model"\n'
+    )
+    with patch.object(config, "validate", return_value=True):
+        with patch.object(config, "api_key", "test-key"):
+            with patch.object(config, "endpoints_file", str(endpoints_file)):
+                with patch.object(config, "retry_backoff", 0.0):
+                    with patch.object(config, "cache_enabled", True):
+                        with patch.object(
+                            config, "cache_path", str(tmp_path / "cache.db")
+                        ):
+                            client = LLMClient()
+                            assert "".join(client.get_completion("Hi")) == "Echo: Hi "
+                            messages = client.conversation.messages()[:2]
+                            primary, failover = client.router.endpoints
+                            assert client.cache is not None
+                            cached = client.cache.get
+                            assert cached(client._cache_key(primary, messages)) is None
+                            assert cached(client._cache_key(failover, messages)) == (
+                                "Echo: Hi "
+                            )
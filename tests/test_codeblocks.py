@@ -0,0 +1,93 @@
+"""Tests for the codeblocks module."""
+import io
+from unittest.mock import Mock, patch
+
+import pytest
+
+from mindterm.codeblocks import (
+    CodeBlock,
+    copy_to_clipboard,
+    extract_code_blocks,
+    parse_code_block,
+    parse_code_command,
+    save_code,
+)
+
+
+def test_parse_code_block() -> None:
+    """Test the language and code of a fenced block are extracted."""
+    assert parse_code_block("```python title\nx = 1\n```") == CodeBlock(
+        "python", "x = 1"
+    )
+    assert parse_code_block("~~~\nplain\n") == CodeBlock("", "plain")
+    assert parse_code_block("Not code") is None
+
+
+def test_extract_code_blocks() -> None:
+    """Test every top-level code block of an answer is found in order."""
+    text = (
+        "Intro\n\n```sh\nls\n```\n\nText with ``` inline\n\n"
+        "````md\n```\nnested\n```\n````\n\n```js\nopen("
+    )
+    assert extract_code_blocks(text) == [
+        CodeBlock("sh", "ls"),
+        CodeBlock("md", "```\nnested\n```"),
+        CodeBlock("js", "open("),
+    ]
+
+
+def test_code_block_describe() -> None:
+    """Test blocks are described by language and line count."""
+    assert CodeBlock("python", "a\nb").describe() == "python, 2 lines"
+    assert CodeBlock("", "a").describe() == "1 line"
+
+
+@pytest.mark.parametrize(
+    ("argument", "expected"),
+    [
+        ("", (1, None)),
+        ("2", (2, None)),
+        ("2 out/main.py", (2, "out/main.py")),
+        ("main.py", (1, "main.py")),
+    ],
+)
+def test_parse_code_command(argument: str, expected: tuple[int, str | None]) -> None:
+    """Test the block number defaults to 1 and the path to the clipboard."""
+    assert parse_code_command(argument) == expected
+
+
+@pytest.mark.parametrize("argument", ["0", "-1", "2x out.py"])
+def test_parse_code_command_rejects_bad_numbers(argument: str) -> None:
+    """Test block numbers must be positive integers."""
+    with pytest.raises(ValueError, match="Usage"):
+        parse_code_command(argument)
+
+
+def test_save_code(tmp_path) -> None:
+    """Test a block is written with a final newline, creating directories."""
+    path = save_code(CodeBlock("python", "x = 1"), str(tmp_path / "out" / "x.py"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "x = 1\n"
+
+
+@patch("mindterm.codeblocks.subprocess.run")
+@patch("mindterm.codeblocks.shutil.which")
+def test_copy_to_clipboard_with_command(mock_which, mock_run) -> None:
+    """Test the first available clipboard command gets the text."""
+    mock_which.side_effect = lambda name: "/usr/bin/xclip" if name == "xclip" else None
+    assert copy_to_clipboard("x = 1") == "xclip"
+    mock_run.assert_called_once_with(
+        ["xclip", "-selection", "clipboard"], input=b"x = 1", check=True
+    )
+
+
+@patch("mindterm.codeblocks.shutil.which", return_value=None)
+def test_copy_to_clipboard_through_terminal(_mock_which) -> None:
+    """Test OSC 52 is used without a clipboard command, and only on a TTY."""
+    terminal = Mock(spec=io.StringIO)
+    terminal.isatty.return_value = True
+    assert copy_to_clipboard("hi", terminal) == "terminal"
+    terminal.write.assert_called_once_with("\x1b]52;c;aGk=\x07")
+
+    with pytest.raises(OSError):
+        copy_to_clipboard("hi", io.StringIO())
@@ -0,0 +1,133 @@
+"""Tests for the compare module."""
+import threading
+import time
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+from mindterm.compare import MAX_MODELS, Comparison, parse_compare
+from mindterm.router import Endpoint
+
+
+def make_chunk(content: str | None, finish_reason: str | None = None) -> Mock:
+    """Build a chat completion chunk."""
+    chunk = Mock(usage=None)
+    chunk.choices = [Mock(finish_reason=finish_reason)]
+    chunk.choices[0].delta.content = content
+    return chunk
+
+
+def endpoint(name: str) -> Endpoint:
+    """Build an endpoint serving a model of the same name."""
+    return Endpoint(name, "http://test/v1", name, "key")
+
+
+def fake_open_stream(
+    delays: dict[str, float],
+    fail: tuple[str, ...] = (),
+    opened: threading.Barrier | None = None,
+):
+    """Return an ``open_stream`` whose models answer after a delay.
+
+    With ``opened``, no model answers before every stream has been opened.
+    """
+
+    def open_stream(target: Endpoint) -> list[Mock]:
+        if opened is not None:
+            opened.wait()
+        time.sleep(delays[target.model])
+        if target.model in fail:
+            raise ConnectionError(f"{target.model} is down")
+        return [make_chunk(target.model), make_chunk(" done", "stop")]
+
+    return open_stream
+
+
+def run(comparison: Comparison) -> Comparison:
+    """Start a comparison and wait for every answer."""
+    comparison.start()
+    while not comparison.wait(1.0):
+        pass
+    return comparison
+
+
+def test_parse_compare() -> None:
+    """Test the models and the prompt are split apart."""
+    assert parse_compare("a,b, c why?") == (["a", "b"], "c why?")
+    assert parse_compare(" a,b,a  Why is the sky blue? ") == (
+        ["a", "b"],
+        "Why is the sky blue?",
+    )
+    assert parse_compare("a Hi") == (["a"], "Hi")
+
+
+@pytest.mark.parametrize("argument", ["", "a,b", ",, Hi", "a,b   "])
+def test_parse_compare_requires_models_and_prompt(argument: str) -> None:
+    """Test a missing model list or prompt is rejected with the usage."""
+    with pytest.raises(ValueError, match="Usage"):
+        parse_compare(argument)
+
+
+def test_parse_compare_limits_models() -> None:
+    """Test too many models are rejected."""
+    models = ",".join(f"m{i}" for i in range(MAX_MODELS + 1))
+    with pytest.raises(ValueError, match="at most"):
+        parse_compare(f"{models} Hi")
+
+
+def test_comparison_streams_models_concurrently() -> None:
+    """Test every model's stream is open before any of them answers."""
+    delays = {"a": 0.2, "b": 0.2, "c": 0.2}
+    targets = [(name, endpoint(name)) for name in delays]
+    # Streams opened one after another would break the barrier
+    opened = threading.Barrier(len(targets), timeout=5)
+    comparison = run(Comparison(targets, fake_open_stream(delays, (), opened), Mock()))
+
+    assert [a.text for a in comparison.answers] == ["a done", "b done", "c done"]
+    for answer in comparison.answers:
+        assert answer.ttft is not None and answer.ttft >= 0.2
+        assert answer.info.finish_reason == "stop"
+        assert answer.tokens > 0
+        assert "TTFT" in answer.summary(comparison.elapsed)
+
+
+def test_comparison_keeps_other_answers_when_one_fails() -> None:
+    """Test a failing model reports its error without stopping the others."""
+    delays = {"a": 0.0, "b": 0.0}
+    targets = [(name, endpoint(name)) for name in delays]
+    comparison = run(Comparison(targets, fake_open_stream(delays, ("b",)), Mock()))
+
+    first, second = comparison.answers
+    assert first.text == "a done" and first.error is None
+    assert second.error == "b is down"
+    assert "b: error: b is down" in comparison.progress()
+
+
+def test_comparison_cancel_aborts_open_streams() -> None:
+    """Test cancelling aborts every stream still running."""
+    release = threading.Event()
+    responses: list[Mock] = []
+
+    def open_stream(_target: Endpoint) -> MagicMock:
+        response = MagicMock()
+        response.__iter__.side_effect = lambda: iter(
+            [make_chunk("x")] if release.wait(5) else []
+        )
+        responses.append(response)
+        return response
+
+    def abort(_response: MagicMock) -> None:
+        release.set()
+
+    targets = [(name, endpoint(name)) for name in ("a", "b")]
+    comparison = Comparison(targets, open_stream, abort)
+    comparison.start()
+    while len(responses) < 2:
+        time.sleep(0.01)
+    comparison.cancel()
+
+    deadline = time.monotonic() + 2
+    while not comparison.wait(0.1):
+        assert time.monotonic() < deadline
+    assert comparison.cancelled
+    assert all(answer.done for answer in comparison.answers)
@@ -2,7 +2,9 @@
 import os
 from unittest.mock import patch
 
-from mindterm.config import Config
+import pytest
+
+from mindterm.config import Config, ConfigError
 
 
 def test_config_initialization() -> None:
@@ -27,3 +29,221 @@ def test_config_validation() -> None:
     with patch.dict(os.environ, {}, clear=True):
         config = Config()
         assert config.validate() is False
+
+
+def test_config_max_concurrency() -> None:
+    """Test the batch concurrency limit is read from the environment."""
+    with patch.dict(os.environ, {"MINDTERM_MAX_CONCURRENCY": "3"}):
+        assert Config().max_concurrency == 3
+
+    with patch.dict(os.environ, {}, clear=True):
+        assert Config().max_concurrency == 8
+
+
+def test_config_metrics_log() -> None:
+    """Test the metrics log is disabled unless a path is set."""
+    with patch.dict(os.environ, {"MINDTERM_METRICS_LOG": "/tmp/metrics.jsonl"}):
+        assert Config().metrics_log == "/tmp/metrics.jsonl"
+
+    with patch.dict(os.environ, {}, clear=True):
+        assert Config().metrics_log is None
+
+
+def test_config_prefetch() -> None:
+    """Test follow-up prefetch is opt-in with a per-answer token budget."""
+    with patch.dict(os.environ, {"MINDTERM_PREFETCH": "1"}):
+        config = Config()
+        assert config.prefetch is True
+        assert config.prefetch_tokens == 1000
+
+    with patch.dict(os.environ, {}, clear=True):
+        assert Config().prefetch is False
+
+
+def test_config_recall() -> None:
+    """Test recall of earlier answers is opt-in with a similarity threshold."""
+    with patch.dict(
+        os.environ, {"MINDTERM_RECALL": "1", "MINDTERM_RECALL_THRESHOLD": "0.9"}
+    ):
+        config = Config()
+        assert config.recall is True
+        assert config.recall_threshold == 0.9
+
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config()
+        assert config.recall is False
+        assert config.recall_threshold == 0.8
+
+
+def test_config_summarize() -> None:
+    """Test rolling summaries are opt-in with a threshold and turns kept."""
+    with patch.dict(
+        os.environ,
+        {
+            "MINDTERM_SUMMARIZE": "yes",
+            "MINDTERM_SUMMARIZE_AFTER": "1500",
+            "MINDTERM_SUMMARIZE_KEEP": "2",
+        },
+    ):
+        config = Config()
+        assert config.summarize is True
+        assert (config.summarize_after, config.summarize_keep) == (1500, 2)
+
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config()
+        assert config.summarize is False
+        assert (config.summarize_after, config.summarize_keep) == (3000, 4)
+
+
+def test_config_rate_limits() -> None:
+    """Test rate limits are off unless configured."""
+    with patch.dict(
+        os.environ,
+        {"MINDTERM_RPM": "500", "MINDTERM_TPM": "90000", "MINDTERM_RATE_SHARED": "1"},
+    ):
+        config = Config()
+        assert (config.rate_rpm, config.rate_tpm) == (500, 90000)
+        assert config.rate_shared is True
+
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config()
+        assert (config.rate_rpm, config.rate_tpm) == (0, 0)
+        assert config.rate_shared is False
+
+
+def test_config_streaming() -> None:
+    """Test stream batching and usage reporting settings."""
+    with patch.dict(
+        os.environ, {"MINDTERM_STREAM_BATCH_MS": "0", "MINDTERM_STREAM_USAGE": "0"}
+    ):
+        config = Config()
+        assert config.stream_batch_ms == 0
+        assert config.stream_usage is False
+
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config()
+        assert config.stream_batch_ms == 50
+        assert config.stream_usage is True
+
+
+CONFIG_FILE = """
+model = "file-model"
+read_timeout = 30
+profile = "fast"
+
+[profiles.fast]
+model = "fast-model"
+cache_enabled = true
+
+[profiles.local]
+base_url = "http://localhost:8000/v1"
+api_key_env = "LOCAL_API_KEY"
+read_timeout = 120
+"""
+
+
+def write_config(tmp_path, text: str = CONFIG_FILE) -> str:
+    """Write a config file and return its path."""
+    path = tmp_path / "config.toml"
+    path.write_text(text)
+    return str(path)
+
+
+def test_config_file_and_profile(tmp_path) -> None:
+    """Test the file's settings apply under its default profile."""
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config(write_config(tmp_path))
+    assert config.profile == "fast"
+    assert config.profiles == ["fast", "local"]
+    assert config.model == "fast-model"
+    assert config.read_timeout == 30
+    assert config.cache_enabled is True
+
+
+def test_config_layer_precedence(tmp_path) -> None:
+    """Test the environment overrides the file and flags override both."""
+    path = write_config(tmp_path)
+    with patch.dict(os.environ, {"OPENAI_MODEL": "env-model"}, clear=True):
+        assert Config(path).model == "env-model"
+        assert Config(path, overrides={"model": "flag-model"}).model == "flag-model"
+        config = Config(path, profile="default", overrides={"read_timeout": "5"})
+    assert config.profile is None
+    assert config.read_timeout == 5
+    assert config.cache_enabled is False
+
+
+def test_config_use_profile(tmp_path) -> None:
+    """Test switching profiles, including one reading its own API key."""
+    env = {"OPENAI_API_KEY": "main-key", "LOCAL_API_KEY": "local-key"}
+    with patch.dict(os.environ, env, clear=True):
+        config = Config(write_config(tmp_path))
+        config.use_profile("local")
+    assert config.profile == "local"
+    assert config.base_url == "http://localhost:8000/v1"
+    assert config.api_key == "local-key"
+    assert config.read_timeout == 120
+    assert config.model == "file-model"
+    assert config.cache_enabled is False
+
+
+def test_config_rejects_invalid_settings(tmp_path) -> None:
+    """Test unknown settings, bad values and missing profiles name their source."""
+    with patch.dict(os.environ, {}, clear=True):
+        with pytest.raises(ConfigError, match="Unknown setting 'modle'"):
+            Config(write_config(tmp_path, 'modle = "x"'))
+        with pytest.raises(ConfigError, match=r"read_timeout must be a number \(from"):
+            Config(write_config(tmp_path, 'read_timeout = "soon"'))
+        with pytest.raises(ConfigError, match="at least 1"):
+            Config(write_config(tmp_path, "max_concurrency = 0"))
+        with pytest.raises(ConfigError, match="Invalid config file"):
+            Config(write_config(tmp_path, "model = "))
+        with pytest.raises(ConfigError, match="command line"):
+            Config(str(tmp_path / "missing.toml"), overrides={"hedge": "maybe"})
+        with pytest.raises(ConfigError, match="No profile named 'slow'"):
+            Config(write_config(tmp_path), profile="slow")
+
+
+def test_config_failed_switch_keeps_settings(tmp_path) -> None:
+    """Test a failed profile switch leaves the active settings in place."""
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config(write_config(tmp_path))
+        with pytest.raises(ConfigError):
+            config.use_profile("slow")
+    assert (config.profile, config.model) == ("fast", "fast-model")
+
+
+def test_config_switch_replaces_settings_at_once(tmp_path) -> None:
+    """Test a switch swaps in new settings instead of changing them one by one."""
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config(write_config(tmp_path))
+        before = vars(config)
+        config.use_profile("default")
+    # A thread that read the old settings saw all of them unchanged
+    assert (before["profile"], before["model"]) == ("fast", "fast-model")
+    assert (config.profile, config.model) == (None, "file-model")
+
+
+def test_config_file_parsed_once_until_changed(tmp_path) -> None:
+    """Test the file is only parsed again after it changes."""
+    path = write_config(tmp_path)
+    with patch.dict(os.environ, {}, clear=True):
+        config = Config(path)
+        with patch("tomllib.load", side_effect=AssertionError) as mock_load:
+            Config(path)
+            assert config.refresh() is False
+        mock_load.assert_not_called()
+
+        with open(path, "a") as f:
+            f.write("\n[profiles.fast.extra]\n")
+        os.utime(path, ns=(0, 0))
+        assert config.stale()
+        with pytest.raises(ConfigError, match="fast"):
+            config.refresh()
+        # The broken file is reported once, then ignored until it changes again
+        assert not config.stale()
+        assert config.model == "fast-model"
+
+        write_config(tmp_path, CONFIG_FILE.replace("fast-model", "faster-model"))
+        os.utime(path, ns=(1, 1))
+        assert config.refresh() is True
+    assert config.model == "faster-model"
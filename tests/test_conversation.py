@@ -0,0 +1,89 @@
+"""Tests for the conversation module."""
+from mindterm.conversation import MESSAGE_OVERHEAD_TOKENS, Conversation, estimate_tokens
+
+
+def test_estimate_tokens() -> None:
+    """Test token estimates for ASCII and non-ASCII text."""
+    assert estimate_tokens("") == MESSAGE_OVERHEAD_TOKENS
+    assert estimate_tokens("abcdefgh") == 2 + MESSAGE_OVERHEAD_TOKENS
+    assert estimate_tokens("你好") == 2 + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_conversation_messages() -> None:
+    """Test messages include the system prompt and all turns in order."""
+    conversation = Conversation("system", budget=1000)
+    conversation.add_user("hi")
+    conversation.add_assistant("hello")
+    assert conversation.messages() == [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+
+
+def test_conversation_running_total() -> None:
+    """Test the token total is maintained as turns are added and removed."""
+    conversation = Conversation("system", budget=1000)
+    conversation.add_user("a" * 40)
+    conversation.add_assistant("b" * 80)
+    expected = sum(estimate_tokens(t) for t in ("system", "a" * 40, "b" * 80))
+    assert conversation.total_tokens == expected
+
+    conversation.pop()
+    assert conversation.total_tokens == expected - estimate_tokens("b" * 80)
+
+
+def test_conversation_trims_to_budget() -> None:
+    """Test the oldest turns are dropped and the history starts with a user turn."""
+    conversation = Conversation("s", budget=60)
+    for i in range(5):
+        conversation.add_user(f"question {i} " + "x" * 40)
+        conversation.add_assistant(f"answer {i} " + "y" * 40)
+
+    assert conversation.total_tokens <= 60
+    assert conversation.turns[0].role == "user"
+    assert conversation.turns[-1].content.startswith("answer 4")
+    assert conversation.trimmed > 0
+
+
+def test_conversation_keeps_latest_turn_over_budget() -> None:
+    """Test a single turn larger than the budget is still kept."""
+    conversation = Conversation("s", budget=10)
+    conversation.add_user("x" * 400)
+    assert len(conversation.turns) == 1
+
+
+def test_conversation_summary_and_reset() -> None:
+    """Test the summary is folded into the system message and reset clears it."""
+    conversation = Conversation("system", budget=1000)
+    conversation.set_summary("talked about tests")
+    conversation.add_user("hi")
+    assert "talked about tests" in conversation.messages()[0]["content"]
+
+    conversation.reset()
+    assert conversation.messages() == [{"role": "system", "content": "system"}]
+    assert conversation.total_tokens == estimate_tokens("system")
+
+
+def test_conversation_compact() -> None:
+    """Test the oldest turns are replaced by their summary."""
+    conversation = Conversation("system", budget=1000)
+    for i in range(3):
+        conversation.add_user(f"question {i} " + "x" * 200)
+        conversation.add_assistant(f"answer {i} " + "y" * 200)
+    before = conversation.total_tokens
+
+    conversation.compact(4, "asked two questions")
+
+    assert [turn.content[:10] for turn in conversation.turns] == [
+        "question 2",
+        "answer 2 y",
+    ]
+    assert conversation.summarized == 4
+    assert conversation.summary == "asked two questions"
+    assert conversation.total_tokens < before
+    assert conversation.total_tokens == (
+        estimate_tokens("system")
+        + estimate_tokens("asked two questions")
+        + sum(turn.tokens for turn in conversation.turns)
+    )
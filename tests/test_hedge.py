@@ -0,0 +1,161 @@
+"""Tests for the hedge module."""
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from mindterm.hedge import HedgeCancelled, Hedger
+from mindterm.router import Endpoint
+
+PRIMARY = Endpoint("primary", "http://primary/v1", "model", "key")
+ALTERNATE = Endpoint("alternate", "http://alternate/v1", "model", "key")
+
+
+def make_chunk(content: str | None) -> Mock:
+    """Build a chat completion chunk."""
+    chunk = Mock()
+    chunk.choices = [Mock()]
+    chunk.choices[0].delta.content = content
+    return chunk
+
+
+def fake_open_stream(delays: dict[str, float], fail: tuple[str, ...] = ()):
+    """Return an ``open_stream`` whose endpoints answer after a delay."""
+
+    def open_stream(endpoint: Endpoint) -> list[Mock]:
+        time.sleep(delays[endpoint.name])
+        if endpoint.name in fail:
+            raise ConnectionError(endpoint.name)
+        return [make_chunk(None), make_chunk(endpoint.name), make_chunk(" done")]
+
+    return open_stream
+
+
+def test_hedge_not_fired_for_fast_primary() -> None:
+    """Test a primary that answers within the delay is used on its own."""
+    hedger = Hedger(delay=0.5)
+    abort = Mock()
+    result = hedger.race(
+        PRIMARY,
+        ALTERNATE,
+        fake_open_stream({"primary": 0.0, "alternate": 0.0}),
+        abort,
+        threading.Event(),
+        [],
+    )
+    assert result.endpoint is PRIMARY
+    assert [c.choices[0].delta.content for c in result.stream] == [
+        None,
+        "primary",
+        " done",
+    ]
+    assert result.primary_wait is None
+    assert hedger.stats() == {
+        "requests": 1,
+        "hedges fired": 0,
+        "hedges won": 0,
+        "fire rate (%)": 0.0,
+    }
+    abort.assert_not_called()
+
+
+def test_hedge_wins_and_loser_is_aborted() -> None:
+    """Test a late primary is raced, the hedge wins and the primary is aborted."""
+    hedger = Hedger(delay=0.1)
+    abort = Mock()
+    start = time.perf_counter()
+    result = hedger.race(
+        PRIMARY,
+        ALTERNATE,
+        fake_open_stream({"primary": 0.5, "alternate": 0.0}),
+        abort,
+        threading.Event(),
+        [0.05, 1.0],
+    )
+    assert time.perf_counter() - start < 0.4
+    assert result.endpoint is ALTERNATE
+    assert result.primary_wait is not None and result.primary_wait >= 0.1
+
+    # The primary's response is aborted as soon as it arrives
+    time.sleep(0.6)
+    abort.assert_called_once()
+    stats = hedger.stats()
+    assert stats["hedges fired"] == 1
+    assert stats["hedges won"] == 1
+    assert 0.6 < stats["est. latency saved (s)"] < 0.9
+
+
+def test_hedge_skipped_without_rate_limit_budget() -> None:
+    """Test no duplicate is sent when the rate limiter refuses it."""
+    hedger = Hedger(delay=0.05)
+    admit = Mock(return_value=False)
+    open_stream = Mock(side_effect=fake_open_stream({"primary": 0.2}))
+    result = hedger.race(
+        PRIMARY, ALTERNATE, open_stream, Mock(), threading.Event(), [], admit
+    )
+
+    assert result.endpoint is PRIMARY
+    admit.assert_called_once_with()
+    open_stream.assert_called_once_with(PRIMARY)
+    stats = hedger.stats()
+    assert stats["hedges fired"] == 0
+    assert stats["skipped (rate limit)"] == 1
+
+
+def test_hedge_primary_error_before_hedge() -> None:
+    """Test a primary that fails quickly raises without hedging."""
+    hedger = Hedger(delay=0.5)
+    with pytest.raises(ConnectionError, match="primary"):
+        hedger.race(
+            PRIMARY,
+            ALTERNATE,
+            fake_open_stream({"primary": 0.0, "alternate": 0.0}, fail=("primary",)),
+            Mock(),
+            threading.Event(),
+            [],
+        )
+    assert hedger.fired == 0
+
+
+def test_hedge_all_attempts_fail() -> None:
+    """Test the first error is raised when the primary and the hedge both fail."""
+    hedger = Hedger(delay=0.05)
+    with pytest.raises(ConnectionError, match="alternate"):
+        hedger.race(
+            PRIMARY,
+            ALTERNATE,
+            fake_open_stream(
+                {"primary": 0.3, "alternate": 0.0}, fail=("primary", "alternate")
+            ),
+            Mock(),
+            threading.Event(),
+            [],
+        )
+
+
+def test_hedge_cancelled() -> None:
+    """Test cancelling stops waiting for a first token."""
+    hedger = Hedger(delay=5.0)
+    cancelled = threading.Event()
+    threading.Timer(0.1, cancelled.set).start()
+    start = time.perf_counter()
+    with pytest.raises(HedgeCancelled):
+        hedger.race(
+            PRIMARY,
+            ALTERNATE,
+            fake_open_stream({"primary": 1.0, "alternate": 0.0}),
+            Mock(),
+            cancelled,
+            [],
+        )
+    assert time.perf_counter() - start < 0.5
+
+
+def test_hedge_delay_from_percentile() -> None:
+    """Test the delay follows recent TTFTs once there are enough of them."""
+    hedger = Hedger(delay=2.0, percentile=90)
+    assert hedger.delay([0.1] * 5) == 2.0
+    assert hedger.delay([0.1] * 9 + [0.5]) == 0.1
+    assert hedger.delay([0.1] * 8 + [0.5, 0.7]) == 0.5
+    assert Hedger(delay=2.0).delay([0.1] * 20) == 2.0
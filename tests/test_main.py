@@ -1,7 +1,14 @@
 """Tests for the main module."""
+import os
+import subprocess
+import sys
+import threading
+from collections.abc import Generator
 from unittest.mock import Mock, patch
 
 from mindterm import main
+from mindterm.codeblocks import CodeBlock
+from mindterm.config import Config
 
 
 @patch.dict("os.environ", {}, clear=True)
@@ -10,7 +17,7 @@ def test_run_invalid_config(mock_print) -> None:
     """Test run function with invalid configuration."""
     with patch("mindterm.main.config") as mock_config:
         mock_config.validate.return_value = False
-        main.run()
+        main.run([])
         mock_print.assert_called_once_with(
             "Error: OPENAI_API_KEY environment variable is not set."
         )
@@ -23,8 +30,9 @@ def test_run_client_initialization_error(mock_print) -> None:
     with patch("mindterm.main.config") as mock_config:
         with patch("mindterm.main.LLMClient") as mock_llm_client:
             mock_config.validate.return_value = True
+            mock_config.stale.return_value = False
             mock_llm_client.side_effect = ValueError("Test error")
-            main.run()
+            main.run([])
             mock_print.assert_called_once_with("Error initializing client: Test error")
 
 
@@ -35,13 +43,14 @@ def test_run_bye_command(mock_terminal_ui, _mock_llm_client) -> None:
     """Test run function with \\bye command."""
     with patch("mindterm.main.config") as mock_config:
         mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
 
         # Setup mocks
         mock_ui_instance = Mock()
         mock_terminal_ui.return_value = mock_ui_instance
         mock_ui_instance.get_user_input.return_value = "\\bye"
 
-        main.run()
+        main.run([])
 
         # Verify calls
         mock_ui_instance.display_welcome.assert_called_once()
@@ -56,13 +65,14 @@ def test_run_help_command(mock_terminal_ui, _mock_llm_client) -> None:
     """Test run function with \\help command."""
     with patch("mindterm.main.config") as mock_config:
         mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
 
         # Setup mocks to simulate one \\help then \\bye
         mock_ui_instance = Mock()
         mock_terminal_ui.return_value = mock_ui_instance
         mock_ui_instance.get_user_input.side_effect = ["\\help", "\\bye"]
 
-        main.run()
+        main.run([])
 
         # Verify calls
         mock_ui_instance.display_welcome.assert_called_once()
@@ -78,13 +88,14 @@ def test_run_eof_error(mock_terminal_ui, _mock_llm_client) -> None:
     """Test run function with EOFError."""
     with patch("mindterm.main.config") as mock_config:
         mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
 
         # Setup mocks
         mock_ui_instance = Mock()
         mock_terminal_ui.return_value = mock_ui_instance
         mock_ui_instance.get_user_input.side_effect = EOFError()
 
-        main.run()
+        main.run([])
 
         # Verify calls
         mock_ui_instance.display_welcome.assert_called_once()
@@ -99,13 +110,14 @@ def test_run_keyboard_interrupt(mock_terminal_ui, _mock_llm_client) -> None:
     """Test run function with KeyboardInterrupt."""
     with patch("mindterm.main.config") as mock_config:
         mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
 
         # Setup mocks to simulate KeyboardInterrupt then \\bye
         mock_ui_instance = Mock()
         mock_terminal_ui.return_value = mock_ui_instance
         mock_ui_instance.get_user_input.side_effect = [KeyboardInterrupt(), "\\bye"]
 
-        main.run()
+        main.run([])
 
         # Verify calls
         mock_ui_instance.display_welcome.assert_called_once()
@@ -120,6 +132,7 @@ def test_run_normal_command(mock_terminal_ui, mock_llm_client) -> None:
     """Test run function with normal command."""
     with patch("mindterm.main.config") as mock_config:
         mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
 
         # Setup mocks
         mock_ui_instance = Mock()
@@ -129,8 +142,12 @@ def test_run_normal_command(mock_terminal_ui, mock_llm_client) -> None:
         mock_client_instance = Mock()
         mock_llm_client.return_value = mock_client_instance
         mock_client_instance.get_completion.return_value = []
+        mock_client_instance.recall.return_value = None
+        mock_client_instance.cancelled = False
+        mock_client_instance.last_stream = None
+        mock_client_instance.last_error = None
 
-        main.run()
+        main.run([])
 
         # Verify calls
         mock_ui_instance.display_welcome.assert_called_once()
@@ -138,3 +155,395 @@ def test_run_normal_command(mock_terminal_ui, mock_llm_client) -> None:
         mock_client_instance.get_completion.assert_called_once_with("Hello")
         mock_ui_instance.display_streamed_response.assert_called_once_with([])
         mock_ui_instance.display_goodbye.assert_called_once()
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_stats_command(mock_terminal_ui, mock_llm_client) -> None:
+    """Test run function with \\stats command."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = ["\\stats", "\\bye"]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+        mock_client_instance.stats.return_value = {"Cache": {"hits": 1}}
+
+        main.run([])
+
+        mock_ui_instance.display_stats.assert_called_once_with({"Cache": {"hits": 1}})
+        mock_client_instance.get_completion.assert_not_called()
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_chat_command(mock_terminal_ui, mock_llm_client) -> None:
+    """Test run function with \\chat command."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = ["\\chat", "\\bye"]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+
+        main.run([])
+
+        mock_client_instance.reset_conversation.assert_called_once()
+        mock_ui_instance.display_new_conversation.assert_called_once()
+        mock_client_instance.get_completion.assert_not_called()
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_sessions_and_resume_commands(mock_terminal_ui, mock_llm_client) -> None:
+    """Test run function with \\sessions and \\resume commands."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = [
+            "\\sessions",
+            "\\resume 2",
+            "\\resume 9",
+            "\\resume x",
+            "\\bye",
+        ]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+        mock_client_instance.sessions.list_sessions.return_value = []
+        mock_client_instance.resume_session.side_effect = [4, KeyError(9)]
+
+        main.run([])
+
+        mock_ui_instance.display_sessions.assert_called_once_with([])
+        assert mock_client_instance.resume_session.call_count == 2
+        notices = [c.args[0] for c in mock_ui_instance.display_notice.call_args_list]
+        assert notices == [
+            "Resumed session 2 (4 turns).",
+            "No saved session with id 9.",
+            "Usage: \\resume <id>",
+        ]
+        mock_client_instance.get_completion.assert_not_called()
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_attach_command(mock_terminal_ui, mock_llm_client) -> None:
+    """Test run function with \\attach command."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = [
+            "\\attach logs/*.log",
+            "\\attach missing.txt",
+            "\\attach",
+            "\\bye",
+        ]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+        attachments = [Mock()]
+        mock_client_instance.attach.side_effect = [
+            attachments,
+            ValueError("No files match missing.txt"),
+        ]
+
+        main.run([])
+
+        assert [c.args for c in mock_client_instance.attach.call_args_list] == [
+            ("logs/*.log",),
+            ("missing.txt",),
+        ]
+        mock_ui_instance.display_attachments.assert_called_once_with(attachments)
+        notices = [c.args[0] for c in mock_ui_instance.display_notice.call_args_list]
+        assert notices == [
+            "Could not attach missing.txt: No files match missing.txt",
+            "Usage: \\attach <path|glob>",
+        ]
+        mock_client_instance.get_completion.assert_not_called()
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_search_command(mock_terminal_ui, mock_llm_client) -> None:
+    """Test run function with \\search command."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = [
+            "\\search  sorting dicts ",
+            "\\search",
+            "\\bye",
+        ]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+        mock_client_instance.search.return_value = []
+
+        main.run([])
+
+        mock_client_instance.search.assert_called_once_with("sorting dicts")
+        mock_ui_instance.display_search_results.assert_called_once_with(
+            "sorting dicts", []
+        )
+        mock_ui_instance.display_notice.assert_called_once_with(
+            "Usage: \\search <query>", style="red"
+        )
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_ctrl_c_cancels_streaming_answer(mock_terminal_ui, mock_llm_client) -> None:
+    """Test the next prompt is read while an answer streams and Ctrl+C cancels it."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        streaming = threading.Event()
+        cancelled = threading.Event()
+
+        def get_completion(text: str) -> Generator[str, None, None]:
+            streaming.set()
+            cancelled.wait(timeout=5)
+            yield text
+
+        inputs = iter(["Hello", "   ", None, "\\bye"])
+
+        def user_input() -> str:
+            text = next(inputs)
+            if text is None:
+                # Ctrl+C at the prompt while the answer is still streaming
+                assert streaming.wait(timeout=5)
+                raise KeyboardInterrupt
+            return text
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = user_input
+        mock_ui_instance.display_streamed_response.side_effect = list
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+        mock_client_instance.get_completion.side_effect = get_completion
+        mock_client_instance.recall.return_value = None
+        mock_client_instance.cancel.side_effect = cancelled.set
+        mock_client_instance.cancelled = False
+        mock_client_instance.last_stream = None
+        mock_client_instance.last_error = None
+
+        main.run([])
+
+        mock_client_instance.cancel.assert_called_once()
+        mock_client_instance.get_completion.assert_called_once_with("Hello")
+        assert mock_ui_instance.live is False
+        mock_ui_instance.display_goodbye.assert_called_once()
+
+
+def test_import_defers_heavy_modules() -> None:
+    """Test importing the entry point does not load OpenAI or the Markdown renderer."""
+    code = (
+        "import sys, mindterm.main; "
+        "print(','.join(m for m in ('openai', 'httpx', 'rich.markdown', 'rich.live') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_fresh_command(mock_terminal_ui, mock_llm_client) -> None:
+    """Test \\fresh asks the model in place of a recalled answer."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = ["Hello", "\\fresh", "\\bye"]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+        match = Mock()
+        mock_client_instance.recall.return_value = match
+        mock_client_instance.forget_recalled.return_value = "Hello"
+        mock_client_instance.cancelled = False
+        mock_client_instance.last_stream = None
+        mock_client_instance.last_error = None
+        mock_client_instance.get_completion.return_value = []
+
+        main.run([])
+
+        mock_ui_instance.display_recalled.assert_called_once_with(match)
+        mock_client_instance.recall.assert_called_once_with("Hello")
+        mock_client_instance.get_completion.assert_called_once_with("Hello")
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_compare_command(mock_terminal_ui, mock_llm_client) -> None:
+    """Test \\compare streams a prompt from several models."""
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = [
+            "\\compare gpt-4o,o3-mini Why is the sky blue?",
+            "\\compare gpt-4o",
+            "\\bye",
+        ]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+        comparison = Mock(cancelled=False)
+        mock_client_instance.compare.return_value = comparison
+
+        main.run([])
+
+        mock_client_instance.compare.assert_called_once_with(
+            ["gpt-4o", "o3-mini"], "Why is the sky blue?"
+        )
+        mock_ui_instance.display_comparison.assert_called_once_with(comparison)
+        mock_ui_instance.display_notice.assert_called_once_with(
+            "Usage: \\compare <model>,<model>[,...] <prompt>", style="red"
+        )
+        mock_client_instance.get_completion.assert_not_called()
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"})
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_code_command(mock_terminal_ui, _mock_llm_client, tmp_path) -> None:
+    """Test \\code saves or copies a code block of the last answer."""
+    path = tmp_path / "hello.py"
+    with patch("mindterm.main.config") as mock_config:
+        mock_config.validate.return_value = True
+        mock_config.stale.return_value = False
+
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.code_blocks = [
+            CodeBlock("sh", "ls"),
+            CodeBlock("python", "print('hi')"),
+        ]
+        mock_ui_instance.get_user_input.side_effect = [
+            f"\\code 2 {path}",
+            "\\code",
+            "\\code 3",
+            "\\bye",
+        ]
+        with patch("mindterm.main.copy_to_clipboard") as mock_copy:
+            main.run([])
+
+        assert path.read_text() == "print('hi')\n"
+        mock_copy.assert_called_once_with("ls", mock_ui_instance.console.file)
+        notices = [c.args[0] for c in mock_ui_instance.display_notice.call_args_list]
+        assert notices == [
+            f"Copied code block 2 (python, 1 line) to {path}.",
+            "Copied code block 1 (sh, 1 line) to the clipboard.",
+            "The last answer has only 2 code blocks.",
+        ]
+
+
+def test_parse_args_config_flags() -> None:
+    """Test the config file, profile, model and settings flags."""
+    args = main.parse_args(
+        ["--config", "c.toml", "--profile", "fast", "-m", "m", "--set", "hedge=1"]
+    )
+    assert (args.config, args.profile, args.model) == ("c.toml", "fast", "m")
+    assert args.settings == [("hedge", "1")]
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}, clear=True)
+@patch("builtins.print")
+def test_run_invalid_config_file(mock_print, tmp_path) -> None:
+    """Test an invalid config file is reported before anything starts."""
+    path = tmp_path / "config.toml"
+    path.write_text("read_timeout = -1\n")
+    with patch("mindterm.main.LLMClient") as mock_llm_client:
+        main.run(["--config", str(path)])
+    mock_llm_client.assert_not_called()
+    assert "read_timeout must be at least 0" in mock_print.call_args.args[0]
+
+
+@patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}, clear=True)
+@patch("mindterm.main.LLMClient")
+@patch("mindterm.main.TerminalUI")
+def test_run_profile_command(mock_terminal_ui, mock_llm_client, tmp_path) -> None:
+    """Test \\profile lists profiles and switches between them live."""
+    path = tmp_path / "config.toml"
+    path.write_text(
+        '[profiles.fast]\nmodel = "fast-model"\n\n'
+        '[profiles.local]\napi_key_env = "UNSET_KEY"\n'
+    )
+    with patch("mindterm.main.config", Config(str(path))) as config:
+        mock_ui_instance = Mock()
+        mock_terminal_ui.return_value = mock_ui_instance
+        mock_ui_instance.get_user_input.side_effect = [
+            "\\profile",
+            "\\profile fast",
+            "\\profile local",
+            "\\profile slow",
+            "\\bye",
+        ]
+        mock_client_instance = Mock()
+        mock_llm_client.return_value = mock_client_instance
+
+        main.run(["--config", str(path)])
+
+        assert config.profile == "fast"
+        mock_client_instance.reconfigure.assert_called_once_with()
+        notices = [c.args[0] for c in mock_ui_instance.display_notice.call_args_list]
+        assert notices[0] == "Profiles: default (active), fast, local"
+        assert notices[1].startswith("Switched to profile fast (fast-model at ")
+        assert notices[2] == "Profile local has no API key."
+        assert notices[3] == f"No profile named 'slow' in {path}"
+
+
+@patch.dict("os.environ", {}, clear=True)
+def test_reload_config_keeps_settings_without_api_key(tmp_path) -> None:
+    """Test an edit that drops the API key leaves the settings and client alone."""
+    path = tmp_path / "config.toml"
+    path.write_text('api_key = "file-key"\nmodel = "first-model"\n')
+    client, ui = Mock(), Mock()
+    with patch("mindterm.main.config", Config(str(path))) as config:
+        path.write_text('model = "second-model"\n')
+        os.utime(path, ns=(0, 0))
+        main.reload_config(client, ui)
+        assert (config.api_key, config.model) == ("file-key", "first-model")
+        client.reconfigure.assert_not_called()
+        ui.display_notice.assert_called_once_with(
+            f"Kept the previous settings: {path} sets no API key", style="red"
+        )
+
+        # The rejected edit is not read again until the file changes
+        main.reload_config(client, ui)
+        assert ui.display_notice.call_count == 1
+
+        path.write_text('api_key = "file-key"\nmodel = "second-model"\n')
+        os.utime(path, ns=(1, 1))
+        main.reload_config(client, ui)
+        assert config.model == "second-model"
+        client.reconfigure.assert_called_once_with()
+        ui.display_notice.assert_called_with(f"Reloaded {path}.")
@@ -0,0 +1,69 @@
+"""Tests for the metrics module."""
+import json
+import time
+
+from mindterm.metrics import MetricsRecorder, RequestMetrics, percentile
+
+
+def test_percentile() -> None:
+    """Test nearest-rank percentiles."""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_request_metrics_splits_network_and_render_time() -> None:
+    """Test waiting on the stream and holding chunks are timed separately."""
+
+    def slow_stream():
+        for text in ["a", "b", "c"]:
+            time.sleep(0.02)
+            yield text
+
+    metrics = RequestMetrics("test-model")
+    reply = []
+    for text in metrics.timed(slow_stream()):
+        metrics.chunk(text)
+        reply.append(text)
+        time.sleep(0.01)
+    metrics.finish("".join(reply))
+
+    assert metrics.chunks == 3
+    assert len(metrics.gaps) == 2
+    assert metrics.ttft is not None and metrics.ttft >= 0.02
+    assert metrics.network_time >= 0.06
+    assert 0.03 <= metrics.render_time < metrics.network_time
+    assert metrics.total_time >= metrics.network_time + metrics.render_time
+    assert metrics.tokens > 0
+    assert metrics.tokens_per_second > 0
+
+
+def test_metrics_recorder_summary_and_log(tmp_path) -> None:
+    """Test aggregate statistics and one JSONL record per request."""
+    log_path = tmp_path / "logs" / "metrics.jsonl"
+    recorder = MetricsRecorder(str(log_path))
+    assert recorder.summary() == {"requests": 0}
+
+    for ttft in (0.1, 0.3):
+        metrics = RequestMetrics("test-model", ttft=ttft, gaps=[0.01, 0.03])
+        metrics.network_time = 0.8
+        metrics.render_time = 0.2
+        metrics.total_time = 1.0
+        metrics.tokens = 18
+        recorder.record(metrics)
+
+    summary = recorder.summary()
+    assert summary["requests"] == 2
+    assert summary["TTFT p50 (s)"] == 0.1
+    assert summary["TTFT p95 (s)"] == 0.3
+    assert summary["chunk gap max (ms)"] == 30.0
+    assert summary["render share (%)"] == 20.0
+    assert summary["cancelled"] == 0
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert [r["ttft"] for r in records] == [0.1, 0.3]
+    assert records[0]["gaps"] == [0.01, 0.03]
+    assert records[0]["model"] == "test-model"
@@ -0,0 +1,54 @@
+"""Tests for the pacing module."""
+import io
+
+from mindterm.pacing import MIN_REFRESH_PER_SECOND, FrameScheduler, TerminalOutput
+
+
+def test_scheduler_starts_at_configured_rate() -> None:
+    """Test frames are due one refresh interval apart."""
+    scheduler = FrameScheduler(10)
+    assert scheduler.delay(0.0) == 0.0
+    scheduler.record(1.0, 0.001, 0.001)
+    assert scheduler.rate == 10
+    assert abs(scheduler.delay(1.05) - 0.05) < 1e-9
+    assert scheduler.delay(1.1) == 0.0
+
+
+def test_scheduler_slows_down_for_expensive_frames() -> None:
+    """Test slow frames stretch the interval, within the slowest rate."""
+    scheduler = FrameScheduler(15)
+    scheduler.record(0.0, 0.01, 0.03)
+    assert abs(scheduler.interval - 0.16) < 1e-9
+    for i in range(20):
+        scheduler.record(float(i), 0.0, 2.0)
+    assert scheduler.rate == MIN_REFRESH_PER_SECOND
+
+
+def test_scheduler_recovers_when_frames_get_cheap() -> None:
+    """Test the configured rate returns once frames are cheap again."""
+    scheduler = FrameScheduler(15)
+    scheduler.record(0.0, 0.0, 0.2)
+    assert scheduler.rate < 15
+    for i in range(30):
+        scheduler.record(float(i), 0.001, 0.0)
+    assert scheduler.rate == 15
+
+
+def test_scheduler_set_rate_keeps_measurements() -> None:
+    """Test a new configured rate is still limited by the frame cost."""
+    scheduler = FrameScheduler(15)
+    scheduler.record(0.0, 0.05, 0.0)
+    scheduler.set_rate(30)
+    assert abs(scheduler.interval - 0.2) < 1e-9
+    assert scheduler.stats()["frames drawn"] == 1
+
+
+def test_terminal_output_counts_bytes() -> None:
+    """Test encoded bytes are counted and other calls reach the file."""
+    file = io.StringIO()
+    output = TerminalOutput(file)
+    output.write("héllo\n")
+    output.flush()
+    assert file.getvalue() == "héllo\n"
+    assert (output.bytes_written, output.writes) == (7, 1)
+    assert output.isatty() is False
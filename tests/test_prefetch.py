@@ -0,0 +1,136 @@
+"""Tests for the prefetch module."""
+import threading
+import time
+from collections.abc import Iterator
+from unittest.mock import Mock
+
+from mindterm.prefetch import Prefetcher, parse_suggestions
+from mindterm.router import Endpoint
+
+ENDPOINT = Endpoint("default", "http://localhost/v1", "model", "key")
+MESSAGES = [
+    {"role": "system", "content": "system"},
+    {"role": "user", "content": "What is a deque?"},
+    {"role": "assistant", "content": "A double-ended queue."},
+]
+
+
+def make_chunk(content: str | None) -> Mock:
+    """Build a chat completion chunk."""
+    chunk = Mock()
+    chunk.choices = [Mock()]
+    chunk.choices[0].delta.content = content
+    return chunk
+
+
+class FakeStreams:
+    """Answer suggestion requests with fixed questions and prompts word by word."""
+
+    def __init__(self, suggestions: str, words: int = 5, delay: float = 0.0) -> None:
+        self.suggestions = suggestions
+        self.words = words
+        self.delay = delay
+        self.opened: list[str] = []
+
+    def __call__(self, endpoint: Endpoint, messages, max_tokens) -> Iterator[Mock]:
+        prompt = messages[-1]["content"]
+        self.opened.append(prompt)
+        if max_tokens is not None:
+            return iter([make_chunk(self.suggestions)])
+        return self._answer(prompt)
+
+    def _answer(self, prompt: str) -> Iterator[Mock]:
+        for i in range(self.words):
+            time.sleep(self.delay)
+            yield make_chunk(f"{prompt} {i} ")
+
+
+def start_round(prefetcher: Prefetcher) -> list[str]:
+    """Start a prefetch round and wait for its suggestions."""
+    ready = threading.Event()
+    received: list[str] = []
+
+    def on_suggestions(suggestions: list[str]) -> None:
+        received.extend(suggestions)
+        ready.set()
+
+    prefetcher.start(MESSAGES, on_suggestions)
+    assert ready.wait(timeout=5)
+    return received
+
+
+def test_parse_suggestions() -> None:
+    """Test list markers, quotes and duplicates are removed."""
+    text = '1. Why?\n\n- "How fast is it?"\n2) Why?\n* Show code\n* Extra'
+    assert parse_suggestions(text, 3) == ["Why?", "How fast is it?", "Show code"]
+
+
+def test_prefetched_answer_is_taken() -> None:
+    """Test a picked suggestion replays its prefetched answer."""
+    streams = FakeStreams("Why?\nHow?")
+    prefetcher = Prefetcher(lambda: ENDPOINT, streams, Mock(), budget=100)
+    assert start_round(prefetcher) == ["Why?", "How?"]
+    assert prefetcher.suggestions == ["Why?", "How?"]
+
+    messages = [*MESSAGES, {"role": "user", "content": "How?"}]
+    answer = prefetcher.take("How?", messages)
+    assert answer is not None
+    assert answer.endpoint is ENDPOINT
+    text = "".join(c.choices[0].delta.content for c in answer.replay())
+    assert text == "How? 0 How? 1 How? 2 How? 3 How? 4 "
+    assert prefetcher.suggestions == []
+
+    stats = prefetcher.stats()
+    assert stats["answers prefetched"] == 2
+    assert stats["picked"] == 1
+
+
+def test_prefetched_answer_requires_same_conversation() -> None:
+    """Test an answer prefetched for another conversation is not used."""
+    prefetcher = Prefetcher(lambda: ENDPOINT, FakeStreams("Why?"), Mock(), budget=100)
+    start_round(prefetcher)
+    messages = [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": "Why?"},
+    ]
+    assert prefetcher.take("Why?", messages) is None
+    assert prefetcher.stats()["picked"] == 0
+
+
+def test_prefetch_stops_at_budget() -> None:
+    """Test a speculative answer is aborted and discarded at its token budget."""
+    abort = Mock()
+    streams = FakeStreams("Why?", words=50)
+    prefetcher = Prefetcher(lambda: ENDPOINT, streams, abort, budget=10)
+    start_round(prefetcher)
+    time.sleep(0.2)
+
+    messages = [*MESSAGES, {"role": "user", "content": "Why?"}]
+    assert prefetcher.take("Why?", messages) is None
+    abort.assert_called_once()
+    assert prefetcher.stats()["stopped at budget"] == 1
+
+
+def test_promoted_answer_streams_past_budget() -> None:
+    """Test an answer picked while streaming is joined and not capped."""
+    streams = FakeStreams("Why?", words=20, delay=0.02)
+    prefetcher = Prefetcher(lambda: ENDPOINT, streams, Mock(), budget=15)
+    start_round(prefetcher)
+
+    messages = [*MESSAGES, {"role": "user", "content": "Why?"}]
+    answer = prefetcher.take("Why?", messages)
+    assert answer is not None
+    assert len(list(answer.replay())) == 20
+    assert answer.tokens > 15
+
+
+def test_discard_aborts_prefetches() -> None:
+    """Test discarding a round stops its in-flight answers."""
+    abort = Mock()
+    streams = FakeStreams("Why?\nHow?", words=100, delay=0.05)
+    prefetcher = Prefetcher(lambda: ENDPOINT, streams, abort, budget=1000)
+    start_round(prefetcher)
+    time.sleep(0.1)
+    prefetcher.discard()
+    assert abort.call_count == 2
+    assert prefetcher.suggestions == []
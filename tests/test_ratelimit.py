@@ -0,0 +1,165 @@
+"""Tests for the ratelimit module."""
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+from unittest.mock import patch
+
+import pytest
+
+from mindterm.ratelimit import (
+    BACKGROUND,
+    INTERACTIVE,
+    MAX_RETRY_AFTER,
+    RateLimiter,
+    exhausted_for,
+    parse_duration,
+    retry_after,
+)
+
+
+class FakeClock:
+    """Controllable replacement for ``time.time``."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Patch the rate limiter's wall clock."""
+    fake = FakeClock()
+    with patch("mindterm.ratelimit.time.time", fake):
+        yield fake
+
+
+def test_parse_duration() -> None:
+    """Test the duration formats used by rate-limit headers."""
+    assert parse_duration("1.5") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1h2m3.5s") == 3723.5
+    assert parse_duration("soon") is None
+    assert parse_duration("") is None
+
+
+def test_retry_after_headers() -> None:
+    """Test the wait is read from Retry-After and the reset headers."""
+    assert retry_after({"retry-after-ms": "250", "retry-after": "9"}) == 0.25
+    assert retry_after({"retry-after": "2"}) == 2
+    date = formatdate(time.time() + 30, usegmt=True)
+    assert retry_after({"retry-after": date}) == pytest.approx(30, abs=2)
+    assert retry_after(
+        {"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6m0s"}
+    ) == min(360, MAX_RETRY_AFTER)
+    assert retry_after({}) is None
+
+
+def test_exhausted_for() -> None:
+    """Test only a quota reported as used up pauses requests."""
+    headers = {
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "3s",
+        "x-ratelimit-remaining-tokens": "900",
+        "x-ratelimit-reset-tokens": "30s",
+    }
+    assert exhausted_for(headers) == 3
+    assert exhausted_for({"x-ratelimit-remaining-requests": "5"}) is None
+
+
+def test_request_bucket_refills(clock: FakeClock) -> None:
+    """Test requests per minute are admitted at the configured rate."""
+    limiter = RateLimiter(rpm=60, tpm=0)
+    for _ in range(60):
+        assert limiter.try_acquire(100) == 0
+    assert limiter.try_acquire(100) == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.try_acquire(100) == 0
+
+
+def test_token_bucket_and_settle(clock: FakeClock) -> None:
+    """Test tokens per minute are enforced and corrected after a request."""
+    limiter = RateLimiter(rpm=0, tpm=6000)
+    assert limiter.try_acquire(5000) == 0
+    assert limiter.try_acquire(2000) == pytest.approx(10.0)
+    # The request used fewer tokens than were reserved
+    limiter.settle(5000, 1000)
+    assert limiter.try_acquire(2000) == 0
+    # A request larger than the bucket waits for a full bucket only
+    assert limiter.try_acquire(10_000) == pytest.approx(30.0)
+    clock.now += 30.0
+    assert limiter.try_acquire(10_000) == 0
+
+
+def test_background_yields_to_interactive(clock: FakeClock) -> None:
+    """Test background requests keep a reserve and wait for interactive ones."""
+    limiter = RateLimiter(rpm=10, tpm=0)
+    for _ in range(8):
+        assert limiter.try_acquire(1, BACKGROUND) == 0
+    # The last 20% of the bucket is kept for interactive requests
+    assert limiter.try_acquire(1, BACKGROUND) > 0
+    assert limiter.try_acquire(1, INTERACTIVE) == 0
+    assert limiter.try_acquire(1, INTERACTIVE) == 0
+    # An interactive request waiting for budget holds background ones back
+    assert limiter.try_acquire(1, INTERACTIVE) > 0
+    clock.now += 0.5
+    assert limiter.try_acquire(1, BACKGROUND) > 0
+    clock.now += 60
+    assert limiter.try_acquire(1, BACKGROUND) == 0
+
+
+def test_rate_limited_blocks_all_requests(clock: FakeClock) -> None:
+    """Test a 429 pauses requests until its Retry-After has passed."""
+    limiter = RateLimiter(rpm=100, tpm=0)
+    assert limiter.rate_limited({"retry-after": "5"}) == 5
+    assert limiter.try_acquire(1) == pytest.approx(5)
+    limiter.observe({"x-ratelimit-remaining-requests": "0"})
+    clock.now += 5
+    assert limiter.try_acquire(1) == 0
+    assert limiter.stats()["rate limited (429)"] == 1
+
+
+def test_shared_state_across_limiters(clock: FakeClock, tmp_path) -> None:
+    """Test limiters with the same state file share their buckets."""
+    path = str(tmp_path / "state" / "ratelimit.json")
+    first = RateLimiter(rpm=2, tpm=0, state_path=path)
+    second = RateLimiter(rpm=2, tpm=0, state_path=path)
+    assert first.try_acquire(1) == 0
+    assert second.try_acquire(1) == 0
+    assert first.try_acquire(1) > 0
+    second.block(10)
+    clock.now += 60
+    assert first.try_acquire(1) == 0
+
+    # A torn state file starts over with full buckets
+    with open(path, "w") as f:
+        f.write('{"requests": ')
+    assert second.try_acquire(1) == 0
+
+
+def test_acquire_waits_and_can_be_cancelled() -> None:
+    """Test acquire sleeps until the budget allows and stops when cancelled."""
+    limiter = RateLimiter(rpm=600, tpm=0)
+    limiter.block(0.2)
+    start = time.monotonic()
+    assert limiter.acquire(1)
+    assert time.monotonic() - start >= 0.15
+    assert limiter.stats()["delayed"] == 1
+
+    limiter.block(60)
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    assert not limiter.acquire(1, cancel=cancel)
+
+
+def test_acquire_async() -> None:
+    """Test async acquisition waits out a block."""
+    limiter = RateLimiter(rpm=600, tpm=0)
+    limiter.block(0.1)
+    start = time.monotonic()
+    asyncio.run(limiter.acquire_async(1))
+    assert time.monotonic() - start >= 0.05
+    assert limiter.stats()["requests"] == 1
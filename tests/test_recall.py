@@ -0,0 +1,116 @@
+"""Tests for the recall module."""
+import random
+from unittest.mock import patch
+
+from mindterm.recall import BINS, RecallIndex, band_keys, signature, similarity
+
+PROMPT = "How do I reverse a list in Python without copying it?"
+
+
+def test_signature_normalizes_and_rejects_short_prompts() -> None:
+    """Test casing and punctuation do not change a signature."""
+    values = signature(PROMPT)
+    assert values is not None and len(values) == BINS
+    assert signature("how do i REVERSE a list, in python without copying it") == values
+    assert signature("hi there") is None
+    assert len(band_keys(values)) == 10
+
+
+def test_similarity_separates_near_duplicates() -> None:
+    """Test near-duplicates score high and unrelated prompts low."""
+    values = signature(PROMPT)
+    near = signature("How do I reverse a list in Python without copying it first?")
+    other = signature("What is the capital city of Australia and why?")
+    assert values is not None and near is not None and other is not None
+    assert similarity(values, values) == 1.0
+    assert similarity(values, near) >= 0.8
+    assert similarity(values, other) < 0.3
+    # Matches a plain bin-by-bin comparison
+    assert similarity(values, near) == (
+        sum(a == b for a, b in zip(values, near, strict=True)) / BINS
+    )
+
+
+def test_recall_index_add_and_lookup(tmp_path) -> None:
+    """Test a near-duplicate prompt recalls the stored answer."""
+    index = RecallIndex(str(tmp_path))
+    assert index.add(PROMPT, "Use list.reverse().")
+    assert not index.add("hi", "Hello!")
+    index.add("What is the capital city of Australia?", "Canberra.")
+
+    match = index.lookup("how do i reverse a list in python without copying it!")
+    assert match is not None
+    assert match.prompt == PROMPT
+    assert match.answer == "Use list.reverse()."
+    assert match.similarity >= 0.8
+    assert index.lookup("Explain the difference between TCP and UDP.") is None
+    assert index.lookup("hi") is None
+
+    stats = index.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 1
+    index.close()
+
+
+def test_recall_index_prefers_newest_answer(tmp_path) -> None:
+    """Test the newest answer to the same prompt is recalled."""
+    index = RecallIndex(str(tmp_path))
+    index.add(PROMPT, "old answer")
+    index.add(PROMPT, "new answer")
+    match = index.lookup(PROMPT)
+    assert match is not None and match.answer == "new answer"
+    index.close()
+
+
+def test_recall_index_persists_and_merges(tmp_path) -> None:
+    """Test entries survive a reopen, both merged and unmerged."""
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(500)]
+    prompts = [" ".join(rng.choices(words, k=12)) for _ in range(50)]
+    with patch("mindterm.recall.MERGE_AFTER", 16):
+        index = RecallIndex(str(tmp_path))
+        pairs = [(prompt, f"answer {i}") for i, prompt in enumerate(prompts)]
+        assert index.add_many(pairs) == len(index) == 50
+        # Reopen without closing, leaving the last entries unmerged
+        reopened = RecallIndex(str(tmp_path))
+        for i, prompt in enumerate(prompts):
+            match = reopened.lookup(prompt)
+            assert match is not None and match.answer == f"answer {i}"
+        reopened.close()
+        index.close()
+
+
+def test_recall_index_ignores_torn_signature(tmp_path) -> None:
+    """Test a partly written signature is dropped on reopen."""
+    index = RecallIndex(str(tmp_path))
+    index.add(PROMPT, "Use list.reverse().")
+    index.close()
+    with open(tmp_path / "signatures.bin", "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    reopened = RecallIndex(str(tmp_path))
+    assert len(reopened) == 1
+    assert reopened.lookup(PROMPT) is not None
+    reopened.close()
+
+
+def test_recall_index_shared_between_processes(tmp_path) -> None:
+    """Test two indexes on one directory keep distinct ids and see each other."""
+    first = RecallIndex(str(tmp_path))
+    second = RecallIndex(str(tmp_path))
+    first.add(PROMPT, "Use list.reverse().")
+    second.add("What is the capital city of Australia?", "Canberra.")
+    first.add("Explain the difference between TCP and UDP.", "Reliability.")
+
+    match = second.lookup(PROMPT)
+    assert match is not None and match.answer == "Use list.reverse()."
+    match = first.lookup("What is the capital city of Australia?")
+    assert match is not None and match.answer == "Canberra."
+    assert len(first) == 3
+    first.close()
+    second.close()
+
+    reopened = RecallIndex(str(tmp_path))
+    match = reopened.lookup("Explain the difference between TCP and UDP.")
+    assert match is not None and match.answer == "Reliability."
+    reopened.close()
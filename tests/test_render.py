@@ -0,0 +1,256 @@
+"""Tests for the render module."""
+import io
+import time
+
+from rich.console import Console
+from rich.markdown import Markdown
+from rich.syntax import Syntax
+
+from mindterm.codeblocks import CodeBlock
+from mindterm.pacing import TerminalOutput
+from mindterm.render import (
+    HighlightedCode,
+    MarkdownBlockSplitter,
+    StreamingMarkdownRenderer,
+)
+
+
+def feed_all(splitter: MarkdownBlockSplitter, text: str, step: int = 3) -> list[str]:
+    """Feed text to a splitter in small chunks and collect completed blocks."""
+    blocks: list[str] = []
+    for i in range(0, len(text), step):
+        blocks.extend(splitter.feed(text[i : i + step]))
+    return blocks
+
+
+def test_splitter_freezes_closed_paragraphs() -> None:
+    """Test that a paragraph is completed once the next block starts."""
+    splitter = MarkdownBlockSplitter()
+    blocks = feed_all(splitter, "First line\nsecond line\n\nNext para")
+    assert blocks == ["First line\nsecond line"]
+    assert splitter.tail == "Next para"
+
+
+def test_splitter_keeps_paragraph_open_until_next_block() -> None:
+    """Test that a blank line alone does not complete a block."""
+    splitter = MarkdownBlockSplitter()
+    assert feed_all(splitter, "Para\n\n") == []
+    assert splitter.tail == "Para\n\n"
+
+
+def test_splitter_keeps_fenced_code_together() -> None:
+    """Test that blank lines inside a fenced code block do not split it."""
+    splitter = MarkdownBlockSplitter()
+    text = "Intro\n```python\ndef f():\n\n    return 1\n```\nAfter"
+    blocks = feed_all(splitter, text)
+    assert blocks == ["Intro", "```python\ndef f():\n\n    return 1\n```"]
+    assert splitter.tail == "After"
+
+
+def test_splitter_keeps_loose_lists_together() -> None:
+    """Test that list items separated by blank lines stay in one block."""
+    splitter = MarkdownBlockSplitter()
+    text = "- one\n\n- two\n\n  continued\n\nDone\n"
+    blocks = feed_all(splitter, text)
+    assert blocks == ["- one\n\n- two\n\n  continued"]
+    assert splitter.flush() == "Done\n"
+    assert splitter.tail == ""
+
+
+def test_splitter_nested_fence_in_list() -> None:
+    """Test that an indented fence inside a list does not end the list."""
+    splitter = MarkdownBlockSplitter()
+    text = "- item\n\n  ```\n  code\n\n  ```\n- next\n\nPara\n"
+    blocks = feed_all(splitter, text)
+    assert blocks == ["- item\n\n  ```\n  code\n\n  ```\n- next"]
+
+
+def test_streaming_renderer_matches_full_render() -> None:
+    """Test that incremental output contains the same text as a full render."""
+    text = "# Title\n\nSome *text* here.\n\n```\ncode\n```\n\nLast line."
+    output = io.StringIO()
+    console = Console(file=output, width=60, color_system=None)
+
+    with StreamingMarkdownRenderer(console) as renderer:
+        for i in range(0, len(text), 4):
+            renderer.feed(text[i : i + 4])
+
+    expected = io.StringIO()
+    Console(file=expected, width=60, color_system=None).print(Markdown(text))
+
+    def words(value: str) -> list[str]:
+        return value.split()
+
+    assert words(output.getvalue()) == words(expected.getvalue())
+
+
+def test_streaming_renderer_without_live_region() -> None:
+    """Test that blocks are printed as they complete when live is off."""
+    output = io.StringIO()
+    console = Console(file=output, width=60, color_system=None)
+
+    with StreamingMarkdownRenderer(console, live=False) as renderer:
+        renderer.feed("First paragraph.\n\nSecond ")
+        assert "First paragraph." in output.getvalue()
+        assert "Second" not in output.getvalue()
+        renderer.feed("paragraph.")
+
+    assert output.getvalue().split() == [
+        "First",
+        "paragraph.",
+        "Second",
+        "paragraph.",
+    ]
+
+
+def test_splitter_release_code_block() -> None:
+    """Test lines of an open code block are released behind its opening fence."""
+    splitter = MarkdownBlockSplitter()
+    splitter.feed("```python\n" + "".join(f"x = {i}\n" for i in range(6)))
+    assert splitter.in_code
+    assert splitter.code_language == "python"
+
+    assert splitter.release(keep=2) == "x = 0\nx = 1\nx = 2\nx = 3\n"
+    assert splitter.continued
+    assert splitter.tail == "```python\nx = 4\nx = 5\n"
+    assert splitter.feed("```\n") == ["```python\nx = 4\nx = 5\n```"]
+    assert not splitter.continued
+
+
+def test_splitter_release_list_at_item_boundary() -> None:
+    """Test a list is only cut between top-level items."""
+    splitter = MarkdownBlockSplitter()
+    splitter.feed("- one\n  more\n- two\n  more\n- three\n")
+    assert splitter.release(keep=2) == "- one\n  more\n"
+    assert splitter.tail == "- two\n  more\n- three\n"
+
+
+def test_splitter_release_keeps_tables_whole() -> None:
+    """Test blocks that cannot be split are kept open."""
+    splitter = MarkdownBlockSplitter()
+    splitter.feed("| a | b |\n| - | - |\n| 1 | 2 |\n| 3 | 4 |\n")
+    assert splitter.release(keep=1) == ""
+    assert splitter.open_lines == 4
+
+
+def test_streaming_renderer_bounds_long_blocks() -> None:
+    """Test a very long block is committed in pieces and looks the same."""
+    code = "".join(f"value_{i} = compute({i})\n" for i in range(500))
+    text = f"Intro.\n\n```python\n{code}```\n\n" + "\n".join(
+        f"line {i}" for i in range(500)
+    )
+    output = io.StringIO()
+    console = Console(file=output, width=60, color_system=None)
+
+    with StreamingMarkdownRenderer(console, window=20) as renderer:
+        for i in range(0, len(text), 7):
+            renderer.feed(text[i : i + 7])
+            assert renderer._splitter.open_lines <= 20
+
+    expected = io.StringIO()
+    Console(file=expected, width=60, color_system=None).print(Markdown(text))
+    assert output.getvalue().split() == expected.getvalue().split()
+    # The code block is not broken up by padding lines between pieces
+    lines = output.getvalue().splitlines()
+    start = next(i for i, line in enumerate(lines) if "value_0 " in line)
+    assert all("value_" in line for line in lines[start : start + 500])
+
+
+def test_streaming_renderer_highlights_code_once_closed() -> None:
+    """Test an open code block is plain text and highlighted when it closes."""
+    text = "Intro.\n\n```python\ndef f(x):\n    return x + 1\n```\n\nAfter.\n"
+    output = io.StringIO()
+    console = Console(file=output, width=60, force_terminal=True)
+
+    with StreamingMarkdownRenderer(console, live=False) as renderer:
+        renderer.feed(text[:30])
+        # Preceded by a blank line, as the intro was printed
+        tail = renderer._tail_renderable(renderer._splitter.tail).renderables[-1]
+        assert isinstance(tail, Syntax)
+        assert "text" in tail.lexer.aliases
+        renderer.feed(text[30:])
+
+    expected = io.StringIO()
+    Console(file=expected, width=60, force_terminal=True).print(Markdown(text))
+    assert output.getvalue() == expected.getvalue()
+    assert renderer.code_blocks == [CodeBlock("python", "def f(x):\n    return x + 1")]
+
+
+def test_streaming_renderer_caches_highlighted_code() -> None:
+    """Test a code block shown again is not highlighted again."""
+    text = "```rust\nfn cached_block() {}\n```\n"
+    outputs = []
+    for _ in range(2):
+        output = io.StringIO()
+        console = Console(file=output, width=60, force_terminal=True)
+        with StreamingMarkdownRenderer(console, live=False) as renderer:
+            renderer.feed(text)
+        outputs.append(output.getvalue())
+        if len(outputs) == 1:
+            hits, misses = HighlightedCode.hits, HighlightedCode.misses
+
+    assert outputs[0] == outputs[1]
+    assert (HighlightedCode.hits, HighlightedCode.misses) == (hits + 1, misses)
+
+
+def test_streaming_renderer_collects_long_and_unclosed_code_blocks() -> None:
+    """Test code blocks committed in pieces, or never closed, are collected."""
+    code = "\n".join(f"x{i} = {i}" for i in range(50))
+    text = f"Intro.\n\n```python\n{code}\n```\n\n~~~\nunclosed\n"
+    console = Console(file=io.StringIO(), width=60, color_system=None)
+
+    with StreamingMarkdownRenderer(console, window=10) as renderer:
+        for i in range(0, len(text), 7):
+            renderer.feed(text[i : i + 7])
+
+    assert renderer.code_blocks == [
+        CodeBlock("python", code),
+        CodeBlock("", "unclosed"),
+    ]
+
+
+class SlowTerminal(io.StringIO):
+    """Terminal whose writes back up, like a slow SSH link."""
+
+    def isatty(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        time.sleep(0.02)
+
+
+def test_streaming_renderer_paces_slow_terminal() -> None:
+    """Test redraws slow down for a backed-up terminal and skip states."""
+    output = TerminalOutput(SlowTerminal())
+    console = Console(file=output, width=60, color_system=None)
+    text = " ".join(f"word{i}" for i in range(400))
+
+    with StreamingMarkdownRenderer(console) as renderer:
+        for i in range(0, len(text), 8):
+            renderer.feed(text[i : i + 8])
+            time.sleep(0.001)
+        scheduler = renderer.scheduler
+        assert renderer.live
+
+    chunks = len(range(0, len(text), 8))
+    assert 0 < scheduler.frames < chunks / 4
+    assert scheduler.skipped > chunks / 2
+    assert scheduler.write_time >= 0.02 * scheduler.frames
+    assert scheduler.rate < 15
+    assert "word399" in output.file.getvalue()
+    assert output.bytes_written >= len(output.file.getvalue())
+
+
+def test_streaming_renderer_appends_when_not_a_terminal() -> None:
+    """Test piped output gets no live region or cursor movement."""
+    output = io.StringIO()
+    console = Console(file=output, width=60, color_system=None)
+
+    with StreamingMarkdownRenderer(console) as renderer:
+        for word in "One.\n\nTwo three.\n\nFour.".split(" "):
+            renderer.feed(word + " ")
+
+    assert not renderer.live
+    assert "\x1b" not in output.getvalue()
+    assert renderer.scheduler.frames == 0
+    assert output.getvalue().split() == ["One.", "Two", "three.", "Four."]
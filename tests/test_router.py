@@ -0,0 +1,123 @@
+"""Tests for the router module."""
+from unittest.mock import patch
+
+import pytest
+
+from mindterm.config import config
+from mindterm.router import Endpoint, Router, load_endpoints
+
+
+def make_endpoints(*names: str) -> list[Endpoint]:
+    """Build endpoints with the given names."""
+    return [Endpoint(name, f"http://{name}/v1", "model", "key") for name in names]
+
+
+def test_load_endpoints_default(tmp_path) -> None:
+    """Test the environment endpoint is used when there is no file."""
+    with patch.object(config, "base_url", "http://env-url"):
+        endpoints = load_endpoints(str(tmp_path / "missing.toml"))
+    assert [(e.name, e.base_url) for e in endpoints] == [("default", "http://env-url")]
+
+
+def test_load_endpoints_file(tmp_path, monkeypatch) -> None:
+    """Test endpoints are read from TOML with per-endpoint API keys."""
+    monkeypatch.setenv("LOCAL_API_KEY", "local-key")
+    path = tmp_path / "endpoints.toml"
+    path.write_text(
+        "[[endpoints]]\n"
+        'name = "primary"\n'
+        'base_url = "https://primary.example/v1"\n'
+        'model = "big"\n'
+        "\n"
+        "[[endpoints]]\n"
+        'base_url = "http://localhost:8000/v1"\n'
+        'api_key_env = "LOCAL_API_KEY"\n'
+    )
+    with patch.object(config, "model", "env-model"):
+        with patch.object(config, "api_key", "env-key"):
+            primary, local = load_endpoints(str(path))
+
+    assert (primary.name, primary.model, primary.api_key) == (
+        "primary",
+        "big",
+        "env-key",
+    )
+    assert (local.name, local.model, local.api_key) == (
+        "localhost:8000",
+        "env-model",
+        "local-key",
+    )
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["[[endpoints]]\nname = 'x'\n", "not toml [", "endpoints = []\n"],
+)
+def test_load_endpoints_invalid(tmp_path, content) -> None:
+    """Test malformed endpoint files are reported."""
+    path = tmp_path / "endpoints.toml"
+    path.write_text(content)
+    with pytest.raises(ValueError, match="Invalid endpoints file"):
+        load_endpoints(str(path))
+
+
+def test_router_prefers_fastest_endpoint() -> None:
+    """Test untried endpoints are explored, then the lowest TTFT wins."""
+    router = Router(make_endpoints("a", "b"))
+    a, b = router.endpoints
+    router.record_success(a, 0.9)
+    assert router.choose() is b
+    router.record_success(b, 0.2)
+    assert router.order() == [b, a]
+
+
+def test_router_fails_over_and_recovers() -> None:
+    """Test a failing endpoint cools down and is tried again afterwards."""
+    router = Router(make_endpoints("a", "b"), cooldown=10.0)
+    a, b = router.endpoints
+    router.record_success(a, 0.1)
+    router.record_success(b, 0.5)
+
+    with patch("mindterm.router.time.monotonic", return_value=100.0):
+        router.record_failure(a)
+        assert router.order() == [b, a]
+        assert router.stats()["Endpoint a"]["status"] == "cooling down"
+        router.record_failure(a)
+        assert router.health["a"].retry_at == 120.0
+
+    # After the cooldown a recovers, but sorts last while it mostly fails
+    with patch("mindterm.router.time.monotonic", return_value=130.0):
+        assert router.healthy(a)
+        assert router.order() == [b, a]
+        router.record_success(a, 0.1)
+        router.record_success(a, 0.1)
+        assert router.choose() is a
+
+
+def test_router_all_endpoints_down() -> None:
+    """Test an endpoint is still returned when all of them are cooling down."""
+    router = Router(make_endpoints("a", "b"))
+    a, b = router.endpoints
+    router.record_failure(b)
+    router.record_failure(a)
+    assert router.order() == [b, a]
+
+
+def test_router_resolve() -> None:
+    """Test names resolve to endpoints, their models, or the preferred endpoint."""
+    router = Router(
+        [
+            Endpoint("primary", "http://primary/v1", "big", "key"),
+            Endpoint("local", "http://local/v1", "small", "local-key"),
+        ]
+    )
+    primary, local = router.endpoints
+    assert router.resolve("local") is local
+    assert router.resolve("big") is primary
+    other = router.resolve("other-model")
+    assert (other.name, other.model, other.base_url, other.api_key) == (
+        "other-model",
+        "other-model",
+        "http://primary/v1",
+        "key",
+    )
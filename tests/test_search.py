@@ -0,0 +1,65 @@
+"""Tests for the search module."""
+from mindterm.search import MATCH_END, MATCH_START, SearchIndex, fts_query
+from mindterm.sessions import SessionStore
+
+
+def make_store(tmp_path) -> SessionStore:
+    """Create a session store with two short sessions."""
+    store = SessionStore(str(tmp_path / "sessions"))
+    first = store.create_session("python")
+    store.append(first, "user", "How do I reverse a list in Python?")
+    store.append(first, "assistant", "Use slicing: items[::-1] reverses a list.")
+    second = store.create_session("rust")
+    store.append(second, "user", "How do I reverse a vector in Rust?")
+    store.append(second, "assistant", "Call v.reverse() to reverse it in place.")
+    return store
+
+
+def test_fts_query_quotes_terms() -> None:
+    """Test free text is turned into a safe FTS5 query."""
+    assert fts_query("reverse list") == '"reverse" AND "list"'
+    assert fts_query('say "hi" NOT *') == '"say" AND """hi""" AND "NOT" AND "*"'
+    assert fts_query("   ") == ""
+
+
+def test_search_index_sync_is_incremental(tmp_path) -> None:
+    """Test only new turns are indexed on each sync."""
+    store = make_store(tmp_path)
+    index = SearchIndex(str(tmp_path / "search.db"))
+    assert index.sync(store) == 4
+    assert index.sync(store) == 0
+
+    store.append(1, "user", "Thanks!")
+    assert index.sync(store) == 1
+    assert index.position == 5
+
+
+def test_search_index_ranking_and_snippets(tmp_path) -> None:
+    """Test results are ranked and snippets mark the matched terms."""
+    store = make_store(tmp_path)
+    index = SearchIndex(":memory:")
+    index.sync(store)
+
+    results = index.search("reverse list")
+    assert {r.session for r in results} == {1}
+    assert f"{MATCH_START}reverse" in results[0].snippet
+    assert MATCH_END in results[0].snippet
+    assert results[0].score >= results[-1].score
+
+    assert {r.session for r in index.search("reverse")} == {1, 2}
+    assert index.search("golang") == []
+    assert index.search('"unbalanced') == []
+
+
+def test_search_index_persists(tmp_path) -> None:
+    """Test the index and its position survive reopening."""
+    store = make_store(tmp_path)
+    path = str(tmp_path / "search.db")
+    index = SearchIndex(path)
+    index.sync(store)
+    index.close()
+
+    reopened = SearchIndex(path)
+    assert reopened.position == 4
+    assert reopened.sync(store) == 0
+    assert len(reopened.search("vector")) == 1
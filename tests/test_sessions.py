@@ -0,0 +1,56 @@
+"""Tests for the sessions module."""
+import pytest
+
+from mindterm.sessions import SessionStore
+
+
+def test_session_store_round_trip(tmp_path) -> None:
+    """Test turns are stored per session and loaded in order."""
+    store = SessionStore(str(tmp_path))
+    first = store.create_session("first question")
+    second = store.create_session("second question")
+    store.append(first, "user", "first question")
+    store.append(second, "user", "second question")
+    store.append(first, "assistant", "first answer")
+
+    turns = store.load(first)
+    assert [(t.role, t.content) for t in turns] == [
+        ("user", "first question"),
+        ("assistant", "first answer"),
+    ]
+    assert [t.content for t in store.load(second)] == ["second question"]
+
+
+def test_session_store_list_sessions(tmp_path) -> None:
+    """Test listing sessions with titles and turn counts."""
+    store = SessionStore(str(tmp_path))
+    assert store.list_sessions() == []
+
+    session_id = store.create_session("hello")
+    store.append(session_id, "user", "hello")
+    store.append(session_id, "assistant", "hi there")
+    store.create_session("empty")
+
+    sessions = store.list_sessions()
+    assert [(s.id, s.title, s.turns) for s in sessions] == [
+        (1, "hello", 2),
+        (2, "empty", 0),
+    ]
+
+
+def test_session_store_persists(tmp_path) -> None:
+    """Test sessions survive reopening the store."""
+    store = SessionStore(str(tmp_path))
+    session_id = store.create_session("日本語")
+    store.append(session_id, "user", "日本語のテキスト")
+
+    reopened = SessionStore(str(tmp_path))
+    assert reopened.load(session_id)[0].content == "日本語のテキスト"
+    assert reopened.list_sessions()[0].title == "日本語"
+
+
+def test_session_store_unknown_session(tmp_path) -> None:
+    """Test loading a session that does not exist."""
+    store = SessionStore(str(tmp_path))
+    with pytest.raises(KeyError):
+        store.load(1)
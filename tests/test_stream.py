@@ -0,0 +1,93 @@
+"""Tests for the stream module."""
+import threading
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import pytest
+
+from mindterm.stream import StreamInfo, chunk_text, coalesce, iter_text
+
+
+def make_chunk(content=None, finish_reason=None, usage=None, choices=True):
+    """Build an object shaped like a chat completion chunk."""
+    choice = SimpleNamespace(
+        delta=SimpleNamespace(content=content), finish_reason=finish_reason
+    )
+    return SimpleNamespace(choices=[choice] if choices else [], usage=usage)
+
+
+def test_iter_text_skips_frames_and_records_metadata() -> None:
+    """Test role-only and usage-only frames are skipped but not lost."""
+    usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3)
+    chunks = [
+        make_chunk(content=""),
+        make_chunk("Hello"),
+        make_chunk(" world"),
+        make_chunk(finish_reason="length"),
+        make_chunk(usage=usage, choices=False),
+    ]
+    info = StreamInfo()
+    seen: list[str] = []
+
+    assert list(iter_text(chunks, info, seen.append)) == ["Hello", " world"]
+    assert seen == ["Hello", " world"]
+    assert (info.frames, info.pieces) == (5, 2)
+    assert info.finish_reason == "length" and info.truncated
+    assert info.total_tokens == 15
+
+
+def test_chunk_text() -> None:
+    """Test the text of a chunk is read safely."""
+    assert chunk_text(make_chunk("hi")) == "hi"
+    assert chunk_text(make_chunk(choices=False)) is None
+    assert StreamInfo().total_tokens is None
+
+
+def test_coalesce_batches_by_size() -> None:
+    """Test the first piece passes at once and later ones are batched."""
+    info = StreamInfo()
+    pieces = ["a", "b", "c", "dddddddd", "e"]
+    batches = list(coalesce(pieces, info, interval=10, max_chars=8))
+
+    # "dddddddd" fills a batch, "e" is the rest
+    assert batches == ["a", "bcdddddddd", "e"]
+    assert info.batches == 3
+
+
+def test_coalesce_yields_held_text_during_a_stall() -> None:
+    """Test held text is yielded when the interval ends, not with the next piece."""
+    resumed = threading.Event()
+
+    def stalled() -> Iterator[str]:
+        yield "a"
+        yield "b"
+        resumed.wait(5)
+        yield "c"
+
+    info = StreamInfo()
+    batches = coalesce(stalled(), info, interval=0.05)
+    assert next(batches) == "a"
+    assert next(batches) == "b"
+    # "b" was shown while the stream was still stalled
+    assert not resumed.is_set()
+    resumed.set()
+    assert list(batches) == ["c"]
+    assert info.batches == 3
+
+
+def test_coalesce_raises_stream_errors() -> None:
+    """Test an error reading the stream reaches the caller."""
+
+    def failing() -> Iterator[str]:
+        yield "a"
+        raise ConnectionError("reset")
+
+    batches = coalesce(failing(), interval=10)
+    assert next(batches) == "a"
+    with pytest.raises(ConnectionError):
+        next(batches)
+
+
+def test_coalesce_without_interval_passes_pieces_through() -> None:
+    """Test an interval of 0 yields every piece as it arrives."""
+    assert list(coalesce(["a", "b", "c"], interval=0)) == ["a", "b", "c"]
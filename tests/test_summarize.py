@@ -0,0 +1,152 @@
+"""Tests for the summarize module."""
+import threading
+import time
+from unittest.mock import Mock
+
+from mindterm.conversation import Conversation
+from mindterm.summarize import Summarizer, SummaryCache, range_key, summary_messages
+
+
+def long_conversation(exchanges: int = 4) -> Conversation:
+    """Build a conversation of exchanges of about 60 tokens each."""
+    conversation = Conversation("system", budget=100_000)
+    for i in range(exchanges):
+        conversation.add_user(f"question {i} " + "x" * 100)
+        conversation.add_assistant(f"answer {i} " + "y" * 100)
+    return conversation
+
+
+def wait_ready(summarizer: Summarizer) -> None:
+    """Wait for the background summary to finish."""
+    deadline = time.monotonic() + 2
+    while summarizer.stats()["pending"] == "yes":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_range_key_depends_on_summary_and_turns() -> None:
+    """Test the key changes with the previous summary and with any turn."""
+    turns = tuple(long_conversation(2).turns)
+    key = range_key(None, turns)
+    assert key == range_key(None, tuple(long_conversation(2).turns))
+    assert key != range_key("earlier", turns)
+    assert key != range_key(None, turns[:2])
+
+
+def test_summary_messages_include_previous_summary_and_turns() -> None:
+    """Test the request carries the summary so far and a transcript."""
+    turns = tuple(long_conversation(1).turns)
+    content = summary_messages("talked about tests", turns)[-1]["content"]
+    assert "talked about tests" in content
+    assert "User: question 0" in content
+    assert "Assistant: answer 0" in content
+
+
+def test_summary_cache_roundtrip(tmp_path) -> None:
+    """Test summaries survive reopening the cache."""
+    cache = SummaryCache(str(tmp_path / "summaries.db"))
+    cache.put("key", "summary")
+    cache.close()
+    cache = SummaryCache(str(tmp_path / "summaries.db"))
+    assert cache.get("key") == "summary"
+    assert cache.get("other") is None
+
+
+def test_summarizer_skips_short_conversations() -> None:
+    """Test nothing is summarized below the threshold."""
+    complete = Mock(return_value="summary")
+    summarizer = Summarizer(SummaryCache(":memory:"), complete, 1000, keep=2)
+    assert summarizer.schedule(long_conversation()) is None
+    complete.assert_not_called()
+
+
+def test_summarizer_compacts_older_turns_in_background() -> None:
+    """Test the older turns are summarized and replaced on the next request."""
+    complete = Mock(return_value=" asked four questions ")
+    summarizer = Summarizer(SummaryCache(":memory:"), complete, 100, keep=2)
+    conversation = long_conversation()
+    before = conversation.total_tokens
+
+    job = summarizer.schedule(conversation)
+    assert job is not None and len(job.turns) == 6
+    wait_ready(summarizer)
+
+    assert summarizer.apply(conversation)
+    assert conversation.summary == "asked four questions"
+    assert [turn.content[:10] for turn in conversation.turns] == [
+        "question 3",
+        "answer 3 y",
+    ]
+    assert conversation.total_tokens < before
+    stats = summarizer.stats()
+    assert stats["summary requests"] == 1
+    assert stats["turns summarized"] == 6
+    assert stats["tokens saved"] == before - conversation.total_tokens
+    # Nothing left to apply
+    assert not summarizer.apply(conversation)
+
+
+def test_summarizer_reuses_cached_summary() -> None:
+    """Test a range of turns summarized before is not requested again."""
+    cache = SummaryCache(":memory:")
+    complete = Mock(return_value="asked four questions")
+    first = Summarizer(cache, complete, 100, keep=2)
+    first.schedule(long_conversation())
+    wait_ready(first)
+
+    second = Summarizer(cache, complete, 100, keep=2)
+    conversation = long_conversation()
+    job = second.schedule(conversation)
+
+    assert job is not None and job.cached
+    assert second.apply(conversation)
+    assert complete.call_count == 1
+    assert second.stats()["cached"] == 1
+
+
+def test_summarizer_never_waits_for_a_summary() -> None:
+    """Test the history is sent in full while the summary is being written."""
+    release = threading.Event()
+
+    def complete(_messages) -> str:
+        release.wait(5)
+        return "summary"
+
+    summarizer = Summarizer(SummaryCache(":memory:"), complete, 100, keep=2)
+    conversation = long_conversation()
+    summarizer.schedule(conversation)
+
+    start = time.perf_counter()
+    assert not summarizer.apply(conversation)
+    assert time.perf_counter() - start < 0.1
+    assert len(conversation.turns) == 8
+
+    release.set()
+    wait_ready(summarizer)
+    assert summarizer.apply(conversation)
+
+
+def test_summarizer_drops_summary_of_other_turns() -> None:
+    """Test a summary is not applied once the conversation was reset."""
+    summarizer = Summarizer(SummaryCache(":memory:"), Mock(return_value="s"), 100, 2)
+    conversation = long_conversation()
+    summarizer.schedule(conversation)
+    wait_ready(summarizer)
+
+    conversation.reset()
+    conversation.add_user("new topic")
+    assert not summarizer.apply(conversation)
+    assert conversation.summary is None
+
+
+def test_summarizer_counts_failures() -> None:
+    """Test a failed summary request leaves the conversation alone."""
+    complete = Mock(side_effect=ConnectionError("down"))
+    summarizer = Summarizer(SummaryCache(":memory:"), complete, 100, keep=2)
+    conversation = long_conversation()
+    summarizer.schedule(conversation)
+    wait_ready(summarizer)
+
+    assert not summarizer.apply(conversation)
+    assert summarizer.stats()["failed"] == 1
+    assert len(conversation.turns) == 8
@@ -1,8 +1,23 @@
 """Tests for the UI module."""
+import io
 from unittest.mock import Mock, patch
 
-from mindterm.ui import CommandCompleter, TerminalUI
+import pytest
 from prompt_toolkit.document import Document
+from rich.console import Console
+
+from mindterm.codeblocks import CodeBlock
+from mindterm.compare import Comparison
+from mindterm.recall import RecallMatch
+from mindterm.router import Endpoint
+from mindterm.search import SearchResult
+from mindterm.sessions import SessionInfo
+from mindterm.ui import (
+    COMMAND_HELP,
+    CommandCompleter,
+    TerminalUI,
+    highlight_snippet,
+)
 
 
 def test_command_completer_initialization() -> None:
@@ -25,13 +40,19 @@ def test_command_completer_get_completions_at_beginning() -> None:
     document.cursor_position = 1
 
     completions = list(completer.get_completions(document, None))
-    assert len(completions) == 3  # Should have all three commands
+    assert len(completions) == 12  # Should have all twelve commands
 
     # Check that completions have correct text
     completion_texts = [c.text for c in completions]
     assert "\\chat" in completion_texts
     assert "\\bye" in completion_texts
     assert "\\help" in completion_texts
+    assert "\\stats" in completion_texts
+    assert "\\sessions" in completion_texts
+    assert "\\resume" in completion_texts
+    assert "\\search" in completion_texts
+    assert "\\fresh" in completion_texts
+    assert "\\compare" in completion_texts
 
 
 def test_command_completer_get_completions_partial_match() -> None:
@@ -74,6 +95,29 @@ def test_command_completer_no_completions_cursor_not_at_end() -> None:
     assert len(completions) == 0  # Should have no completions
 
 
+def test_command_completer_suggestions() -> None:
+    """Test suggested follow-ups are completed for plain text, not commands."""
+    completer = CommandCompleter()
+    completer.suggestions = ["How does it scale?", "Show an example"]
+
+    document = Mock(spec=Document)
+    document.text = ""
+    document.cursor_position = 0
+    completions = list(completer.get_completions(document, None))
+    assert [c.text for c in completions] == completer.suggestions
+
+    document.text = "how"
+    document.cursor_position = 3
+    completions = list(completer.get_completions(document, None))
+    assert [c.text for c in completions] == ["How does it scale?"]
+    assert completions[0].start_position == -3
+
+    document.text = "\\"
+    document.cursor_position = 1
+    completions = list(completer.get_completions(document, None))
+    assert "Show an example" not in [c.text for c in completions]
+
+
 def test_terminal_ui_initialization() -> None:
     """Test TerminalUI initialization."""
     with patch("mindterm.ui.PromptSession"):
@@ -102,3 +146,181 @@ def test_terminal_ui_get_user_input(mock_prompt_session) -> None:
     assert "MindTerm" in str(call_args[0])
     assert ">" in str(call_args[0])
     assert mock_session.prompt.call_args[1]["completer"] == ui.completer
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_display_stats(_mock_prompt_session) -> None:
+    """Test TerminalUI display_stats renders each section."""
+    ui = TerminalUI()
+    ui.console = Console(file=io.StringIO(), width=80)
+    ui.display_stats({"Cache": {"hits": 3, "misses": 1}})
+
+    output = ui.console.file.getvalue()
+    assert "Cache" in output
+    assert "hits" in output
+    assert "3" in output
+    assert "Rendering" in output
+    assert "bytes written" in output
+    assert "frames drawn" in output
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_display_stats_without_live_region(_mock_prompt_session) -> None:
+    """Test terminal output is reported without redraw stats when nothing is redrawn."""
+    ui = TerminalUI()
+    ui.live = False
+    ui.console = Console(file=io.StringIO(), width=80)
+    ui.display_stats({"Cache": {"hits": 3, "misses": 1}})
+
+    output = ui.console.file.getvalue()
+    assert "Rendering" in output
+    assert "bytes written" in output
+    assert "write time (s)" in output
+    assert "frames drawn" not in output
+    assert "refresh rate" not in output
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_counts_bytes_written(_mock_prompt_session) -> None:
+    """Test what the UI writes to the terminal is counted."""
+    ui = TerminalUI()
+    with patch("sys.stdout", io.StringIO()) as stdout:
+        ui.display_notice("héllo")
+    assert "héllo" in stdout.getvalue()
+    assert ui.render_stats()["bytes written"] == len(stdout.getvalue().encode())
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_display_help(_mock_prompt_session) -> None:
+    """Test TerminalUI display_help lists every command."""
+    ui = TerminalUI()
+    ui.console = Console(file=io.StringIO(), width=80)
+    ui.display_help()
+
+    output = ui.console.file.getvalue()
+    # Full usages, including bracketed arguments such as \profile [name]
+    for usage, _ in COMMAND_HELP:
+        assert usage in output
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_display_sessions(_mock_prompt_session) -> None:
+    """Test TerminalUI display_sessions renders a row per session."""
+    ui = TerminalUI()
+    ui.console = Console(file=io.StringIO(), width=100)
+    ui.display_sessions([SessionInfo(7, 0.0, "How do I sort a dict?", 4)])
+
+    output = ui.console.file.getvalue()
+    assert "7" in output
+    assert "How do I sort a dict?" in output
+
+
+def test_highlight_snippet() -> None:
+    """Test match markers are turned into styled spans."""
+    text = highlight_snippet("use \x02asyncio\x03 with \x02gather\x03 here")
+    assert text.plain == "use asyncio with gather here"
+    styled = [text.plain[span.start : span.end] for span in text.spans]
+    assert styled == ["asyncio", "gather"]
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_display_search_results(_mock_prompt_session) -> None:
+    """Test TerminalUI display_search_results shows snippets and sessions."""
+    ui = TerminalUI()
+    ui.console = Console(file=io.StringIO(), width=100)
+    ui.display_search_results(
+        "sort", [SearchResult(3, "assistant", 0.0, "use \x02sort\x03ed()", 1.0)]
+    )
+
+    output = ui.console.file.getvalue()
+    assert "session 3" in output
+    assert "use sorted()" in output
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_display_recalled(_mock_prompt_session) -> None:
+    """Test a recalled answer is shown with the earlier prompt it answered."""
+    ui = TerminalUI()
+    ui.console = Console(file=io.StringIO(), width=100)
+    ui.display_recalled(
+        RecallMatch("How do I reverse\na list in place?", "Use `reverse()`.", 0.9, 0.0)
+    )
+
+    output = ui.console.file.getvalue()
+    assert "Recalled answer to: How do I reverse a list in place?" in output
+    assert "90% similar prompt" in output
+    assert "reverse()" in output
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_get_user_input_ctrl_c(mock_prompt_session) -> None:
+    """Test Ctrl+C at the prompt is passed on so the caller can cancel."""
+    mock_prompt_session.return_value.prompt.side_effect = KeyboardInterrupt
+    ui = TerminalUI()
+    with pytest.raises(KeyboardInterrupt):
+        ui.get_user_input()
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_set_status(mock_prompt_session) -> None:
+    """Test the status is shown in the prompt's bottom toolbar."""
+    ui = TerminalUI()
+    ui.set_status("Streaming answer")
+    assert mock_prompt_session.return_value.bottom_toolbar == "Streaming answer"
+    ui.set_status(None)
+    assert mock_prompt_session.return_value.bottom_toolbar is None
+    assert mock_prompt_session.return_value.app.invalidate.call_count == 2
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_set_suggestions(_mock_prompt_session) -> None:
+    """Test suggestions reach the completer and are announced in the toolbar."""
+    ui = TerminalUI()
+    ui.set_suggestions(["Why?"])
+    assert ui.completer.suggestions == ["Why?"]
+    assert ui.status is not None
+
+    ui.set_suggestions([])
+    assert ui.completer.suggestions == []
+    assert ui.status is None
+
+
+def finished_comparison() -> Comparison:
+    """Build a comparison whose two answers have ended."""
+    targets = [(name, Endpoint(name, "http://test/v1", name, "key")) for name in "ab"]
+    comparison = Comparison(targets, Mock(), Mock())
+    first, second = comparison.answers
+    first.chunks = ["**Paris** is the capital."]
+    first.ttft, first.elapsed = 0.1, 0.5
+    second.error, second.elapsed = "model not found", 0.2
+    comparison._end = comparison._start + 0.5
+    return comparison
+
+
+@pytest.mark.parametrize("live", [True, False])
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_display_comparison(_mock_prompt_session, live: bool) -> None:
+    """Test every model's answer or error is shown with its speed."""
+    ui = TerminalUI()
+    ui.live = live
+    ui.console = Console(file=io.StringIO(), width=120)
+    ui.display_comparison(finished_comparison())
+
+    output = ui.console.file.getvalue()
+    assert "Paris is the capital." in output
+    assert "TTFT 0.10s" in output
+    assert "model not found" in output
+    assert "2 models in 0.50s (one after another: 0.70s)" in output
+    assert ui.status is None
+
+
+@patch("mindterm.ui.PromptSession")
+def test_terminal_ui_keeps_code_blocks_of_last_answer(_mock_prompt_session) -> None:
+    """Test the code blocks of the last answer are kept for \\code."""
+    ui = TerminalUI()
+    ui.console = Console(file=io.StringIO(), width=80)
+    ui.display_streamed_response(iter(["Run:\n\n```sh\nls", "\n```\n"]))
+    assert ui.code_blocks == [CodeBlock("sh", "ls")]
+
+    ui.display_response("No code here.")
+    assert ui.code_blocks == []
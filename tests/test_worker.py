@@ -0,0 +1,128 @@
+"""Tests for the worker module."""
+import threading
+from collections.abc import Generator
+from unittest.mock import Mock
+
+from mindterm.worker import ResponseWorker
+
+
+def test_worker_runs_prompts_and_tasks_in_order() -> None:
+    """Test queued prompts and commands run one at a time in order."""
+    client = Mock()
+    client.cancelled = False
+    client.last_stream = None
+    client.last_error = None
+    client.recall.return_value = None
+    client.get_completion.side_effect = lambda text: [text.upper()]
+    ui = Mock()
+    events: list[str] = []
+    ui.display_streamed_response.side_effect = lambda chunks: events.extend(chunks)
+
+    worker = ResponseWorker(client, ui)
+    worker.submit_prompt("first")
+    worker.submit(lambda: events.append("reset"))
+    worker.submit_prompt("second")
+    worker.close()
+
+    assert events == ["FIRST", "reset", "SECOND"]
+    assert not worker.busy
+    ui.display_notice.assert_not_called()
+    ui.set_status.assert_called_with(None)
+    # Follow-ups are prefetched after each answer
+    assert client.prefetch_followups.call_count == 2
+    client.prefetch_followups.assert_called_with(ui.set_suggestions)
+
+
+def test_worker_cancel_only_stops_current_answer() -> None:
+    """Test cancel interrupts the streaming answer and keeps queued prompts."""
+    started = threading.Event()
+    release = threading.Event()
+    client = Mock()
+    client.cancelled = False
+    client.recall.return_value = None
+
+    def get_completion(text: str) -> Generator[str, None, None]:
+        started.set()
+        if text == "slow":
+            release.wait(timeout=5)
+        yield text
+
+    def cancel() -> None:
+        client.cancelled = True
+        release.set()
+
+    client.get_completion.side_effect = get_completion
+    client.cancel.side_effect = cancel
+    ui = Mock()
+    answered: list[str] = []
+    ui.display_streamed_response.side_effect = lambda chunks: answered.extend(chunks)
+
+    worker = ResponseWorker(client, ui)
+    worker.submit_prompt("slow")
+    worker.submit_prompt("next")
+    started.wait(timeout=5)
+    assert worker.busy
+    worker.cancel()
+    worker.close()
+
+    client.cancel.assert_called_once()
+    ui.display_notice.assert_called_with("Response cancelled.")
+    assert answered == ["slow", "next"]
+    client.prefetch_followups.assert_not_called()
+
+
+def test_worker_cancel_when_idle() -> None:
+    """Test cancel does nothing when no answer is streaming."""
+    client = Mock()
+    worker = ResponseWorker(client, Mock())
+    worker.cancel()
+    worker.close()
+    client.cancel.assert_not_called()
+
+
+def test_worker_shows_recalled_answer_and_asks_fresh() -> None:
+    """Test a recalled answer is shown without a request, and \\fresh re-asks."""
+    client = Mock()
+    client.cancelled = False
+    client.last_stream = None
+    client.last_error = None
+    match = Mock()
+    client.recall.return_value = match
+    client.forget_recalled.side_effect = ["Hello", None]
+    client.get_completion.return_value = ["fresh"]
+    ui = Mock()
+
+    worker = ResponseWorker(client, ui)
+    worker.submit_prompt("Hello")
+    worker.submit_fresh()
+    worker.submit_fresh()
+    worker.close()
+
+    client.accept_recalled.assert_called_once_with("Hello", match)
+    ui.display_recalled.assert_called_once_with(match)
+    client.recall.assert_called_once_with("Hello")
+    client.get_completion.assert_called_once_with("Hello")
+    ui.display_streamed_response.assert_called_once_with(["fresh"])
+    ui.display_notice.assert_called_once_with(
+        "The last answer was not recalled.", style="red"
+    )
+    assert client.prefetch_followups.call_count == 2
+
+
+def test_worker_notes_truncated_answer() -> None:
+    """Test an answer cut off at the output limit is pointed out."""
+    client = Mock()
+    client.cancelled = False
+    client.recall.return_value = None
+    client.get_completion.return_value = ["partial"]
+    client.last_error = None
+    client.last_stream.truncated = True
+    ui = Mock()
+
+    worker = ResponseWorker(client, ui)
+    worker.submit_prompt("Write a novel")
+    worker.close()
+
+    ui.display_notice.assert_called_once_with(
+        "The answer was cut off at the model's output limit."
+    )